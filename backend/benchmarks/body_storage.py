@@ -0,0 +1,187 @@
+"""Measure the email body layouts: inline column vs compressed ``email_bodies``.
+
+    python -m backend.benchmarks.body_storage --size 20000
+    python -m backend.benchmarks.body_storage --replay      # bodies of the live DB
+
+The same corpus is written to a fresh SQLite file per layout.  Reported per
+layout: file size, pages of the ``emails`` table (what every list query and
+page scan pulls through the page cache), time of a list query that scans
+the table, and time to read and decode one body for the detail view.
+
+The synthetic corpus imitates corporate mail: greeting, a few paragraphs
+from a shared pool, quoted replies and a long signature with a legal
+notice, so templates repeat across emails the way they do in practice.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.config import settings
+from backend.db import bodies
+
+_TEAMS = ["인사팀", "총무팀", "개발1팀", "개발2팀", "영업본부", "재무팀", "보안팀", "품질관리팀"]
+_GREETINGS = [
+    "안녕하세요, {team} {name}입니다.",
+    "{name}님, 안녕하세요.",
+    "수고 많으십니다. {team}에서 안내드립니다.",
+]
+_PARAGRAPHS = [
+    "다음 주 {day}에 예정된 {topic} 관련하여 일정 공유드립니다. 참석 대상자는 첨부된 명단을 확인해 주시기 바랍니다.",
+    "{topic} 진행 현황을 아래와 같이 정리하였습니다. 지연 항목은 담당자께서 금주 중으로 회신 부탁드립니다.",
+    "요청하신 {topic} 자료를 첨부합니다. 검토 후 의견이 있으시면 {day}까지 말씀해 주세요.",
+    "사내 보안 정책에 따라 {topic} 관련 계정 비밀번호를 변경해 주시기 바랍니다. 미변경 시 접속이 제한될 수 있습니다.",
+    "{topic} 예산 집행 내역을 확인한 결과 일부 항목의 증빙이 누락되어 있습니다. 재무팀으로 보완 제출 부탁드립니다.",
+    "고객사 요청으로 {topic} 일정이 {day}로 조정되었습니다. 관련 부서는 변경된 일정에 맞춰 준비해 주시기 바랍니다.",
+]
+_TOPICS = ["분기 실적 보고", "신규 프로젝트 킥오프", "정기 보안 점검", "연말 정산", "워크숍", "시스템 점검", "채용 면접"]
+_DAYS = ["월요일", "화요일", "수요일", "목요일", "금요일", "3월 2일", "11월 15일"]
+_SIGNATURE = (
+    "\n\n감사합니다.\n{name} 드림\n{team} | 주식회사 메일어시스턴트\n"
+    "Tel. 02-1234-{ext} | Mobile. 010-{ext}-5678\n서울특별시 강남구 테헤란로 123, 45층\n\n"
+    "본 메일은 발신자가 지정한 수신인만을 위한 것으로 비밀정보를 포함하고 있을 수 있습니다. "
+    "수신인이 아닌 경우 본 메일의 내용을 열람, 복사, 배포하는 것은 엄격히 금지되어 있으며, "
+    "잘못 수신하신 경우 즉시 발신자에게 알려주시고 본 메일을 삭제하여 주시기 바랍니다.\n"
+    "This e-mail is intended only for the named recipient and may contain confidential information."
+)
+_NAMES = ["김민수", "이서연", "박지훈", "최유진", "정하늘", "강도윤", "윤서아"]
+
+
+def make_corpus(size: int, seed: int = 0) -> list[str]:
+    """Templated Korean corporate emails, some with quoted replies."""
+    rng = random.Random(seed)
+    corpus: list[str] = []
+    for _ in range(size):
+        team, name = rng.choice(_TEAMS), rng.choice(_NAMES)
+        fill = {
+            "team": team, "name": name, "topic": rng.choice(_TOPICS),
+            "day": rng.choice(_DAYS), "ext": rng.randint(1000, 9999),
+        }
+        parts = [rng.choice(_GREETINGS).format(**fill)]
+        parts += [rng.choice(_PARAGRAPHS).format(**fill) for _ in range(rng.randint(2, 6))]
+        body = "\n\n".join(parts) + _SIGNATURE.format(**fill)
+        if corpus and rng.random() < 0.3:
+            quoted = "\n".join("> " + line for line in rng.choice(corpus).splitlines())
+            body += "\n\n-----Original Message-----\n" + quoted
+        corpus.append(body)
+    return corpus
+
+
+def load_replay(limit: int) -> list[str]:
+    """Bodies of the newest *limit* emails of the configured database."""
+    import asyncio
+
+    from backend.db.sqlite import get_body_samples
+
+    return asyncio.run(get_body_samples(limit))
+
+
+def _create(path: str, inline: bool) -> sqlite3.Connection:
+    db = sqlite3.connect(path)
+    body_column = "body TEXT NOT NULL," if inline else "preview TEXT,"
+    db.execute(f"""
+        CREATE TABLE emails (
+            id INTEGER PRIMARY KEY, sender TEXT, subject TEXT, {body_column}
+            summary TEXT, category TEXT, created_at TEXT
+        )
+    """)
+    db.execute(
+        "CREATE TABLE email_bodies (email_id INTEGER PRIMARY KEY, codec TEXT, size INTEGER, data BLOB)"
+    )
+    return db
+
+
+def build(path: str, corpus: list[str], layout: str, dictionary: bytes | None) -> sqlite3.Connection:
+    """Write *corpus* in *layout*: ``inline`` or a ``BODY_COMPRESSION`` codec."""
+    db = _create(path, inline=layout == "inline")
+    settings.BODY_COMPRESSION = "raw" if layout == "inline" else layout.removesuffix("+dict")
+    for i, body in enumerate(corpus):
+        row = (i, f"user{i % 50}@example.com", f"제목 {i}", f"요약 {i}", f"c{i % 5}", f"2025-01-{i % 28 + 1:02d}")
+        if layout == "inline":
+            db.execute("INSERT INTO emails VALUES (?, ?, ?, ?, ?, ?, ?)", (*row[:3], body, *row[3:]))
+            continue
+        db.execute("INSERT INTO emails VALUES (?, ?, ?, ?, ?, ?, ?)", (*row[:3], body[:200], *row[3:]))
+        codec, blob = bodies.encode(body, (1, dictionary) if layout.endswith("+dict") else None)
+        db.execute("INSERT INTO email_bodies VALUES (?, ?, ?, ?)", (i, codec, len(body.encode()), blob))
+    db.commit()
+    db.execute("VACUUM")
+    return db
+
+
+def _pages(db: sqlite3.Connection, table: str) -> int:
+    return db.execute("SELECT COUNT(*) FROM dbstat WHERE name = ?", (table,)).fetchone()[0]
+
+
+def measure(db: sqlite3.Connection, path: str, layout: str, dictionary: bytes | None, repeats: int) -> dict:
+    columns = "id, sender, subject, summary, category, created_at"
+    list_times, detail_times = [], []
+    count = db.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+    rng = random.Random(1)
+    for _ in range(repeats):
+        start = time.perf_counter()
+        db.execute(f"SELECT {columns} FROM emails ORDER BY created_at DESC LIMIT 50").fetchall()
+        list_times.append(time.perf_counter() - start)
+
+        email_id = rng.randrange(count)
+        start = time.perf_counter()
+        if layout == "inline":
+            db.execute("SELECT body FROM emails WHERE id = ?", (email_id,)).fetchone()
+        else:
+            codec, blob = db.execute(
+                "SELECT codec, data FROM email_bodies WHERE email_id = ?", (email_id,)
+            ).fetchone()
+            bodies.decode(codec, blob, {1: dictionary} if dictionary else None)
+        detail_times.append(time.perf_counter() - start)
+    return {
+        "layout": layout,
+        "file_mb": Path(path).stat().st_size / (1024 * 1024),
+        "email_pages": _pages(db, "emails"),
+        "body_pages": _pages(db, "email_bodies"),
+        "list_ms": float(np.median(list_times)) * 1000,
+        "detail_ms": float(np.median(detail_times)) * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks.body_storage")
+    parser.add_argument("--size", type=int, default=20000, help="synthetic emails")
+    parser.add_argument(
+        "--replay", nargs="?", const=20000, type=int, default=None,
+        help="use the newest N bodies of the configured database instead",
+    )
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--dict-size", type=int, default=112640)
+    args = parser.parse_args(argv)
+
+    corpus = load_replay(args.replay) if args.replay else make_corpus(args.size)
+    layouts = ["inline", "raw", "zlib"]
+    dictionary = None
+    if bodies.zstandard is not None:
+        layouts.append("zstd")
+        dictionary = bodies.train_dictionary(corpus[:2000], args.dict_size)
+        layouts.append("zstd+dict")
+    total_mb = sum(len(body.encode()) for body in corpus) / (1024 * 1024)
+    print(f"{len(corpus)} bodies, {total_mb:.1f} MB of text")
+    print(f"{'layout':<10} {'file MB':>8} {'email pg':>9} {'body pg':>8} {'list ms':>8} {'detail ms':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for layout in layouts:
+            path = str(Path(directory) / f"{layout.replace('+', '_')}.db")
+            db = build(path, corpus, layout, dictionary)
+            r = measure(db, path, layout, dictionary, args.repeats)
+            db.close()
+            print(
+                f"{r['layout']:<10} {r['file_mb']:>8.1f} {r['email_pages']:>9} {r['body_pages']:>8}"
+                f" {r['list_ms']:>8.2f} {r['detail_ms']:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Sweep ChromaDB HNSW parameters: recall@k vs latency, build time and memory.
+
+    python -m backend.benchmarks.hnsw --size 100000 --m 16,32 --construction-ef 100,200 \\
+        --search-ef 20,50,100,200
+
+    python -m backend.benchmarks.hnsw --replay          # vectors of the live store
+    python -m backend.benchmarks.hnsw --replay vectors.npy
+
+For every ``(M, construction_ef)`` pair a collection is built once and then
+queried with each ``search_ef``.  Exact top-k by brute force is the ground
+truth.  Memory is the on-disk index size plus the growth of the process's
+peak RSS during the build (``-`` where neither ``resource`` nor
+``psutil`` can report it).  Use the results to set ``HNSW_M``,
+``HNSW_CONSTRUCTION_EF`` and ``HNSW_SEARCH_EF``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from chromadb.api.client import SharedSystemClient
+
+from backend.benchmarks.vector_store import ground_truth, make_dataset, run_queries
+
+_INSERT_BATCH = 1000
+_PAGE_SIZE = 1000
+
+
+def _ints(text: str) -> list[int]:
+    return [int(part) for part in text.split(",") if part]
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _dir_size_mb(path: str) -> float:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file()) / (1024 * 1024)
+
+
+def load_replay(source: str, queries: int, seed: int = 0) -> dict:
+    """Dataset from stored vectors; a random sample of them becomes the queries.
+
+    *source* is a ``.npy`` matrix, or ``"store"`` for the active collection.
+    """
+    if source == "store":
+        from backend.db.chromadb import get_collection
+
+        collection = get_collection()
+        pages = []
+        offset = 0
+        while True:
+            page = collection.get(include=["embeddings"], limit=_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+            offset += len(page["ids"])
+        vectors = np.concatenate(pages) if pages else np.zeros((0, 0), dtype=np.float32)
+    else:
+        vectors = np.load(source).astype(np.float32)
+
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    held_out, stored = order[:queries], order[queries:]
+    return {
+        "vectors": vectors[stored],
+        "categories": ["c0"] * len(stored),
+        "queries": vectors[held_out],
+    }
+
+
+def build(dataset: dict, path: str, m: int, construction_ef: int) -> tuple:
+    """Build a collection; return it with build seconds and memory figures."""
+    rss_before = _peak_rss_mb()
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_or_create_collection(
+        name="bench",
+        metadata={"hnsw:space": "cosine", "hnsw:M": m, "hnsw:construction_ef": construction_ef},
+    )
+    vectors = dataset["vectors"]
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), _INSERT_BATCH):
+        batch = vectors[offset:offset + _INSERT_BATCH]
+        collection.upsert(
+            ids=[str(i) for i in range(offset, offset + len(batch))],
+            embeddings=batch.tolist(),
+        )
+    build_s = time.perf_counter() - start
+    rss_after = _peak_rss_mb()
+    rss_mb = None if rss_before is None or rss_after is None else rss_after - rss_before
+    return collection, build_s, _dir_size_mb(path), rss_mb
+
+
+def reopen(path: str, search_ef: int):
+    """Set ``search_ef`` and reload the index — a loaded index keeps its old value."""
+    chromadb.PersistentClient(path=path).get_collection("bench").modify(
+        configuration={"hnsw": {"ef_search": search_ef}}
+    )
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=path).get_collection("bench")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks.hnsw")
+    parser.add_argument("--size", type=int, default=20000, help="synthetic vectors to store")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument(
+        "--replay", nargs="?", const="store", default=None,
+        help="use stored vectors instead of synthetic ones (.npy file or the live store)",
+    )
+    parser.add_argument("--m", type=_ints, default=[16])
+    parser.add_argument("--construction-ef", type=_ints, default=[100])
+    parser.add_argument("--search-ef", type=_ints, default=[10, 50, 100, 200])
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        dataset = load_replay(args.replay, args.queries)
+    else:
+        dataset = make_dataset(args.size, args.dim, categories=1, queries=args.queries)
+    truth = ground_truth(dataset, args.k)
+    size, dim = dataset["vectors"].shape
+    print(f"{size} vectors x {dim} dims, {len(dataset['queries'])} queries, recall@{args.k}")
+    print(f"{'M':>4} {'c_ef':>5} {'build s':>8} {'disk MB':>8} {'rss MB':>7}"
+          f" {'s_ef':>5} {'p50 ms':>7} {'p95 ms':>7} {'recall':>7}")
+
+    for m in args.m:
+        for construction_ef in args.construction_ef:
+            with tempfile.TemporaryDirectory() as path:
+                _, build_s, disk_mb, rss_mb = build(dataset, path, m, construction_ef)
+                rss = "-" if rss_mb is None else f"{rss_mb:.1f}"
+                for search_ef in args.search_ef:
+                    collection = reopen(path, search_ef)
+                    r = run_queries(collection, dataset, args.k, truth, None)
+                    print(
+                        f"{m:>4} {construction_ef:>5} {build_s:>8.2f} {disk_mb:>8.1f} {rss:>7}"
+                        f" {search_ef:>5} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['recall']:>7.3f}"
+                    )
+                SharedSystemClient.clear_system_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Import-time profile of the API — what a cold start pays before serving.
+
+    python -m backend.benchmarks.startup            # backend.main, top 15
+    python -m backend.benchmarks.startup --top 30 --module backend.cli
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter
+and summarizes the output: total import time and the slowest packages by
+cumulative time.  ``backend/tests/test_startup.py`` holds the budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def profile_imports(module: str = "backend.main") -> list[dict]:
+    """Every import made by ``import module``, with self/cumulative microseconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return imports
+
+
+def total_ms(imports: list[dict], module: str = "backend.main") -> float:
+    """Cumulative import time of *module* itself."""
+    return next(i["cumulative_us"] for i in imports if i["module"] == module) / 1000
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks.startup")
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    imports = profile_imports(args.module)
+    print(f"import {args.module}: {total_ms(imports, args.module):.0f} ms, {len(imports)} modules")
+    # Top-level packages only, so nested imports are not counted twice
+    packages = [i for i in imports if "." not in i["module"]]
+    print(f"{'cumulative ms':>13} {'self ms':>8}  package")
+    for i in sorted(packages, key=lambda i: -i["cumulative_us"])[:args.top]:
+        print(f"{i['cumulative_us'] / 1000:>13.1f} {i['self_us'] / 1000:>8.1f}  {i['module']}")
+
+
+if __name__ == "__main__":
+    main()
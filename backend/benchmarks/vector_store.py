@@ -0,0 +1,144 @@
+"""Benchmark the vector store backends on synthetic data.
+
+    python -m backend.benchmarks.vector_store --size 50000 --dim 1536
+
+For each backend the same vectors are inserted into a fresh collection in a
+temporary directory, then the same queries run with and without a category
+filter.  Recall@k is measured against exact brute-force results, so the
+flat backend always scores 1.0 and Chroma shows its HNSW approximation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+from backend.db.flat_index import FlatIndexClient
+
+_INSERT_BATCH = 1000
+
+
+def make_dataset(size: int, dim: int, categories: int, queries: int, seed: int = 0) -> dict:
+    """Clustered unit vectors with a category per row, plus held-out queries."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(categories, 1) * 4, dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=size + queries)
+    vectors = centers[labels] + 0.5 * rng.normal(size=(size + queries, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return {
+        "vectors": vectors[:size],
+        "categories": [f"c{label % categories}" for label in labels[:size]],
+        "queries": vectors[size:],
+    }
+
+
+def ground_truth(dataset: dict, k: int, category: str | None = None) -> list[set[int]]:
+    """Exact top-k row numbers per query by brute force."""
+    vectors = dataset["vectors"]
+    scores = dataset["queries"] @ vectors.T
+    if category is not None:
+        mask = np.array([c == category for c in dataset["categories"]])
+        scores[:, ~mask] = -np.inf
+    top = np.argsort(-scores, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def _open(backend: str, path: str, metadata: dict | None = None):
+    if backend == "flat":
+        client = FlatIndexClient(path)
+    else:
+        client = chromadb.PersistentClient(path=path)
+    return client.get_or_create_collection(
+        name="bench", metadata={"hnsw:space": "cosine", **(metadata or {})}
+    )
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000 if samples else 0.0
+
+
+def run_queries(collection, dataset: dict, k: int, truth: list[set[int]], where: dict | None) -> dict:
+    """Latency percentiles (ms) and recall@k of *collection* for all queries."""
+    latencies: list[float] = []
+    hits = 0
+    for query, expected in zip(dataset["queries"], truth):
+        kwargs: dict = {"query_embeddings": [query.tolist()], "n_results": k, "include": []}
+        if where is not None:
+            kwargs["where"] = where
+        start = time.perf_counter()
+        result = collection.query(**kwargs)
+        latencies.append(time.perf_counter() - start)
+        hits += len(expected & {int(row_id) for row_id in result["ids"][0]})
+    total = sum(len(expected) for expected in truth) or 1
+    return {
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "recall": hits / total,
+    }
+
+
+def bench_backend(backend: str, dataset: dict, k: int, metadata: dict | None = None) -> dict:
+    """Build a collection from *dataset* and measure it."""
+    with tempfile.TemporaryDirectory() as path:
+        collection = _open(backend, path, metadata)
+        vectors = dataset["vectors"]
+
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), _INSERT_BATCH):
+            rows = range(offset, min(offset + _INSERT_BATCH, len(vectors)))
+            collection.upsert(
+                ids=[str(i) for i in rows],
+                embeddings=vectors[offset:offset + len(rows)].tolist(),
+                documents=["" for _ in rows],
+                metadatas=[{"category": dataset["categories"][i]} for i in rows],
+            )
+        build_s = time.perf_counter() - start
+
+        # Reopen to measure cold start, as a restarted worker would
+        del collection
+        start = time.perf_counter()
+        collection = _open(backend, path, metadata)
+        collection.query(query_embeddings=[dataset["queries"][0].tolist()], n_results=k, include=[])
+        open_s = time.perf_counter() - start
+
+        category = dataset["categories"][0]
+        return {
+            "backend": backend,
+            "build_s": build_s,
+            "open_s": open_s,
+            "all": run_queries(collection, dataset, k, ground_truth(dataset, k), None),
+            "filtered": run_queries(
+                collection, dataset, k, ground_truth(dataset, k, category), {"category": category}
+            ),
+        }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks.vector_store")
+    parser.add_argument("--size", type=int, default=20000, help="number of stored vectors")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=5, help="distinct filter values")
+    parser.add_argument("--backends", default="chroma,flat")
+    args = parser.parse_args(argv)
+
+    dataset = make_dataset(args.size, args.dim, args.categories, args.queries)
+    print(f"{args.size} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print(f"{'backend':<8} {'build s':>8} {'open s':>7} {'p50 ms':>7} {'p95 ms':>7} {'recall':>7}"
+          f" {'flt p50':>8} {'flt p95':>8} {'flt rec':>8}")
+    for backend in args.backends.split(","):
+        r = bench_backend(backend, dataset, args.k)
+        print(
+            f"{r['backend']:<8} {r['build_s']:>8.2f} {r['open_s']:>7.3f}"
+            f" {r['all']['p50_ms']:>7.2f} {r['all']['p95_ms']:>7.2f} {r['all']['recall']:>7.3f}"
+            f" {r['filtered']['p50_ms']:>8.2f} {r['filtered']['p95_ms']:>8.2f} {r['filtered']['recall']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
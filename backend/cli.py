@@ -0,0 +1,138 @@
+"""Maintenance commands.
+
+    python -m backend.cli reindex [--embedding-model MODEL]
+    python -m backend.cli compress-bodies [--train] [--samples N] [--dict-size BYTES]
+    python -m backend.cli import-mail PATH [--format mbox|eml|ndjson] [--restart]
+    python -m backend.cli export PATH [--vectors]
+    python -m backend.cli snapshot
+    python -m backend.cli restore NAME
+
+Run these while the API server is stopped — ChromaDB's persistent store is
+not meant to be written by two processes.  With the server running, use the
+``/api/admin/...`` endpoints instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+
+from backend.db import bodies
+from backend.db.sqlite import (
+    add_body_dictionary, get_body_samples, get_body_storage_stats, init_db, recompress_bodies
+)
+from backend.services import export, indexer, mailbox, reindex, snapshots
+
+
+async def _reindex(args: argparse.Namespace) -> dict:
+    await init_db()
+    await reindex.load_state()
+    # Apply pending changes first so the old collection is complete for rollback
+    await indexer.drain()
+    return await reindex.run_reindex(args.embedding_model)
+
+
+async def _compress_bodies(args: argparse.Namespace) -> dict:
+    await init_db()
+    before = await get_body_storage_stats()
+    if args.train:
+        samples = await get_body_samples(args.samples)
+        dict_id = await add_body_dictionary(bodies.train_dictionary(samples, args.dict_size))
+        logging.getLogger(__name__).info(
+            "Trained body dictionary %d from %d samples", dict_id, len(samples)
+        )
+    rewritten = await recompress_bodies()
+    return {"rewritten": rewritten, "before": before, "after": await get_body_storage_stats()}
+
+
+async def _import_mail(args: argparse.Namespace) -> dict:
+    await init_db()
+    await reindex.load_state()
+    job = await mailbox.run_import(Path(args.path), args.format, restart=args.restart)
+    await indexer.drain()
+    return job
+
+
+async def _export(args: argparse.Namespace) -> dict:
+    await init_db()
+    await reindex.load_state()
+    size = 0
+    with open(args.path, "wb") as f:
+        async for chunk in export.export_ndjson(args.vectors):
+            f.write(chunk)
+            size += len(chunk)
+    return {"path": str(Path(args.path).resolve()), "bytes": size}
+
+
+async def _snapshot(args: argparse.Namespace) -> dict:
+    await init_db()
+    await reindex.load_state()
+    return await snapshots.create_snapshot()
+
+
+async def _restore(args: argparse.Namespace) -> dict:
+    return await snapshots.restore_snapshot(args.name)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reindex_parser = commands.add_parser(
+        "reindex", help="rebuild the vector index into a new collection (resumable)"
+    )
+    reindex_parser.add_argument(
+        "--embedding-model", help="embedding model for a new rebuild (default: EMBEDDING_MODEL)"
+    )
+    reindex_parser.set_defaults(handler=_reindex)
+
+    compress_parser = commands.add_parser(
+        "compress-bodies", help="re-encode stored email bodies with BODY_COMPRESSION"
+    )
+    compress_parser.add_argument(
+        "--train", action="store_true", help="first train a zstd dictionary from recent bodies"
+    )
+    compress_parser.add_argument("--samples", type=int, default=2000)
+    compress_parser.add_argument("--dict-size", type=int, default=112640, help="dictionary bytes")
+    compress_parser.set_defaults(handler=_compress_bodies)
+
+    import_parser = commands.add_parser(
+        "import-mail",
+        help="import an mbox archive, an .eml file, a directory of .eml files or an NDJSON export",
+    )
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["mbox", "eml", "ndjson"], help="default: detected")
+    import_parser.add_argument(
+        "--restart", action="store_true", help="start over instead of resuming (stored mail is skipped)"
+    )
+    import_parser.set_defaults(handler=_import_mail)
+
+    export_parser = commands.add_parser("export", help="write every email to an NDJSON file")
+    export_parser.add_argument("path")
+    export_parser.add_argument(
+        "--vectors", action="store_true", help="include chunks and embeddings (restored without re-embedding)"
+    )
+    export_parser.set_defaults(handler=_export)
+
+    snapshot_parser = commands.add_parser(
+        "snapshot", help="copy the database and the active vector collection to SNAPSHOT_PATH"
+    )
+    snapshot_parser.set_defaults(handler=_snapshot)
+
+    restore_parser = commands.add_parser(
+        "restore", help="replace the database and vector collection with a snapshot"
+    )
+    restore_parser.add_argument("name", help="snapshot directory name (see GET /api/admin/snapshots)")
+    restore_parser.set_defaults(handler=_restore)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(args.handler(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,120 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "openai/text-embedding-3-small"
     DB_PATH: str = "mail_assistant.db"
     CHROMA_PATH: str = "chroma_data"
+    # "chroma" or "flat" (NumPy memmap index, see backend/db/flat_index.py)
+    VECTOR_BACKEND: str = "chroma"
+    FLAT_INDEX_PATH: str = "flat_index"
+    # ChromaDB HNSW parameters; M and construction_ef only apply to new collections
+    # (re-index to change them), search_ef is applied when a collection is opened
+    HNSW_M: int = 16
+    HNSW_CONSTRUCTION_EF: int = 100
+    HNSW_SEARCH_EF: int = 100
     SSL_VERIFY: bool = True
+    # Concurrent identical model API requests share one upstream call
+    LLM_SINGLE_FLIGHT: bool = True
+
+    # Local first-stage classifier (per-category embedding centroids)
+    LOCAL_CLASSIFIER_ENABLED: bool = True
+    LOCAL_CLASSIFIER_THRESHOLD: float = 0.85
+    LOCAL_CLASSIFIER_MARGIN: float = 0.05
+    LOCAL_CLASSIFIER_MIN_SUPPORT: int = 5
+    # "summary": LLM only writes the summary, "skip": no LLM call at all
+    LOCAL_CLASSIFIER_MODE: str = "summary"
+
+    # Sender/subject routing rules learned from manual corrections
+    RULES_ENABLED: bool = True
+    RULE_MIN_SUPPORT: int = 2
+    RULE_MIN_SHARE: float = 0.8
+    RULE_MODE: str = "summary"
+
+    # "eager": summarize at ingest, "lazy": classify only, summarize on first read
+    SUMMARY_MODE: str = "eager"
+    CLASSIFY_MAX_TOKENS: int = 200
+    # Background pre-generation of missing summaries for the newest emails (0 = off)
+    SUMMARY_PREGENERATE_LIMIT: int = 0
+    SUMMARY_PREGENERATE_INTERVAL: float = 60.0
+
+    # Batched classification (several emails per LLM request) for bulk ingest
+    BATCH_CLASSIFY_TOKEN_BUDGET: int = 6000
+    BATCH_CLASSIFY_MAX_ITEMS: int = 20
+
+    # Retrieval: candidates fetched per search, MMR relevance weight (1.0 = pure
+    # relevance) and the most chunks taken from any one email
+    RETRIEVAL_FETCH_K: int = 20
+    RETRIEVAL_MMR_LAMBDA: float = 0.7
+    RETRIEVAL_MAX_CHUNKS_PER_EMAIL: int = 2
+    # Token budget of the retrieved context in the RAG prompt
+    RAG_CONTEXT_TOKENS: int = 6000
+    # Token budget of the chat history; older turns are collapsed into a summary
+    CHAT_HISTORY_TOKENS: int = 1500
+    CHAT_SUMMARY_MAX_TOKENS: int = 300
+    CHAT_SUMMARY_CACHE_SIZE: int = 256
+    # Server-side chat sessions: idle seconds before expiry, cached contexts per process
+    CHAT_SESSION_TTL: int = 1800
+    CHAT_SESSION_CACHE_SIZE: int = 256
+
+    # Email body storage codec: auto (zstd if installed, else zlib), zstd, zlib or raw
+    BODY_COMPRESSION: str = "auto"
+
+    # Responses at least this many bytes are gzip/brotli compressed
+    COMPRESSION_MIN_SIZE: int = 1024
+
+    # Process role: "all" (single process), "writer" (owns writes and the
+    # indexer) or "api" (serves reads/chat, forwards writes to WRITER_URL)
+    SERVER_ROLE: str = "all"
+    WRITER_URL: str = "http://127.0.0.1:8001"
+    WRITER_TIMEOUT: float = 120.0
+    # Warm-up after startup; /ready reports 503 until it finishes.
+    # VECTOR_STORE_PRELOAD opens the vector store and pages its index in
+    # (otherwise it opens on first use); WARMUP_HTTP opens the model API
+    # connection.  Either way the API answers before the store is loaded.
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT: float = 120.0
+    VECTOR_STORE_PRELOAD: bool = True
+    WARMUP_HTTP: bool = True
+    # How often API workers check for vector store changes to reload, and the
+    # least time between two reloads for new vectors (a collection switch
+    # reloads at once); the new store is paged in before it replaces the old
+    VECTOR_REFRESH_INTERVAL: float = 2.0
+    VECTOR_RELOAD_MIN_INTERVAL: float = 10.0
+
+    # Outbox indexer that applies SQLite changes to the vector store
+    INDEXER_ENABLED: bool = True
+    INDEXER_BATCH_SIZE: int = 200
+    INDEXER_POLL_INTERVAL: float = 1.0
+    INDEXER_MAX_BACKOFF: float = 300.0
+    # Failed attempts after which an entry moves to vector_outbox_dead
+    INDEXER_MAX_ATTEMPTS: int = 8
+
+    # Mailbox import (mbox / .eml): messages per ingest batch, batches in
+    # flight, larger messages are skipped; uploads are spooled to IMPORT_SPOOL_PATH
+    IMPORT_BATCH_SIZE: int = 20
+    IMPORT_CONCURRENCY: int = 2
+    IMPORT_MAX_MESSAGE_BYTES: int = 25 * 1024 * 1024
+    IMPORT_SPOOL_PATH: str = "imports"
+
+    # Emails per SQLite page / vector store lookup of a streaming export
+    EXPORT_PAGE_SIZE: int = 200
+
+    # Online snapshots: pages copied per backup step and the pause between
+    # steps; after SNAPSHOT_MAX_RESTARTS restarts by writes the rest is one step
+    SNAPSHOT_PATH: str = "snapshots"
+    SNAPSHOT_PAGES_PER_STEP: int = 1024
+    SNAPSHOT_STEP_SLEEP: float = 0.01
+    SNAPSHOT_MAX_RESTARTS: int = 3
+
+    # Admission control per process: concurrent requests, queued requests and
+    # how long a queued request may wait before it is shed with 503
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CHAT_CONCURRENCY: int = 8
+    ADMISSION_CHAT_QUEUE: int = 32
+    ADMISSION_EMAILS_CONCURRENCY: int = 32
+    ADMISSION_EMAILS_QUEUE: int = 128
+    ADMISSION_QUEUE_TIMEOUT: float = 5.0
+
+    # Online re-index into a new versioned collection
+    REINDEX_PAGE_SIZE: int = 100
+    REINDEX_CONCURRENCY: int = 4
 
 
 settings = Settings()
@@ -0,0 +1,98 @@
+"""Compressed email body encoding for the ``email_bodies`` table.
+
+Bodies are stored apart from the ``emails`` row so list queries and page
+scans never read them.  Each blob is tagged with its codec:
+
+- ``raw`` — UTF-8, for bodies too short to be worth compressing
+- ``zlib`` — always available
+- ``zstd`` — the default; ``zstandard`` is in requirements.txt, and
+  without it ``auto`` and ``zstd`` fall back to ``zlib``
+- ``zstd:<id>`` — zstd with trained dictionary ``<id>`` from
+  ``body_dictionaries``; corporate mail repeats the same templates and
+  signatures, which a dictionary captures even in short bodies
+
+Decoding handles every codec regardless of ``BODY_COMPRESSION``, so the
+setting can change without rewriting stored bodies.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+from backend.config import settings
+
+try:
+    import zstandard
+except ImportError:  # minimal installs: zlib only
+    zstandard = None
+
+# Below this many bytes compression rarely pays for its header
+_MIN_COMPRESS_BYTES = 128
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 9
+
+
+def codec() -> str:
+    """Codec new bodies are written with (``zstd``, ``zlib`` or ``raw``)."""
+    if settings.BODY_COMPRESSION == "auto":
+        return "zstd" if zstandard is not None else "zlib"
+    if settings.BODY_COMPRESSION == "zstd" and zstandard is None:
+        return "zlib"
+    return settings.BODY_COMPRESSION
+
+
+def encode(text: str, dictionary: tuple[int, bytes] | None = None) -> tuple[str, bytes]:
+    """Compress *text*; return ``(codec, blob)``.
+
+    *dictionary* is ``(id, data)`` of the newest trained dictionary and is
+    only used by the zstd codec.
+    """
+    data = text.encode("utf-8")
+    name = codec()
+    if name == "raw" or len(data) < _MIN_COMPRESS_BYTES:
+        return "raw", data
+    if name == "zstd":
+        if dictionary is not None:
+            dict_id, dict_data = dictionary
+            compressor = zstandard.ZstdCompressor(
+                level=_ZSTD_LEVEL, dict_data=zstandard.ZstdCompressionDict(dict_data)
+            )
+            return f"zstd:{dict_id}", compressor.compress(data)
+        return "zstd", zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, _ZLIB_LEVEL)
+
+
+def dictionary_id(codec_name: str) -> int | None:
+    """Dictionary a blob was compressed with, if any."""
+    prefix, _, dict_id = codec_name.partition(":")
+    return int(dict_id) if prefix == "zstd" and dict_id else None
+
+
+def decode(codec_name: str, blob: bytes, dictionaries: dict[int, bytes] | None = None) -> str:
+    """Inverse of :func:`encode`; *dictionaries* maps id to dictionary data."""
+    if codec_name == "raw":
+        data = blob
+    elif codec_name == "zlib":
+        data = zlib.decompress(blob)
+    elif codec_name.startswith("zstd"):
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed bodies need the 'zstandard' package")
+        dict_id = dictionary_id(codec_name)
+        if dict_id is None:
+            decompressor = zstandard.ZstdDecompressor()
+        else:
+            decompressor = zstandard.ZstdDecompressor(
+                dict_data=zstandard.ZstdCompressionDict((dictionaries or {})[dict_id])
+            )
+        data = decompressor.decompress(blob)
+    else:
+        raise ValueError(f"Unknown body codec: {codec_name}")
+    return bytes(data).decode("utf-8")
+
+
+def train_dictionary(samples: list[str], size: int) -> bytes:
+    """Train a zstd dictionary of at most *size* bytes from sample bodies."""
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary needs the 'zstandard' package")
+    trained = zstandard.train_dictionary(size, [sample.encode("utf-8") for sample in samples])
+    return trained.as_bytes()
@@ -1,28 +1,194 @@
-"""ChromaDB persistent client — vector store for email embeddings."""
+"""Vector store for email embeddings — ChromaDB or the flat NumPy index.
+
+``VECTOR_BACKEND`` picks the client; both expose the same collection API.
+
+Nothing is imported or opened until a collection is first needed: importing
+``chromadb`` alone takes most of the API's cold start.  Async callers go
+through :func:`backend.services.embeddings.open_collection`, which does the
+first open in a worker thread so the event loop keeps serving requests that
+don't touch vectors.
+"""
 
 from __future__ import annotations
 
-import chromadb
+import logging
+import sys
+import threading
 
 from backend.config import settings
 
-_client: chromadb.ClientAPI | None = None
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTION = "emails"
+
+_lock = threading.RLock()
+_client = None
+# Active collection: serves queries and receives every write
+_active_name = DEFAULT_COLLECTION
 _collection = None
+# Rebuild target while a re-index is running; the indexer writes to it too
+_build_name: str | None = None
+_build_metadata: dict | None = None
+_build_collection = None
+
 
+def _new_client():
+    if settings.VECTOR_BACKEND == "flat":
+        from backend.db.flat_index import FlatIndexClient
 
-def get_client() -> chromadb.ClientAPI:
+        return FlatIndexClient(settings.FLAT_INDEX_PATH)
+    import chromadb
+
+    return chromadb.PersistentClient(path=settings.CHROMA_PATH)
+
+
+def get_client():
     global _client
-    if _client is None:
-        _client = chromadb.PersistentClient(path=settings.CHROMA_PATH)
+    with _lock:
+        if _client is None:
+            _client = _new_client()
     return _client
 
 
+def hnsw_metadata() -> dict:
+    """Index parameters for a new collection."""
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": settings.HNSW_M,
+        "hnsw:construction_ef": settings.HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": settings.HNSW_SEARCH_EF,
+    }
+
+
+def _apply_search_ef(collection):
+    """Bring ``search_ef`` of an existing collection in line with the settings."""
+    configuration = getattr(collection, "configuration", None) or {}
+    hnsw = configuration.get("hnsw") or {}
+    if hnsw and hnsw.get("ef_search") != settings.HNSW_SEARCH_EF:
+        try:
+            collection.modify(configuration={"hnsw": {"ef_search": settings.HNSW_SEARCH_EF}})
+        except Exception as e:
+            logger.warning("Failed to set search_ef on %s: %s", collection.name, e)
+    return collection
+
+
+def _open(name: str, client=None):
+    client = client or get_client()
+    if name == DEFAULT_COLLECTION:
+        collection = client.get_or_create_collection(
+            name=name,
+            metadata={**hnsw_metadata(), "embedding_model": settings.EMBEDDING_MODEL},
+        )
+    else:
+        collection = client.get_collection(name)
+    return _apply_search_ef(collection)
+
+
+def page_in(collection) -> int:
+    """Run one query so the index is loaded into memory; return the collection size."""
+    count = collection.count()
+    if count:
+        sample = collection.get(limit=1, include=["embeddings"])
+        collection.query(
+            query_embeddings=[list(sample["embeddings"][0])],
+            n_results=min(count, settings.RETRIEVAL_FETCH_K),
+            include=[],
+        )
+    return count
+
+
 def get_collection():
     global _collection
-    if _collection is None:
-        client = get_client()
-        _collection = client.get_or_create_collection(
-            name="emails",
-            metadata={"hnsw:space": "cosine"},
-        )
+    with _lock:
+        if _collection is None:
+            _collection = _open(_active_name)
     return _collection
+
+
+def is_loaded() -> bool:
+    """Whether the active collection has been opened."""
+    return _collection is not None
+
+
+def set_active_collection(name: str, load: bool = True) -> None:
+    """Serve queries from collection *name* from now on.
+
+    Callers holding the previous collection object keep using it until
+    their query finishes.  With ``load=False`` the collection is opened on
+    first use.
+    """
+    global _active_name, _collection
+    collection = _open(name) if load else None
+    with _lock:
+        _active_name = name
+        _collection = collection
+
+
+def get_build_collection():
+    global _build_collection
+    with _lock:
+        if _build_collection is None and _build_name is not None:
+            _build_collection = _apply_search_ef(get_client().get_or_create_collection(
+                name=_build_name,
+                metadata={**hnsw_metadata(), **(_build_metadata or {})},
+            ))
+    return _build_collection
+
+
+def set_build_collection(name: str | None, metadata: dict | None = None, load: bool = True):
+    """Set (and with *load*, open or create) the rebuild target; ``None`` clears it."""
+    global _build_name, _build_metadata, _build_collection
+    with _lock:
+        _build_name = name
+        _build_metadata = metadata
+        _build_collection = None
+    return get_build_collection() if load else None
+
+
+def delete_collection(name: str) -> None:
+    get_client().delete_collection(name)
+
+
+def reload_collection(name: str) -> None:
+    """Reopen the store from disk with collection *name* active (worker thread).
+
+    The new client's index is paged in before it replaces the current one,
+    so queries keep running on the previous, warm collection meanwhile and
+    none waits on a cold load.
+    """
+    global _client, _collection, _build_collection, _active_name
+    if "chromadb" in sys.modules:
+        from chromadb.api.client import SharedSystemClient
+
+        # Otherwise the new client would share the cached system and its stale index
+        SharedSystemClient.clear_system_cache()
+    client = _new_client()
+    collection = _open(name, client)
+    page_in(collection)
+    with _lock:
+        _client = client
+        _collection = collection
+        _active_name = name
+        _build_collection = None
+
+
+def reset_client() -> None:
+    """Drop the cached client and collections; the next access reloads from disk.
+
+    A persistent client keeps its index in memory, so a process that only
+    reads sees another process's writes after reopening.
+    """
+    global _client, _collection, _build_collection
+    with _lock:
+        _client = None
+        _collection = None
+        _build_collection = None
+        if "chromadb" in sys.modules:
+            from chromadb.api.client import SharedSystemClient
+
+            SharedSystemClient.clear_system_cache()
+
+
+def embedding_model(collection) -> str:
+    """Embedding model the vectors in *collection* were built with."""
+    return (collection.metadata or {}).get("embedding_model") or settings.EMBEDDING_MODEL
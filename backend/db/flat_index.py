@@ -0,0 +1,387 @@
+"""Flat vector index — a float32 matrix in a memory-mapped file, exact top-k.
+
+Implements the subset of the ChromaDB client/collection API the app uses
+(``upsert``, ``get``, ``update``, ``delete``, ``query``, ``count``), so it is a
+drop-in alternative selected with ``VECTOR_BACKEND=flat``.
+
+Storage per collection directory:
+
+* ``vectors.<gen>.f32`` — normalized row vectors, grown by doubling.
+* ``rows.<gen>.jsonl`` — append-only log of ``add`` / ``meta`` / ``del``
+  records; row positions are the order of the ``add`` records.
+* ``collection.json`` — collection metadata, dimension and current generation.
+
+Deletes only write a tombstone.  Once enough rows are dead the collection is
+compacted into a new generation, which becomes current with a single
+``collection.json`` replace.  Metadata filters are evaluated as boolean masks
+over per-key code columns before the matmul.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+_INITIAL_CAPACITY = 1024
+# Compact once this share of the rows are tombstones (and at least this many)
+_COMPACT_RATIO = 0.25
+_COMPACT_MIN_DEAD = 1024
+
+
+def _hashable(value):
+    return json.dumps(value, sort_keys=True) if isinstance(value, (list, dict)) else value
+
+
+class FlatIndexCollection:
+    """One collection backed by a memmapped matrix and a row log."""
+
+    def __init__(self, path: Path, name: str, metadata: dict | None = None):
+        self.name = name
+        self._path = path
+        self._ids: list[str | None] = []
+        self._documents: list[str | None] = []
+        self._metadatas: list[dict | None] = []
+        self._positions: dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._columns: dict[str, tuple[dict, np.ndarray]] = {}
+        self._vectors: np.memmap | None = None
+        self._capacity = 0
+        self._dead = 0
+
+        info_path = path / "collection.json"
+        if info_path.exists():
+            info = json.loads(info_path.read_text(encoding="utf-8"))
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            info = {"metadata": metadata or {}, "dim": None, "generation": 0}
+            self._write_info(info)
+        self.metadata = info["metadata"]
+        self._dim = info["dim"]
+        self._generation = info["generation"]
+        self._load()
+
+    # ── Files ────────────────────────────────────────────────────────
+
+    def _vectors_file(self, generation: int | None = None) -> Path:
+        return self._path / f"vectors.{self._generation if generation is None else generation}.f32"
+
+    def _rows_file(self, generation: int | None = None) -> Path:
+        return self._path / f"rows.{self._generation if generation is None else generation}.jsonl"
+
+    def _write_info(self, info: dict) -> None:
+        tmp = self._path / "collection.json.tmp"
+        tmp.write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._path / "collection.json")
+
+    def _info(self) -> dict:
+        return {"metadata": self.metadata, "dim": self._dim, "generation": self._generation}
+
+    def _open_vectors(self, capacity: int) -> None:
+        path = self._vectors_file()
+        size = capacity * self._dim * 4
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        self._capacity = capacity
+
+    def _load(self) -> None:
+        rows = self._rows_file()
+        if rows.exists():
+            with open(rows, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["op"] == "add":
+                        self._append_row(record["id"], record["document"], record["metadata"])
+                    elif record["op"] == "meta":
+                        self._metadatas[record["pos"]] = record["metadata"]
+                    else:
+                        self._kill(record["pos"])
+        if self._dim is not None:
+            size = self._vectors_file().stat().st_size if self._vectors_file().exists() else 0
+            self._open_vectors(max(size // (self._dim * 4), len(self._ids), _INITIAL_CAPACITY))
+        self._alive = np.array([row_id is not None for row_id in self._ids], dtype=bool)
+
+    def _log(self, records: list[dict]) -> None:
+        with open(self._rows_file(), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # ── Row bookkeeping ──────────────────────────────────────────────
+
+    def _append_row(self, row_id: str, document: str | None, metadata: dict | None) -> int:
+        pos = len(self._ids)
+        self._ids.append(row_id)
+        self._documents.append(document)
+        self._metadatas.append(metadata)
+        self._positions[row_id] = pos
+        return pos
+
+    def _kill(self, pos: int) -> None:
+        row_id = self._ids[pos]
+        if row_id is None:
+            return
+        del self._positions[row_id]
+        self._ids[pos] = None
+        self._documents[pos] = None
+        self._metadatas[pos] = None
+        if pos < len(self._alive):
+            self._alive[pos] = False
+        self._dead += 1
+
+    def _reserve(self, extra: int) -> None:
+        needed = len(self._ids) + extra
+        if needed <= self._capacity:
+            return
+        capacity = max(self._capacity * 2, needed, _INITIAL_CAPACITY)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        self._open_vectors(capacity)
+
+    def _column(self, key: str) -> tuple[dict, np.ndarray]:
+        """Value codes of metadata *key* per row (``-1`` where missing)."""
+        lookup, codes = self._columns.get(key, ({}, np.zeros(0, dtype=np.int32)))
+        start = len(codes)
+        if start < len(self._ids):
+            # Only rows appended since the column was built need coding
+            codes = np.concatenate([codes, np.full(len(self._ids) - start, -1, dtype=np.int32)])
+            for pos in range(start, len(self._ids)):
+                meta = self._metadatas[pos]
+                if meta is not None and key in meta:
+                    codes[pos] = lookup.setdefault(_hashable(meta[key]), len(lookup))
+            self._columns[key] = (lookup, codes)
+        return lookup, codes
+
+    def _mask(self, where: dict | None) -> np.ndarray:
+        if not where:
+            return self._alive.copy()
+        if "$and" in where:
+            mask = self._alive.copy()
+            for condition in where["$and"]:
+                mask &= self._mask(condition)
+            return mask
+        if "$or" in where:
+            mask = np.zeros(len(self._ids), dtype=bool)
+            for condition in where["$or"]:
+                mask |= self._mask(condition)
+            return mask & self._alive
+
+        (key, condition), = where.items()
+        op, value = next(iter(condition.items())) if isinstance(condition, dict) else ("$eq", condition)
+        lookup, codes = self._column(key)
+        if op in ("$eq", "$ne"):
+            code = lookup.get(_hashable(value))
+            mask = codes == code if code is not None else np.zeros(len(codes), dtype=bool)
+        elif op in ("$in", "$nin"):
+            wanted = [lookup[_hashable(v)] for v in value if _hashable(v) in lookup]
+            mask = np.isin(codes, wanted)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if op in ("$ne", "$nin"):
+            mask = ~mask
+        return mask & self._alive
+
+    # ── Collection API ───────────────────────────────────────────────
+
+    def count(self) -> int:
+        return len(self._positions)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None) -> None:
+        if len(ids) == 0:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if self._dim is None:
+            self._dim = matrix.shape[1]
+            self._write_info(self._info())
+        elif matrix.shape[1] != self._dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match {self._dim}")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        records: list[dict] = []
+        for row_id in ids:
+            if row_id in self._positions:
+                pos = self._positions[row_id]
+                self._kill(pos)
+                records.append({"op": "del", "pos": pos})
+
+        # Vectors are written before the log, so a crash never logs a row
+        # without its vector
+        self._reserve(len(ids))
+        start = len(self._ids)
+        self._vectors[start:start + len(ids)] = matrix
+        self._vectors.flush()
+        for row_id, document, metadata in zip(ids, documents, metadatas):
+            self._append_row(row_id, document, metadata)
+            records.append({"op": "add", "id": row_id, "document": document, "metadata": metadata})
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        self._log(records)
+        self._maybe_compact()
+
+    def update(self, ids, metadatas) -> None:
+        records = []
+        for row_id, metadata in zip(ids, metadatas):
+            pos = self._positions.get(row_id)
+            if pos is None:
+                continue
+            self._metadatas[pos] = {**(self._metadatas[pos] or {}), **metadata}
+            records.append({"op": "meta", "pos": pos, "metadata": self._metadatas[pos]})
+        self._columns.clear()
+        self._log(records)
+
+    def delete(self, ids=None, where=None) -> None:
+        if ids is not None:
+            positions = [self._positions[i] for i in ids if i in self._positions]
+        else:
+            positions = np.flatnonzero(self._mask(where)).tolist()
+        for pos in positions:
+            self._kill(pos)
+        self._log([{"op": "del", "pos": pos} for pos in positions])
+        self._maybe_compact()
+
+    def _result(self, positions, include) -> dict:
+        result: dict = {"ids": [self._ids[p] for p in positions]}
+        if "documents" in include:
+            result["documents"] = [self._documents[p] for p in positions]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[p] for p in positions]
+        if "embeddings" in include:
+            result["embeddings"] = (
+                np.array(self._vectors[positions]) if len(positions) else np.zeros((0, self._dim or 0))
+            )
+        return result
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas", "documents")) -> dict:
+        if ids is not None:
+            positions = [self._positions[i] for i in ids if i in self._positions]
+        else:
+            positions = np.flatnonzero(self._mask(where)).tolist()
+        start = offset or 0
+        positions = positions[start:start + limit if limit is not None else None]
+        return self._result(positions, include)
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: dict | None = None,
+        include=("metadatas", "documents", "distances"),
+    ) -> dict:
+        results: dict = {"ids": []}
+        for key in ("documents", "metadatas", "distances", "embeddings"):
+            if key in include:
+                results[key] = []
+
+        mask = self._mask(where)
+        candidates = np.flatnonzero(mask)
+        for query in np.asarray(query_embeddings, dtype=np.float32):
+            query = query / (np.linalg.norm(query) or 1.0)
+            k = min(n_results, len(candidates))
+            if k == 0:
+                top = np.zeros(0, dtype=np.int64)
+                scores = np.zeros(0, dtype=np.float32)
+            else:
+                if len(candidates) * 2 < len(self._ids):
+                    # Selective filter: score only the candidate rows
+                    scores = self._vectors[candidates] @ query
+                    order = np.argpartition(-scores, k - 1)[:k]
+                    order = order[np.argsort(-scores[order])]
+                    top, scores = candidates[order], scores[order]
+                else:
+                    scores = self._vectors[:len(self._ids)] @ query
+                    scores[~mask] = -np.inf
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    top = top[np.argsort(-scores[top])]
+                    scores = scores[top]
+
+            row = self._result(top.tolist(), include)
+            results["ids"].append(row["ids"])
+            for key in ("documents", "metadatas", "embeddings"):
+                if key in results:
+                    results[key].append(row[key])
+            if "distances" in results:
+                results["distances"].append((1.0 - scores).tolist())
+        return results
+
+    # ── Compaction ───────────────────────────────────────────────────
+
+    def _maybe_compact(self) -> None:
+        if self._dead >= _COMPACT_MIN_DEAD and self._dead >= _COMPACT_RATIO * len(self._ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite live rows into a new generation and drop the tombstones."""
+        if self._dim is None:
+            return
+        live = np.flatnonzero(self._alive)
+        old_generation = self._generation
+        new_generation = old_generation + 1
+
+        capacity = max(len(live) * 2, _INITIAL_CAPACITY)
+        vectors_path = self._vectors_file(new_generation)
+        vectors = np.memmap(vectors_path, dtype=np.float32, mode="w+", shape=(capacity, self._dim))
+        vectors[:len(live)] = self._vectors[live]
+        vectors.flush()
+        with open(self._rows_file(new_generation), "w", encoding="utf-8") as f:
+            for pos in live:
+                f.write(json.dumps({
+                    "op": "add",
+                    "id": self._ids[pos],
+                    "document": self._documents[pos],
+                    "metadata": self._metadatas[pos],
+                }, ensure_ascii=False) + "\n")
+
+        # Switching generations is a single atomic file replace
+        self._generation = new_generation
+        self._write_info(self._info())
+
+        self._ids = [self._ids[p] for p in live]
+        self._documents = [self._documents[p] for p in live]
+        self._metadatas = [self._metadatas[p] for p in live]
+        self._positions = {row_id: pos for pos, row_id in enumerate(self._ids)}
+        self._alive = np.ones(len(live), dtype=bool)
+        self._columns.clear()
+        self._dead = 0
+        self._vectors = vectors
+        self._capacity = capacity
+
+        for path in (self._vectors_file(old_generation), self._rows_file(old_generation)):
+            path.unlink(missing_ok=True)
+
+
+class FlatIndexClient:
+    """Client for flat-index collections stored under one directory."""
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._collections: dict[str, FlatIndexCollection] = {}
+
+    def get_or_create_collection(self, name: str, metadata: dict | None = None) -> FlatIndexCollection:
+        if name not in self._collections:
+            self._collections[name] = FlatIndexCollection(self._path / name, name, metadata)
+        return self._collections[name]
+
+    def get_collection(self, name: str) -> FlatIndexCollection:
+        if name not in self._collections and not (self._path / name / "collection.json").exists():
+            raise ValueError(f"Collection {name} does not exist")
+        return self.get_or_create_collection(name)
+
+    def delete_collection(self, name: str) -> None:
+        self._collections.pop(name, None)
+        shutil.rmtree(self._path / name, ignore_errors=True)
+
+    def list_collections(self) -> list[FlatIndexCollection]:
+        return [
+            self.get_collection(entry.name)
+            for entry in sorted(self._path.iterdir())
+            if (entry / "collection.json").exists()
+        ]
@@ -1,6 +1,22 @@
-import aiosqlite
+import json
+import time
+from array import array
+from collections.abc import AsyncIterator
 from pathlib import Path
+
+import aiosqlite
 from backend.config import settings
+from backend.db import bodies
+
+
+# Tables whose changes are counted in ``table_versions``
+_VERSIONED_TABLES = ("emails", "categories")
+# Leading characters of the body kept in the emails row for list views
+_PREVIEW_LENGTH = 200
+_BODY_PAGE_SIZE = 500
+
+# Trained body dictionaries never change once stored: (db path, id) -> data
+_dictionaries: dict[tuple[str, int], bytes] = {}
 
 
 async def get_db_path() -> Path:
@@ -12,12 +28,158 @@ async def get_db_path() -> Path:
     return db_path
 
 
+async def _ensure_columns(db: aiosqlite.Connection, table: str, columns: dict[str, str]) -> None:
+    """Add columns introduced after the initial schema to an existing table."""
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in await cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def _encode_vectors(vectors) -> bytes | None:
+    """Pack chunk vectors as float32 for the outbox."""
+    if not vectors:
+        return None
+    flat = array("f")
+    for vector in vectors:
+        flat.extend(float(x) for x in vector)
+    return flat.tobytes()
+
+
+def _decode_vectors(blob: bytes | None, dim: int | None) -> list[list[float]] | None:
+    if not blob or not dim:
+        return None
+    flat = array("f")
+    flat.frombytes(blob)
+    return [flat[i:i + dim].tolist() for i in range(0, len(flat), dim)]
+
+
+# ── Body storage ─────────────────────────────────────────────────────
+
+
+async def _load_dictionary(db: aiosqlite.Connection, dict_id: int) -> bytes:
+    key = (settings.DB_PATH, dict_id)
+    if key not in _dictionaries:
+        cursor = await db.execute("SELECT data FROM body_dictionaries WHERE id = ?", (dict_id,))
+        _dictionaries[key] = (await cursor.fetchone())[0]
+    return _dictionaries[key]
+
+
+async def _store_body(db: aiosqlite.Connection, email_id: int, body: str) -> None:
+    """Compress *body* into ``email_bodies`` in the caller's transaction."""
+    dictionary = None
+    if bodies.codec() == "zstd":
+        cursor = await db.execute("SELECT MAX(id) FROM body_dictionaries")
+        dict_id = (await cursor.fetchone())[0]
+        if dict_id is not None:
+            dictionary = (dict_id, await _load_dictionary(db, dict_id))
+    codec, blob = bodies.encode(body, dictionary)
+    await db.execute(
+        "INSERT OR REPLACE INTO email_bodies (email_id, codec, size, data) VALUES (?, ?, ?, ?)",
+        (email_id, codec, len(body.encode("utf-8")), blob)
+    )
+
+
+async def _read_bodies(db: aiosqlite.Connection, email_ids: list[int]) -> dict[int, str]:
+    if not email_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in email_ids)
+    cursor = await db.execute(
+        f"SELECT email_id, codec, data FROM email_bodies WHERE email_id IN ({placeholders})",
+        email_ids
+    )
+    result = {}
+    for email_id, codec, blob in await cursor.fetchall():
+        dictionaries = {}
+        dict_id = bodies.dictionary_id(codec)
+        if dict_id is not None:
+            dictionaries[dict_id] = await _load_dictionary(db, dict_id)
+        result[email_id] = bodies.decode(codec, blob, dictionaries)
+    return result
+
+
+async def _attach_bodies(db: aiosqlite.Connection, rows: list[dict]) -> list[dict]:
+    texts = await _read_bodies(db, [row["id"] for row in rows])
+    for row in rows:
+        row["body"] = texts.get(row["id"], "")
+    return rows
+
+
+async def _migrate_inline_bodies(db: aiosqlite.Connection) -> None:
+    """Move ``emails.body`` of a database created before ``email_bodies``."""
+    cursor = await db.execute("PRAGMA table_info(emails)")
+    if "body" not in {row[1] for row in await cursor.fetchall()}:
+        return
+    last_id = 0
+    while True:
+        cursor = await db.execute(
+            "SELECT id, body FROM emails WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, _BODY_PAGE_SIZE)
+        )
+        rows = await cursor.fetchall()
+        if not rows:
+            break
+        for email_id, body in rows:
+            await _store_body(db, email_id, body or "")
+        last_id = rows[-1][0]
+    await db.execute(
+        "UPDATE emails SET preview = substr(body, 1, ?) WHERE preview IS NULL", (_PREVIEW_LENGTH,)
+    )
+    await db.execute("ALTER TABLE emails DROP COLUMN body")
+
+
+def index_metadata(email_data: dict) -> dict:
+    """Chunk metadata kept in the vector store for filtered search."""
+    return {
+        "category": email_data.get("category", "미분류"),
+        "sender": email_data.get("sender") or "",
+        "subject": email_data.get("subject") or "",
+    }
+
+
+async def _enqueue(
+    db: aiosqlite.Connection,
+    op: str,
+    email_id: int | None = None,
+    payload: dict | None = None,
+    vectors=None,
+    embedding_model: str | None = None,
+) -> None:
+    """Queue a vector-store change in the caller's transaction.
+
+    ``op`` is ``upsert`` / ``metadata`` / ``delete`` for one email or
+    ``category`` for a re-tag of all chunks of a category.  The indexer
+    (``backend.services.indexer``) applies the queue to the vector store.
+    Precomputed *vectors* are tagged with their *embedding_model* so they are
+    only reused for a collection built with the same model.
+    """
+    if vectors:
+        payload = {**(payload or {}), "dim": len(vectors[0]), "model": embedding_model}
+    await db.execute(
+        """
+        INSERT INTO vector_outbox (email_id, op, payload, vectors, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (
+            email_id,
+            op,
+            json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+            _encode_vectors(vectors),
+            time.time(),
+        )
+    )
+
+
 async def init_db() -> None:
     """Initialize database with tables and seed initial categories."""
     db_path = await get_db_path()
     
     async with aiosqlite.connect(str(db_path)) as db:
         db.row_factory = aiosqlite.Row
+
+        # WAL lets the API worker processes read while the writer writes
+        await db.execute("PRAGMA journal_mode=WAL")
         
         # Create emails table
         await db.execute("""
@@ -25,14 +187,48 @@ async def init_db() -> None:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 sender TEXT,
                 subject TEXT,
-                body TEXT NOT NULL,
+                preview TEXT,
                 summary TEXT,
                 category TEXT DEFAULT '미분류',
                 date_extracted TEXT,
                 status TEXT DEFAULT 'completed',
+                classification_path TEXT DEFAULT 'llm',
+                classification_confidence REAL,
+                message_id TEXT,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        await _ensure_columns(db, "emails", {
+            "classification_path": "TEXT DEFAULT 'llm'",
+            "classification_confidence": "REAL",
+            "preview": "TEXT",
+            "message_id": "TEXT",
+            # Subject as given at ingest (``subject`` may be LLM-extracted);
+            # routing rules learn from this one, the kind they are matched on
+            "input_subject": "TEXT",
+        })
+        # Message-ID of imported mail, so a resumed import skips what it stored
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_emails_message_id ON emails(message_id)
+        """)
+
+        # Compressed bodies (see backend.db.bodies), read only when needed
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS email_bodies (
+                email_id INTEGER PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS body_dictionaries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        await _migrate_inline_bodies(db)
         
         # Create categories table
         await db.execute("""
@@ -48,7 +244,110 @@ async def init_db() -> None:
         await db.execute("""
             CREATE INDEX IF NOT EXISTS idx_emails_category ON emails(category)
         """)
+
+        # Routing rules learned from manual category corrections.
+        # The UNIQUE constraint doubles as the (kind, pattern) lookup index.
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS category_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                pattern TEXT NOT NULL,
+                category TEXT NOT NULL,
+                support INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (kind, pattern, category)
+            )
+        """)
         
+        # Vector-store changes, written in the same transaction as the
+        # email/category change and drained by the indexer
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS vector_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email_id INTEGER,
+                op TEXT NOT NULL,
+                payload TEXT,
+                vectors BLOB,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        # Entries that failed INDEXER_MAX_ATTEMPTS times, kept for inspection
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS vector_outbox_dead (
+                id INTEGER PRIMARY KEY,
+                email_id INTEGER,
+                op TEXT NOT NULL,
+                payload TEXT,
+                vectors BLOB,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                dead_at REAL NOT NULL
+            )
+        """)
+
+        # Active vector collection and rebuild checkpoint (JSON values)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS index_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+
+        # Mailbox imports (backend.services.mailbox); position is the resume
+        # point in the source (byte offset in an mbox, file number otherwise)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                format TEXT NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                imported INTEGER NOT NULL DEFAULT 0,
+                duplicates INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+        # Server-side chat sessions; history is a JSON list of messages
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                id TEXT PRIMARY KEY,
+                history TEXT NOT NULL DEFAULT '[]',
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+        # Change counters behind the HTTP ETags, bumped by triggers so every
+        # write path (and every process) is covered
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS table_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        for table in _VERSIONED_TABLES:
+            await db.execute(
+                "INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,)
+            )
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                await db.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                """)
+
         # Seed initial categories
         categories = ['미분류', 'HR/인사', '프로젝트', '일정', '공지사항']
         for category in categories:
@@ -60,8 +359,16 @@ async def init_db() -> None:
         await db.commit()
 
 
-async def insert_email(email_data: dict) -> int:
-    """Insert a new email and return the new row id."""
+async def insert_email(
+    email_data: dict,
+    vectors: list[list[float]] | None = None,
+    embedding_model: str | None = None,
+) -> int:
+    """Insert a new email and return the new row id.
+
+    Unless the row is only reserved (``status='processing'``), its chunks are
+    queued for indexing; *vectors* are reused if already computed.
+    """
     db_path = await get_db_path()
     
     async with aiosqlite.connect(str(db_path)) as db:
@@ -69,21 +376,35 @@ async def insert_email(email_data: dict) -> int:
         
         cursor = await db.execute(
             """
-            INSERT INTO emails (sender, subject, body, summary, category, date_extracted, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO emails (
+                sender, subject, preview, summary, category, date_extracted, status,
+                classification_path, classification_confidence, message_id, input_subject, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
             """,
             (
                 email_data.get('sender'),
                 email_data.get('subject'),
-                email_data.get('body'),
+                (email_data.get('body') or '')[:_PREVIEW_LENGTH],
                 email_data.get('summary'),
                 email_data.get('category', '미분류'),
                 email_data.get('date_extracted'),
-                email_data.get('status', 'completed')
+                email_data.get('status', 'completed'),
+                email_data.get('classification_path', 'llm'),
+                email_data.get('classification_confidence'),
+                email_data.get('message_id'),
+                email_data.get('input_subject'),
+                email_data.get('created_at'),
             )
         )
+        email_id = cursor.lastrowid
+        await _store_body(db, email_id, email_data.get('body') or '')
+        if email_data.get('status', 'completed') != 'processing':
+            await _enqueue(
+                db, "upsert", email_id, {"metadata": index_metadata(email_data)}, vectors, embedding_model
+            )
         await db.commit()
-        return cursor.lastrowid
+        return email_id
 
 
 async def get_emails(category: str | None = None, limit: int = 50, offset: int = 0) -> list[dict]:
@@ -117,8 +438,8 @@ async def get_emails(category: str | None = None, limit: int = 50, offset: int =
         return [dict(row) for row in rows]
 
 
-async def get_email_by_id(email_id: int) -> dict | None:
-    """Get an email by id."""
+async def get_email_by_id(email_id: int, with_body: bool = False) -> dict | None:
+    """Get an email by id; *with_body* also decompresses its body."""
     db_path = await get_db_path()
     
     async with aiosqlite.connect(str(db_path)) as db:
@@ -129,7 +450,20 @@ async def get_email_by_id(email_id: int) -> dict | None:
             (email_id,)
         )
         row = await cursor.fetchone()
-        return dict(row) if row else None
+        if not row:
+            return None
+        email = dict(row)
+        if with_body:
+            await _attach_bodies(db, [email])
+        return email
+
+
+async def get_email_bodies(email_ids: list[int]) -> dict[int, str]:
+    """Decompressed bodies of several emails, keyed by id (missing ids skipped)."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        return await _read_bodies(db, email_ids)
 
 
 async def update_email_category(email_id: int, category: str) -> None:
@@ -141,9 +475,208 @@ async def update_email_category(email_id: int, category: str) -> None:
             "UPDATE emails SET category = ? WHERE id = ?",
             (category, email_id)
         )
+        await _enqueue(db, "metadata", email_id, {"metadata": {"category": category}})
         await db.commit()
 
 
+async def delete_email(email_id: int) -> None:
+    """Delete an email and queue removal of its chunks."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.execute("DELETE FROM emails WHERE id = ?", (email_id,))
+        await db.execute("DELETE FROM email_bodies WHERE email_id = ?", (email_id,))
+        await _enqueue(db, "delete", email_id)
+        await db.commit()
+
+
+async def update_email_classification(
+    email_id: int,
+    email_data: dict,
+    vectors: list[list[float]] | None = None,
+    embedding_model: str | None = None,
+) -> None:
+    """Fill in the classification result of a reserved row and queue its chunks."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.execute(
+            """
+            UPDATE emails
+            SET subject = ?, summary = ?, category = ?, date_extracted = ?, status = ?,
+                classification_path = ?, classification_confidence = ?
+            WHERE id = ?
+            """,
+            (
+                email_data.get('subject'),
+                email_data.get('summary'),
+                email_data.get('category', '미분류'),
+                email_data.get('date_extracted'),
+                email_data.get('status', 'completed'),
+                email_data.get('classification_path'),
+                email_data.get('classification_confidence'),
+                email_id,
+            )
+        )
+        await _enqueue(
+            db, "upsert", email_id, {"metadata": index_metadata(email_data)}, vectors, embedding_model
+        )
+        await db.commit()
+
+
+async def update_email_summary(email_id: int, summary: str, subject: str | None = None) -> None:
+    """Cache a generated summary; fill the subject only if it is still empty."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.execute(
+            """
+            UPDATE emails
+            SET summary = ?, subject = COALESCE(NULLIF(subject, ''), ?)
+            WHERE id = ?
+            """,
+            (summary, subject or None, email_id)
+        )
+        await db.commit()
+
+
+async def get_emails_without_summary(limit: int) -> list[dict]:
+    """Get the newest emails whose summary has not been generated yet."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        cursor = await db.execute(
+            """
+            SELECT * FROM emails
+            WHERE summary IS NULL
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """,
+            (limit,)
+        )
+        rows = await cursor.fetchall()
+        return await _attach_bodies(db, [dict(row) for row in rows])
+
+
+async def get_labeled_emails() -> dict[int, str]:
+    """Get the category of every classified email, keyed by email id."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            """
+            SELECT id, category FROM emails
+            WHERE status = 'completed' AND category != '미분류'
+            """
+        )
+        rows = await cursor.fetchall()
+        return {row[0]: row[1] for row in rows}
+
+
+async def get_classification_stats() -> list[dict]:
+    """Count emails per classification path with their average confidence."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        cursor = await db.execute(
+            """
+            SELECT classification_path AS path,
+                   COUNT(*) AS count,
+                   AVG(classification_confidence) AS avg_confidence
+            FROM emails
+            GROUP BY classification_path
+            ORDER BY count DESC
+            """
+        )
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def add_rule_support(keys: list[tuple[str, str]], category: str) -> None:
+    """Count one more correction of each (kind, pattern) key towards *category*."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.executemany(
+            """
+            INSERT INTO category_rules (kind, pattern, category)
+            VALUES (?, ?, ?)
+            ON CONFLICT (kind, pattern, category)
+            DO UPDATE SET support = support + 1, updated_at = CURRENT_TIMESTAMP
+            """,
+            [(kind, pattern, category) for kind, pattern in keys]
+        )
+        await db.commit()
+
+
+async def find_rules(keys: list[tuple[str, str]]) -> list[dict]:
+    """Get all rules matching any of the (kind, pattern) keys."""
+    if not keys:
+        return []
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        conditions = " OR ".join("(kind = ? AND pattern = ?)" for _ in keys)
+        params = [value for key in keys for value in key]
+        cursor = await db.execute(
+            f"SELECT * FROM category_rules WHERE {conditions}",
+            params
+        )
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def get_rules(category: str | None = None) -> list[dict]:
+    """Get learned rules, strongest first."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        if category:
+            cursor = await db.execute(
+                "SELECT * FROM category_rules WHERE category = ? ORDER BY support DESC, id",
+                (category,)
+            )
+        else:
+            cursor = await db.execute(
+                "SELECT * FROM category_rules ORDER BY support DESC, id"
+            )
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def delete_rule(rule_id: int) -> bool:
+    """Delete a rule; return False if it did not exist."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            "DELETE FROM category_rules WHERE id = ?",
+            (rule_id,)
+        )
+        await db.commit()
+        return cursor.rowcount > 0
+
+
+async def get_table_version(table: str) -> int:
+    """Change counter of *table* (one of ``_VERSIONED_TABLES``)."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            "SELECT version FROM table_versions WHERE name = ?", (table,)
+        )
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+
 async def get_categories() -> list[dict]:
     """Get all categories."""
     db_path = await get_db_path()
@@ -172,14 +705,54 @@ async def add_category(name: str, description: str | None = None) -> int:
 
 
 async def update_category(category_id: int, name: str) -> None:
-    """Update a category name."""
+    """Update a category name and repoint its rules, merging any that collide."""
     db_path = await get_db_path()
     
     async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            "SELECT name FROM categories WHERE id = ?",
+            (category_id,)
+        )
+        row = await cursor.fetchone()
         await db.execute(
             "UPDATE categories SET name = ? WHERE id = ?",
             (name, category_id)
         )
+        if row and row[0] != name:
+            # A rule the new name already has for the same key absorbs the old one's support
+            await db.execute(
+                """
+                UPDATE category_rules
+                SET support = support + (
+                        SELECT src.support FROM category_rules AS src
+                        WHERE src.category = ? AND src.kind = category_rules.kind
+                            AND src.pattern = category_rules.pattern
+                    ),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE category = ? AND EXISTS (
+                    SELECT 1 FROM category_rules AS src
+                    WHERE src.category = ? AND src.kind = category_rules.kind
+                        AND src.pattern = category_rules.pattern
+                )
+                """,
+                (row[0], name, row[0])
+            )
+            await db.execute(
+                """
+                DELETE FROM category_rules
+                WHERE category = ? AND EXISTS (
+                    SELECT 1 FROM category_rules AS dst
+                    WHERE dst.category = ? AND dst.kind = category_rules.kind
+                        AND dst.pattern = category_rules.pattern
+                )
+                """,
+                (row[0], name)
+            )
+            await db.execute(
+                "UPDATE category_rules SET category = ? WHERE category = ?",
+                (name, row[0])
+            )
+            await _enqueue(db, "category", payload={"old": row[0], "new": name})
         await db.commit()
 
 
@@ -202,9 +775,483 @@ async def delete_category(category_id: int) -> None:
                 "UPDATE emails SET category = '미분류' WHERE category = ?",
                 (category_name,)
             )
+            # Rules pointing at the category are meaningless now
+            await db.execute(
+                "DELETE FROM category_rules WHERE category = ?",
+                (category_name,)
+            )
             # Delete the category
             await db.execute(
                 "DELETE FROM categories WHERE id = ?",
                 (category_id,)
             )
+            await _enqueue(db, "category", payload={"old": category_name, "new": "미분류"})
             await db.commit()
+
+
+async def get_emails_by_ids(email_ids: list[int]) -> list[dict]:
+    """Get several emails by id (unordered; missing ids are skipped)."""
+    if not email_ids:
+        return []
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        placeholders = ", ".join("?" for _ in email_ids)
+        cursor = await db.execute(
+            f"SELECT * FROM emails WHERE id IN ({placeholders})",
+            email_ids
+        )
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def get_emails_after(after_id: int, limit: int) -> list[dict]:
+    """Get the next page of settled emails (not ``processing``) by id."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        cursor = await db.execute(
+            """
+            SELECT * FROM emails
+            WHERE id > ? AND status != 'processing'
+            ORDER BY id
+            LIMIT ?
+            """,
+            (after_id, limit)
+        )
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def iter_emails(page_size: int) -> AsyncIterator[list[dict]]:
+    """Yield every settled email with its body, *page_size* rows at a time.
+
+    Pages are read by id (``id > last``), each in its own short read, so
+    no page costs an OFFSET scan and a slow consumer never holds a read
+    transaction open that keeps the WAL from being checkpointed.  Emails
+    added after the first page are left out; edits and deletes made while
+    iterating show up in pages not yet read.
+    """
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute("SELECT MAX(id) FROM emails")
+        last_id = (await cursor.fetchone())[0] or 0
+
+    after_id = 0
+    while True:
+        async with aiosqlite.connect(str(db_path)) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute(
+                """
+                SELECT * FROM emails
+                WHERE id > ? AND id <= ? AND status != 'processing'
+                ORDER BY id
+                LIMIT ?
+                """,
+                (after_id, last_id, page_size)
+            )
+            rows = [dict(row) for row in await cursor.fetchall()]
+            if not rows:
+                return
+            page = await _attach_bodies(db, rows)
+        after_id = rows[-1]["id"]
+        yield page
+
+
+async def get_existing_message_ids(message_ids: list[str]) -> set[str]:
+    """The subset of *message_ids* already stored."""
+    if not message_ids:
+        return set()
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        placeholders = ", ".join("?" for _ in message_ids)
+        cursor = await db.execute(
+            f"SELECT message_id FROM emails WHERE message_id IN ({placeholders})",
+            message_ids
+        )
+        return {row[0] for row in await cursor.fetchall()}
+
+
+# ── Import jobs ──────────────────────────────────────────────────────
+
+
+async def get_import_job(job_id: str) -> dict | None:
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+async def get_import_jobs(status: str | None = None) -> list[dict]:
+    """Import jobs, newest first, optionally only those with *status*."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+        if status:
+            cursor = await db.execute(
+                "SELECT * FROM import_jobs WHERE status = ? ORDER BY created_at DESC", (status,)
+            )
+        else:
+            cursor = await db.execute("SELECT * FROM import_jobs ORDER BY created_at DESC")
+        return [dict(row) for row in await cursor.fetchall()]
+
+
+async def save_import_job(job: dict) -> None:
+    """Insert or update an import job (all columns but the timestamps)."""
+    db_path = await get_db_path()
+    now = time.time()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.execute(
+            """
+            INSERT INTO import_jobs (
+                id, source, format, position, imported, duplicates, skipped, status, error,
+                created_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                source = excluded.source, position = excluded.position,
+                imported = excluded.imported, duplicates = excluded.duplicates,
+                skipped = excluded.skipped, status = excluded.status, error = excluded.error,
+                updated_at = excluded.updated_at
+            """,
+            (
+                job["id"], job["source"], job["format"], job.get("position", 0),
+                job.get("imported", 0), job.get("duplicates", 0), job.get("skipped", 0),
+                job["status"], job.get("error"), now, now,
+            )
+        )
+        await db.commit()
+
+
+# ── Body dictionaries ────────────────────────────────────────────────
+
+
+async def get_body_samples(limit: int) -> list[str]:
+    """Bodies of the newest *limit* emails, for dictionary training."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            "SELECT email_id FROM email_bodies ORDER BY email_id DESC LIMIT ?", (limit,)
+        )
+        email_ids = [row[0] for row in await cursor.fetchall()]
+        return list((await _read_bodies(db, email_ids)).values())
+
+
+async def add_body_dictionary(data: bytes) -> int:
+    """Store a trained dictionary; bodies written from now on use it."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            "INSERT INTO body_dictionaries (data, created_at) VALUES (?, ?)", (data, time.time())
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+
+async def recompress_bodies() -> int:
+    """Re-encode every stored body with the current codec and dictionary.
+
+    Runs page by page, one transaction each; returns the bodies rewritten.
+    """
+    db_path = await get_db_path()
+    rewritten = 0
+    last_id = 0
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        while True:
+            cursor = await db.execute(
+                "SELECT email_id FROM email_bodies WHERE email_id > ? ORDER BY email_id LIMIT ?",
+                (last_id, _BODY_PAGE_SIZE)
+            )
+            email_ids = [row[0] for row in await cursor.fetchall()]
+            if not email_ids:
+                break
+            for email_id, body in (await _read_bodies(db, email_ids)).items():
+                await _store_body(db, email_id, body)
+            await db.commit()
+            rewritten += len(email_ids)
+            last_id = email_ids[-1]
+    return rewritten
+
+
+async def get_body_storage_stats() -> dict:
+    """Stored bodies per codec with their original and compressed bytes."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            """
+            SELECT codec, COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length(data)), 0)
+            FROM email_bodies
+            GROUP BY codec
+            """
+        )
+        codecs = {
+            codec: {"count": count, "bytes": size, "stored_bytes": stored}
+            for codec, count, size, stored in await cursor.fetchall()
+        }
+    size = sum(entry["bytes"] for entry in codecs.values())
+    stored = sum(entry["stored_bytes"] for entry in codecs.values())
+    return {
+        "codecs": codecs,
+        "bytes": size,
+        "stored_bytes": stored,
+        "ratio": round(size / stored, 2) if stored else None,
+    }
+
+
+# ── Vector outbox ────────────────────────────────────────────────────
+
+
+async def get_outbox_batch(limit: int) -> list[dict]:
+    """Get up to *limit* due outbox entries in id order.
+
+    An entry waiting for a retry holds back only what must not overtake
+    it: later entries of the same email, and — since a category re-tag
+    touches every email — everything from the next category op on.
+    Entries of other emails are returned, so one failing email does not
+    stall the queue.
+    """
+    db_path = await get_db_path()
+    now = time.time()
+    rows: list[dict] = []
+    blocked: set[int] = set()
+    skipped = False
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        cursor = await db.execute("SELECT * FROM vector_outbox ORDER BY id")
+        async for row in cursor:
+            if row["op"] == "category" and (skipped or row["next_attempt_at"] > now):
+                break
+            if row["email_id"] in blocked or row["next_attempt_at"] > now:
+                blocked.add(row["email_id"])
+                skipped = True
+                continue
+            rows.append(dict(row))
+            if len(rows) == limit:
+                break
+
+    for row in rows:
+        payload = json.loads(row["payload"]) if row["payload"] else {}
+        row["payload"] = payload
+        row["vectors"] = _decode_vectors(row["vectors"], payload.get("dim"))
+    return rows
+
+
+async def delete_outbox_entries(entry_ids: list[int]) -> None:
+    """Remove applied outbox entries and bump ``vector_version``.
+
+    API worker processes watch ``vector_version`` to reload their read-only
+    view of the vector store.
+    """
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.executemany(
+            "DELETE FROM vector_outbox WHERE id = ?",
+            [(entry_id,) for entry_id in entry_ids]
+        )
+        await db.execute(
+            """
+            INSERT INTO index_state (key, value) VALUES ('vector_version', '1')
+            ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+            """
+        )
+        await db.commit()
+
+
+async def defer_outbox_entries(entry_ids: list[int], error: str, max_backoff: float) -> None:
+    """Schedule failed entries for a retry with exponential backoff."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.executemany(
+            """
+            UPDATE vector_outbox
+            SET attempts = attempts + 1,
+                next_attempt_at = ? + MIN(?, 1 << MIN(attempts, 20)),
+                last_error = ?
+            WHERE id = ?
+            """,
+            [(time.time(), max_backoff, error, entry_id) for entry_id in entry_ids]
+        )
+        await db.commit()
+
+
+async def dead_letter_outbox_entries(entry_ids: list[int], error: str) -> None:
+    """Move entries that keep failing to ``vector_outbox_dead``.
+
+    The entries behind them are applied again; the vector store misses
+    only the dead-lettered changes.
+    """
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        for entry_id in entry_ids:
+            await db.execute(
+                """
+                INSERT OR REPLACE INTO vector_outbox_dead (
+                    id, email_id, op, payload, vectors, attempts, last_error, created_at, dead_at
+                )
+                SELECT id, email_id, op, payload, vectors, attempts + 1, ?, created_at, ?
+                FROM vector_outbox WHERE id = ?
+                """,
+                (error, time.time(), entry_id)
+            )
+            await db.execute("DELETE FROM vector_outbox WHERE id = ?", (entry_id,))
+        await db.commit()
+
+
+async def get_outbox_stats() -> dict:
+    """Pending outbox entries, the age of the oldest one, retry state and dead letters."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            "SELECT COUNT(*), MIN(created_at), MAX(attempts) FROM vector_outbox"
+        )
+        count, oldest, max_attempts = await cursor.fetchone()
+        cursor = await db.execute("SELECT COUNT(*) FROM vector_outbox_dead")
+        dead, = await cursor.fetchone()
+
+    return {
+        "pending": count,
+        "lag_seconds": time.time() - oldest if oldest is not None else 0.0,
+        "max_attempts": max_attempts or 0,
+        "dead_letters": dead,
+    }
+
+
+# ── Index state ──────────────────────────────────────────────────────
+
+
+async def get_index_state() -> dict:
+    """All index state entries, JSON-decoded."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute("SELECT key, value FROM index_state")
+        rows = await cursor.fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+
+async def set_index_state(values: dict) -> None:
+    """Set index state entries atomically; a ``None`` value removes the key."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        for key, value in values.items():
+            if value is None:
+                await db.execute("DELETE FROM index_state WHERE key = ?", (key,))
+            else:
+                await db.execute(
+                    "INSERT OR REPLACE INTO index_state (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False))
+                )
+        await db.commit()
+
+
+# ── Chat sessions ────────────────────────────────────────────────────
+
+
+async def create_chat_session(session_id: str, expires_at: float) -> None:
+    """Create an empty chat session."""
+    db_path = await get_db_path()
+    now = time.time()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        await db.execute(
+            """
+            INSERT INTO chat_sessions (id, created_at, updated_at, expires_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (session_id, now, now, expires_at)
+        )
+        await db.commit()
+
+
+async def get_chat_session(session_id: str) -> dict | None:
+    """Get an unexpired chat session with its history decoded."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        db.row_factory = aiosqlite.Row
+
+        cursor = await db.execute(
+            "SELECT * FROM chat_sessions WHERE id = ? AND expires_at > ?",
+            (session_id, time.time())
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            return None
+        session = dict(row)
+        session["history"] = json.loads(session["history"])
+        return session
+
+
+async def append_chat_messages(session_id: str, messages: list[dict], expires_at: float) -> bool:
+    """Append *messages* to a session's history and extend its expiry.
+
+    Returns False when the session does not exist or has expired.
+    """
+    db_path = await get_db_path()
+    now = time.time()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        # Read-modify-write under a write lock so concurrent turns don't lose messages
+        await db.execute("BEGIN IMMEDIATE")
+        cursor = await db.execute(
+            "SELECT history FROM chat_sessions WHERE id = ? AND expires_at > ?",
+            (session_id, now)
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            await db.rollback()
+            return False
+        history = json.loads(row[0]) + messages
+        await db.execute(
+            """
+            UPDATE chat_sessions SET history = ?, updated_at = ?, expires_at = ?
+            WHERE id = ?
+            """,
+            (json.dumps(history, ensure_ascii=False), now, expires_at, session_id)
+        )
+        await db.commit()
+        return True
+
+
+async def delete_chat_session(session_id: str) -> bool:
+    """Delete a chat session. Returns False when it did not exist."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,))
+        await db.commit()
+        return cursor.rowcount > 0
+
+
+async def delete_expired_chat_sessions() -> int:
+    """Delete expired chat sessions and return how many were removed."""
+    db_path = await get_db_path()
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cursor = await db.execute(
+            "DELETE FROM chat_sessions WHERE expires_at <= ?", (time.time(),)
+        )
+        await db.commit()
+        return cursor.rowcount
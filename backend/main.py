@@ -1,21 +1,55 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from backend.config import settings
 from backend.db.sqlite import init_db
+from backend.responses import CompressionMiddleware, ORJSONResponse
 from backend.routers.categories import router as categories_router
 from backend.routers.emails import router as emails_router
 from backend.routers.chat import router as chat_router
+from backend.routers.rules import router as rules_router
+from backend.routers.admin import router as admin_router
+from backend.routers.imports import router as imports_router
+from backend.services import admission, cluster, llm, mailbox, warmup
+from backend.services.indexer import run_indexer
+from backend.services.reindex import load_state as load_index_state
+from backend.services.summaries import run_pregeneration_worker
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await init_db()
+    background: list[asyncio.Task] = []
+    if cluster.is_writer():
+        await init_db()
+        await load_index_state()
+        await mailbox.resume_interrupted()
+        if settings.INDEXER_ENABLED:
+            background.append(asyncio.create_task(run_indexer()))
+        if settings.SUMMARY_PREGENERATE_LIMIT > 0:
+            background.append(asyncio.create_task(run_pregeneration_worker()))
+    else:
+        # API worker: the writer owns the schema, the indexer and re-indexing
+        await cluster.sync_vector_store()
+        background.append(asyncio.create_task(cluster.run_vector_refresher()))
+    background.append(asyncio.create_task(warmup.run_warmup()))
     yield
     # Shutdown
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await cluster.close()
+    await llm.close()
 
 
-app = FastAPI(title="Mail Assistant API", lifespan=lifespan)
+app = FastAPI(title="Mail Assistant API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Innermost, so 503s still get CORS headers; writes an API worker forwards
+# are admitted by the writer
+app.add_middleware(admission.AdmissionMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -26,10 +60,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# Inside route_writes: a function middleware re-streams bodies in chunks,
+# which would defeat the minimum size check
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE, compresslevel=6)
+
+
+@app.middleware("http")
+async def route_writes(request: Request, call_next):
+    """On API workers, hand writes to the writer process."""
+    if cluster.forwards_to_writer(request.method, request.url.path):
+        return await cluster.forward_to_writer(request)
+    return await call_next(request)
+
+
 app.include_router(categories_router, prefix="/api")
 app.include_router(emails_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
+app.include_router(rules_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
+app.include_router(imports_router, prefix="/api")
 
 @app.get("/")
 async def root():
     return {"status": "ok"}
+
+
+@app.get("/health")
+async def health():
+    """Liveness check used by the process supervisor, with this process's admission state."""
+    return {"status": "ok", "role": settings.SERVER_ROLE, "admission": admission.status()}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once warm-up has finished, 503 before."""
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
@@ -7,14 +7,96 @@ class EmailInput(BaseModel):
     subject: str | None = None
 
 
+class BulkIngestAccepted(BaseModel):
+    accepted: int
+
+
 class EmailResponse(BaseModel):
     id: int
-    body: str
+    # Only the detail endpoint returns the body; lists carry the preview
+    body: str | None = None
+    preview: str | None = None
     sender: str | None
     subject: str | None
     category: str
-    summary: str
+    summary: str | None
     created_at: str
+    classification_path: str | None = None
+    classification_confidence: float | None = None
+
+
+class ClassificationStats(BaseModel):
+    path: str | None
+    count: int
+    avg_confidence: float | None
+
+
+class OutboxStats(BaseModel):
+    pending: int
+    lag_seconds: float
+    max_attempts: int
+    dead_letters: int = 0
+
+
+class MetricsResponse(BaseModel):
+    outbox: OutboxStats
+    counters: dict[str, int]
+    gauges: dict[str, float]
+
+
+class ImportJob(BaseModel):
+    id: str
+    source: str
+    format: str
+    # Resume point: byte offset (mbox) or file number (.eml)
+    position: int
+    imported: int
+    duplicates: int
+    skipped: int
+    # queued / running / completed / failed
+    status: str
+    error: str | None = None
+
+
+class BodyStorageStats(BaseModel):
+    # codec -> {"count", "bytes", "stored_bytes"}
+    codecs: dict[str, dict[str, int]]
+    bytes: int
+    stored_bytes: int
+    ratio: float | None
+
+
+class ReindexRequest(BaseModel):
+    embedding_model: str | None = None
+
+
+class ReindexStatus(BaseModel):
+    running: bool
+    active_collection: str
+    target_collection: str | None = None
+    embedding_model: str | None = None
+    last_id: int | None = None
+    indexed: int | None = None
+    error: str | None = None
+
+
+class SnapshotInfo(BaseModel):
+    name: str
+    created_at: str
+    duration_seconds: float
+    bytes: int
+    sqlite_bytes: int
+    sqlite_pages: int
+    sqlite_restarts: int
+    collection: str
+    vector_count: int
+    dimension: int | None = None
+
+
+class SnapshotStatus(BaseModel):
+    running: bool
+    error: str | None = None
+    snapshots: list[SnapshotInfo]
 
 
 class CategoryCreate(BaseModel):
@@ -28,12 +110,33 @@ class CategoryResponse(BaseModel):
     description: str | None
 
 
+class RuleResponse(BaseModel):
+    id: int
+    kind: str
+    pattern: str
+    category: str
+    support: int
+    created_at: str
+    updated_at: str
+
+
 class ChatInput(BaseModel):
     question: str
     chat_history: list[dict] = []
+    category: str | None = None
+    sender: str | None = None
+    # Continue a server-side session; chat_history is ignored when set
+    session_id: str | None = None
 
 
 class ChatResponse(BaseModel):
     answer: str
     source_ids: list[int] = []
     sources: list[dict] = []
+    session_id: str | None = None
+
+
+class ChatSessionResponse(BaseModel):
+    session_id: str
+    history: list[dict] = []
+    expires_at: float
@@ -0,0 +1,82 @@
+"""HTTP response helpers: orjson bodies, conditional GETs and compression.
+
+List and detail endpoints answer ``If-None-Match`` from a table version
+counter (see ``table_versions`` in :mod:`backend.db.sqlite`) before running
+their query, so a polling client gets a bodiless 304 until something
+changes.  Tags are weak because the compressed and plain bodies differ
+byte-wise but not in meaning.
+"""
+
+from __future__ import annotations
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+_BROTLI_QUALITY = 5
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def not_modified(request: Request, tag: str) -> Response | None:
+    """A 304 response if the client already holds *tag*, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    held = {value.strip().removeprefix("W/") for value in header.split(",")}
+    if "*" in held or tag.removeprefix("W/") in held:
+        return Response(status_code=304, headers={"ETag": tag})
+    return None
+
+
+def tagged_json(content, tag: str) -> ORJSONResponse:
+    """*content* as JSON with an ETag; clients must revalidate before reuse."""
+    return ORJSONResponse(content, headers={"ETag": tag, "Cache-Control": "no-cache"})
+
+
+# ── Compression ──────────────────────────────────────────────────────
+
+
+class _BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=_BROTLI_QUALITY)
+        compressed = self._compressor.process(body)
+        return compressed + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses above ``minimum_size``: brotli when the client
+    accepts it and the ``brotli`` package is installed, gzip otherwise."""
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and brotli is not None:
+            accept = dict(scope["headers"]).get(b"accept-encoding", b"")
+            if b"br" in accept:
+                responder = _BrotliResponder(
+                    self.app, self.minimum_size, exclude_content_types=self.exclude_content_types
+                )
+                await responder(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+
+from backend.db.sqlite import get_body_storage_stats, get_outbox_stats
+from backend.models import (
+    BodyStorageStats, MetricsResponse, ReindexRequest, ReindexStatus, SnapshotStatus
+)
+from backend.services import metrics, reindex, snapshots
+
+router = APIRouter(tags=["admin"])
+
+
+@router.get("/admin/metrics", response_model=MetricsResponse)
+async def get_metrics():
+    """Indexer lag and in-process counters."""
+    outbox = await get_outbox_stats()
+    metrics.set_gauge("outbox_lag_seconds", outbox["lag_seconds"])
+    return {"outbox": outbox, **metrics.snapshot()}
+
+
+@router.get("/admin/storage", response_model=BodyStorageStats)
+async def get_storage():
+    """Compressed email body storage: original vs stored bytes per codec."""
+    return await get_body_storage_stats()
+
+
+@router.post("/admin/reindex", response_model=ReindexStatus, status_code=202)
+async def start_reindex(data: ReindexRequest | None = None):
+    """Rebuild the vector index into a new collection (resumes an interrupted one)."""
+    return await reindex.start(data.embedding_model if data else None)
+
+
+@router.get("/admin/reindex", response_model=ReindexStatus)
+async def get_reindex_status():
+    """Progress of the current or interrupted re-index."""
+    return await reindex.status()
+
+
+@router.post("/admin/snapshots", response_model=SnapshotStatus, status_code=202)
+async def start_snapshot():
+    """Snapshot the database and the active collection while serving traffic."""
+    return await snapshots.start()
+
+
+@router.get("/admin/snapshots", response_model=SnapshotStatus)
+async def list_snapshots():
+    """Finished snapshots (newest first) with size and duration."""
+    return snapshots.status()
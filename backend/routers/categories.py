@@ -1,15 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
-from backend.db.sqlite import get_categories, add_category, update_category, delete_category
+from backend.db.sqlite import add_category, update_category, delete_category, get_table_version
 from backend.models import CategoryCreate, CategoryResponse
+from backend.responses import etag, not_modified, tagged_json
+from backend.services import category_cache, centroids, indexer
 
 router = APIRouter(tags=["categories"])
 
 
 @router.get("/categories", response_model=list[CategoryResponse])
-async def list_categories():
-    categories = await get_categories()
-    return categories
+async def list_categories(request: Request):
+    tag = etag("categories", await get_table_version("categories"))
+    if (cached := not_modified(request, tag)) is not None:
+        return cached
+    return tagged_json(await category_cache.get_all(), tag)
 
 
 @router.post("/categories", response_model=CategoryResponse, status_code=201)
@@ -20,14 +24,14 @@ async def create_category(data: CategoryCreate):
         category_id = await add_category(data.name.strip(), data.description)
     except Exception:
         raise HTTPException(status_code=409, detail="이미 존재하는 카테고리입니다.")
+    category_cache.invalidate()
     return {"id": category_id, "name": data.name.strip(), "description": data.description}
 
 
 @router.put("/categories/{category_id}", response_model=CategoryResponse)
 async def edit_category(category_id: int, data: CategoryCreate):
     # Check if trying to modify '미분류'
-    categories = await get_categories()
-    target = next((c for c in categories if c["id"] == category_id), None)
+    target = await category_cache.get_by_id(category_id)
     if not target:
         raise HTTPException(status_code=404, detail="카테고리를 찾을 수 없습니다.")
     if target["name"] == "미분류":
@@ -36,15 +40,20 @@ async def edit_category(category_id: int, data: CategoryCreate):
         await update_category(category_id, data.name.strip())
     except Exception:
         raise HTTPException(status_code=409, detail="이미 존재하는 카테고리입니다.")
+    category_cache.invalidate()
+    centroids.reset()
+    indexer.notify()
     return {"id": category_id, "name": data.name.strip(), "description": data.description}
 
 
 @router.delete("/categories/{category_id}", status_code=204)
 async def remove_category(category_id: int):
-    categories = await get_categories()
-    target = next((c for c in categories if c["id"] == category_id), None)
+    target = await category_cache.get_by_id(category_id)
     if not target:
         raise HTTPException(status_code=404, detail="카테고리를 찾을 수 없습니다.")
     if target["name"] == "미분류":
         raise HTTPException(status_code=400, detail="'미분류' 카테고리는 삭제할 수 없습니다.")
     await delete_category(category_id)
+    category_cache.invalidate()
+    centroids.reset()
+    indexer.notify()
@@ -1,40 +1,59 @@
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 
-from backend.db.sqlite import get_email_by_id
-from backend.models import ChatInput, ChatResponse
+from backend.models import ChatInput, ChatResponse, ChatSessionResponse
+from backend.services import sessions
 from backend.services.rag import answer_question
+from backend.services.sessions import SessionNotFound, enrich_sources
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["chat"])
 
+_SESSION_NOT_FOUND = "대화 세션을 찾을 수 없거나 만료되었습니다."
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(data: ChatInput):
     """Answer a question using RAG over stored emails."""
+    if data.session_id:
+        try:
+            result = await sessions.ask(
+                data.session_id, data.question, category=data.category, sender=data.sender
+            )
+        except SessionNotFound:
+            raise HTTPException(status_code=404, detail=_SESSION_NOT_FOUND)
+        return ChatResponse(**result)
+
     result = await answer_question(
         question=data.question,
         chat_history=data.chat_history,
+        category=data.category,
+        sender=data.sender,
     )
 
     # Enrich sources with email details from SQLite
-    enriched_sources = []
-    seen_ids = set()
-    for source_id in result.get("source_ids", []):
-        if source_id in seen_ids:
-            continue
-        seen_ids.add(source_id)
-        email = await get_email_by_id(source_id)
-        if email:
-            enriched_sources.append({
-                "email_id": email["id"],
-                "sender": email.get("sender"),
-                "subject": email.get("subject"),
-                "summary": email.get("summary", "")[:200],
-            })
-
     return ChatResponse(
         answer=result["answer"],
         source_ids=result.get("source_ids", []),
-        sources=enriched_sources,
+        sources=await enrich_sources(result.get("source_ids", [])),
     )
+
+
+@router.post("/chat/sessions", response_model=ChatSessionResponse, status_code=201)
+async def create_chat_session():
+    """Start a server-side chat session."""
+    return await sessions.create_session()
+
+
+@router.get("/chat/sessions/{session_id}", response_model=ChatSessionResponse)
+async def get_chat_session(session_id: str):
+    try:
+        return await sessions.get_session(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=_SESSION_NOT_FOUND)
+
+
+@router.delete("/chat/sessions/{session_id}", status_code=204)
+async def end_chat_session(session_id: str):
+    if not await sessions.delete_session(session_id):
+        raise HTTPException(status_code=404, detail=_SESSION_NOT_FOUND)
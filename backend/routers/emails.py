@@ -1,16 +1,29 @@
 import logging
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 
 from backend.db.sqlite import (
-    insert_email, get_emails, get_email_by_id, update_email_category, get_categories
+    delete_email, get_emails, get_email_by_id, update_email_category, get_classification_stats,
+    get_table_version,
 )
-from backend.services.classifier import classify_and_summarize
-from backend.services.embeddings import store_email_embedding, delete_email_embedding
-from backend.models import EmailInput, EmailResponse
+from backend.services import admission, centroids, indexer, rules
+from backend.services.embeddings import get_email_vectors
+from backend.services.ingest import ingest_email, ingest_emails
+from backend.services.summaries import ensure_summary
+from backend.models import BulkIngestAccepted, ClassificationStats, EmailInput, EmailResponse
+from backend.responses import etag, not_modified, tagged_json
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["emails"])
 
+_MAX_BULK_EMAILS = 200
+_EMAIL_FIELDS = tuple(EmailResponse.model_fields)
+
+
+def _email_payload(email: dict) -> dict:
+    """Project a row onto the ``EmailResponse`` fields."""
+    return {field: email.get(field) for field in _EMAIL_FIELDS}
+
 
 @router.post("/emails", response_model=EmailResponse, status_code=201)
 async def create_email(data: EmailInput):
@@ -18,68 +31,89 @@ async def create_email(data: EmailInput):
     if not data.body or not data.body.strip():
         raise HTTPException(status_code=400, detail="메일 본문은 비어있을 수 없습니다.")
 
-    # Get available category names
-    categories_rows = await get_categories()
-    category_names = [c["name"] for c in categories_rows]
-
-    # Classify and summarize via LLM
-    result = await classify_and_summarize(
+    return await ingest_email(
         body=data.body,
         sender=data.sender,
-        categories=category_names,
+        subject=data.subject,
     )
 
-    # Build email record
-    email_data = {
-        "sender": data.sender,
-        "subject": result.get("subject") or data.subject,
-        "body": data.body,
-        "summary": result.get("summary", ""),
-        "category": result.get("category", "미분류"),
-        "date_extracted": result.get("date_extracted"),
-        "status": result.get("status", "completed"),
-    }
-
-    # Insert into SQLite
-    email_id = await insert_email(email_data)
-
-    # Store embeddings in ChromaDB (non-blocking failure)
-    try:
-        await store_email_embedding(
-            email_id=email_id,
-            body=data.body,
-            metadata={
-                "category": email_data["category"],
-                "sender": data.sender or "",
-                "subject": email_data["subject"] or "",
-            },
+
+@router.post(
+    "/emails/bulk",
+    response_model=list[EmailResponse],
+    status_code=201,
+    responses={202: {"model": BulkIngestAccepted}},
+)
+async def create_emails_bulk(
+    data: list[EmailInput],
+    background_tasks: BackgroundTasks,
+    background: bool = Query(default=False),
+):
+    """Ingest many emails at once, classifying them in batched LLM requests."""
+    if not data:
+        raise HTTPException(status_code=400, detail="메일 목록이 비어있습니다.")
+    if len(data) > _MAX_BULK_EMAILS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {_MAX_BULK_EMAILS}개의 메일만 등록할 수 있습니다.",
         )
-    except Exception as e:
-        logger.error("Failed to store embedding for email %d: %s", email_id, e)
+    if any(not item.body or not item.body.strip() for item in data):
+        raise HTTPException(status_code=400, detail="메일 본문은 비어있을 수 없습니다.")
+
+    items = [item.model_dump() for item in data]
+    if background:
+        background_tasks.add_task(ingest_emails, items)
+        return JSONResponse(status_code=202, content={"accepted": len(items)})
+    return await ingest_emails(items)
+
 
-    # Return the saved email
-    saved = await get_email_by_id(email_id)
-    return saved
+@router.get("/emails/stats/classification", response_model=list[ClassificationStats])
+async def classification_stats():
+    """Count emails per classification path (LLM vs. local classifier)."""
+    return await get_classification_stats()
 
 
 @router.get("/emails", response_model=list[EmailResponse])
 async def list_emails(
+    request: Request,
     category: str | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
 ):
-    """Get emails with optional category filter."""
+    """Get emails with optional category filter (conditional on the emails version)."""
+    # Version before data: a write in between only costs one extra refetch
+    tag = etag("emails", await get_table_version("emails"))
+    if (cached := not_modified(request, tag)) is not None:
+        return cached
     emails = await get_emails(category=category, limit=limit, offset=offset)
-    return emails
+    return tagged_json([_email_payload(email) for email in emails], tag)
 
 
 @router.get("/emails/{email_id}", response_model=EmailResponse)
-async def get_email(email_id: int):
-    """Get a single email by ID."""
-    email = await get_email_by_id(email_id)
+async def get_email(request: Request, email_id: int):
+    """Get a single email by ID, generating its summary on first read."""
+    tag = etag("email", email_id, await get_table_version("emails"))
+    if (cached := not_modified(request, tag)) is not None:
+        return cached
+    email = await get_email_by_id(email_id, with_body=True)
     if not email:
         raise HTTPException(status_code=404, detail="메일을 찾을 수 없습니다.")
-    return email
+    # A row still being ingested gets its summary from the ingest itself
+    if email.get("summary") is None and email.get("status") != "processing":
+        # Storing the generated summary bumps the version the tag was taken at
+        async with admission.admit("emails"):
+            email = await ensure_summary(email)
+        tag = etag("email", email_id, await get_table_version("emails"))
+    return tagged_json(_email_payload(email), tag)
+
+
+@router.post("/emails/{email_id}/summary", response_model=EmailResponse)
+async def regenerate_summary(email_id: int):
+    """Generate (or regenerate) the summary of an email."""
+    email = await get_email_by_id(email_id, with_body=True)
+    if not email:
+        raise HTTPException(status_code=404, detail="메일을 찾을 수 없습니다.")
+    return await ensure_summary(email, force=True)
 
 
 @router.put("/emails/{email_id}/category")
@@ -89,6 +123,23 @@ async def change_email_category(email_id: int, category: str = Query(...)):
     if not email:
         raise HTTPException(status_code=404, detail="메일을 찾을 수 없습니다.")
     await update_email_category(email_id, category)
+    indexer.notify()
+
+    # Learn sender/subject routing rules from the correction
+    if email["category"] != category:
+        try:
+            await rules.learn(email.get("sender"), email.get("input_subject"), category)
+        except Exception as e:
+            logger.error("Failed to learn routing rule from email %d: %s", email_id, e)
+
+    # Keep the local classifier in step with the correction
+    if centroids.is_loaded() and email["status"] == "completed":
+        try:
+            vector = centroids.email_vector(get_email_vectors(email_id))
+            centroids.move_example(email["category"], category, vector)
+        except Exception as e:
+            logger.error("Failed to update local classifier for email %d: %s", email_id, e)
+
     return {"id": email_id, "category": category}
 
 
@@ -99,16 +150,15 @@ async def remove_email(email_id: int):
     if not email:
         raise HTTPException(status_code=404, detail="메일을 찾을 수 없습니다.")
     
-    # Delete from ChromaDB first (non-critical)
+    # Drop the email from the local classifier while its vectors still exist
     try:
-        await delete_email_embedding(email_id)
+        if centroids.is_loaded() and email["status"] == "completed":
+            centroids.remove_example(
+                email["category"], centroids.email_vector(get_email_vectors(email_id))
+            )
     except Exception as e:
-        logger.error("Failed to delete embedding for email %d: %s", email_id, e)
-    
-    # Delete from SQLite
-    from backend.db.sqlite import get_db_path
-    import aiosqlite
-    db_path = await get_db_path()
-    async with aiosqlite.connect(str(db_path)) as db:
-        await db.execute("DELETE FROM emails WHERE id = ?", (email_id,))
-        await db.commit()
+        logger.error("Failed to update local classifier for email %d: %s", email_id, e)
+
+    # Delete from SQLite; the indexer removes the chunks from ChromaDB
+    await delete_email(email_id)
+    indexer.notify()
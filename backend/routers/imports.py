@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from backend.db.sqlite import get_import_job, get_import_jobs
+from backend.models import ImportJob
+from backend.services import export, mailbox
+
+router = APIRouter(tags=["imports"])
+
+
+@router.post("/imports", response_model=ImportJob, status_code=202)
+async def upload_mailbox(
+    request: Request,
+    format: str | None = Query(default=None, pattern="^(mbox|eml|ndjson)$"),
+):
+    """Stream an mbox archive, one .eml file or an NDJSON export (raw request body)
+    to disk and import it.
+
+    Uploading the same archive again resumes its import.
+    """
+    spooled = await mailbox.spool(request.stream())
+    if spooled is None:
+        raise HTTPException(status_code=400, detail="업로드한 파일이 비어있습니다.")
+    path, job_id = spooled
+    return await mailbox.start(path, format, job_id, cleanup=True)
+
+
+@router.get("/imports", response_model=list[ImportJob])
+async def list_imports():
+    return await get_import_jobs()
+
+
+@router.get("/imports/{job_id}", response_model=ImportJob)
+async def get_import(job_id: str):
+    job = await get_import_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="가져오기 작업을 찾을 수 없습니다.")
+    return job
+
+
+@router.get("/export")
+async def export_emails(vectors: bool = False):
+    """Stream every email as NDJSON, with chunks and embeddings if *vectors*.
+
+    Restore the file with ``POST /imports?format=ndjson``.  A GET, so API
+    workers stream it themselves instead of buffering a forwarded response.
+    """
+    filename = f"mail-assistant-{datetime.now():%Y%m%d-%H%M%S}.ndjson"
+    return StreamingResponse(
+        export.export_ndjson(vectors),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
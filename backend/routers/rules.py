@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.db.sqlite import get_rules, delete_rule
+from backend.models import RuleResponse
+
+router = APIRouter(tags=["rules"])
+
+
+@router.get("/rules", response_model=list[RuleResponse])
+async def list_rules(category: str | None = Query(default=None)):
+    """List routing rules learned from manual category corrections."""
+    return await get_rules(category=category)
+
+
+@router.delete("/rules/{rule_id}", status_code=204)
+async def remove_rule(rule_id: int):
+    """Delete a learned routing rule."""
+    if not await delete_rule(rule_id):
+        raise HTTPException(status_code=404, detail="규칙을 찾을 수 없습니다.")
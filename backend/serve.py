@@ -0,0 +1,265 @@
+"""Production launcher: N API worker processes plus one writer process.
+
+    python -m backend.serve --workers 4 --port 8000
+
+The writer (``SERVER_ROLE=writer``) listens on ``127.0.0.1:--writer-port``
+and is the only process that writes the vector store; API workers
+(``SERVER_ROLE=api``) share the public socket, serve reads and chat on
+their own cores and forward writes to the writer (see
+:mod:`backend.services.cluster`).
+
+The supervisor polls every process's ``/health`` — API workers on a
+private per-process port — and replaces processes that die or stop
+answering.  Signals:
+
+- ``SIGHUP``: rolling restart.  The writer is restarted first (its socket
+  stays open in the supervisor, so forwarded writes wait in the backlog
+  instead of failing), then each API worker is replaced only after its
+  successor has warmed up and reports ``/ready``.  POSIX only: Windows
+  has no ``SIGHUP``, so there a restart means stopping and starting the
+  launcher.
+- ``SIGTERM`` / ``SIGINT``: graceful stop — in-flight requests finish
+  within ``--graceful-timeout`` seconds.
+
+Development keeps using ``run.py`` (one process, ``--reload``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import httpx
+
+logger = logging.getLogger("backend.serve")
+
+_spawn = multiprocessing.get_context("spawn")
+_BACKLOG = 2048
+# Consecutive failed health checks before a process is replaced
+_MAX_HEALTH_FAILURES = 3
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(role: str, writer_url: str, sockets: list[socket.socket], graceful_timeout: int) -> None:
+    """Entry point of a child process."""
+    import uvicorn
+
+    from backend.config import settings
+
+    settings.SERVER_ROLE = role
+    settings.WRITER_URL = writer_url
+    config = uvicorn.Config(
+        "backend.main:app",
+        lifespan="on",
+        timeout_graceful_shutdown=graceful_timeout,
+    )
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+class _Process:
+    """One supervised server process."""
+
+    def __init__(self, role: str, sockets: list[socket.socket], health_url: str, options: argparse.Namespace):
+        self.role = role
+        self.health_url = health_url
+        self.ready_url = health_url.removesuffix("/health") + "/ready"
+        self.failures = 0
+        self.process = _spawn.Process(
+            target=_serve,
+            args=(role, options.writer_url, sockets, options.graceful_timeout),
+            name=f"mail-assistant-{role}",
+        )
+        self.process.start()
+
+    def healthy(self) -> bool:
+        if not self.process.is_alive():
+            return False
+        try:
+            return httpx.get(self.health_url, timeout=2.0).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def ready(self) -> bool:
+        """Warm-up finished (``/ready``), so it may take traffic."""
+        try:
+            return httpx.get(self.ready_url, timeout=2.0).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def wait_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready():
+                return True
+            if not self.process.is_alive():
+                return False
+            time.sleep(0.2)
+        return False
+
+    def stop(self, timeout: float) -> None:
+        """SIGTERM (uvicorn drains in-flight requests), then kill after *timeout*."""
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logger.warning("%s pid %s did not stop in time, killing", self.role, self.process.pid)
+            self.process.kill()
+            self.process.join()
+
+
+class Supervisor:
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.public_socket = _bind(options.host, options.port)
+        self.writer_socket = _bind("127.0.0.1", options.writer_port)
+        self.writer: _Process | None = None
+        self.workers: list[_Process] = []
+        self._restart = False
+        self._stop = False
+
+    # ── Process management ──
+
+    def _start_writer(self) -> _Process:
+        return _Process(
+            "writer", [self.writer_socket], f"{self.options.writer_url}/health", self.options
+        )
+
+    def _start_worker(self) -> _Process:
+        # A private socket per worker lets the supervisor health-check each one
+        private = _bind("127.0.0.1", 0)
+        port = private.getsockname()[1]
+        worker = _Process(
+            "api", [self.public_socket, private], f"http://127.0.0.1:{port}/health", self.options
+        )
+        private.close()
+        return worker
+
+    def _replace_writer(self) -> None:
+        # Never two writers at once: stop, then start on the same socket
+        if self.writer is not None:
+            self.writer.stop(self.options.graceful_timeout)
+        self.writer = self._start_writer()
+        if not self.writer.wait_ready(self.options.startup_timeout):
+            logger.error("Writer did not become ready")
+
+    def _replace_worker(self, index: int) -> bool:
+        """Start a successor, then retire the old worker once the new one is ready."""
+        successor = self._start_worker()
+        if not successor.wait_ready(self.options.startup_timeout):
+            logger.error("New API worker pid %s did not become ready", successor.process.pid)
+            successor.stop(0)
+            return False
+        self.workers[index].stop(self.options.graceful_timeout)
+        self.workers[index] = successor
+        return True
+
+    def start(self) -> None:
+        self._replace_writer()
+        self.workers = [self._start_worker() for _ in range(self.options.workers)]
+        for worker in self.workers:
+            worker.wait_ready(self.options.startup_timeout)
+        logger.info(
+            "Serving on %s:%d with %d API workers (writer pid %s)",
+            self.options.host, self.options.port, len(self.workers), self.writer.process.pid,
+        )
+
+    def rolling_restart(self) -> None:
+        logger.info("Rolling restart")
+        self._replace_writer()
+        for index in range(len(self.workers)):
+            self._replace_worker(index)
+
+    def check_health(self) -> None:
+        for index, process in enumerate([self.writer, *self.workers]):
+            if process.healthy():
+                process.failures = 0
+                continue
+            process.failures += 1
+            if process.process.is_alive() and process.failures < _MAX_HEALTH_FAILURES:
+                continue
+            logger.error("%s pid %s is unhealthy, replacing", process.role, process.process.pid)
+            if process is self.writer:
+                self._replace_writer()
+            else:
+                self.workers[index - 1].stop(0)
+                self.workers[index - 1] = self._start_worker()
+
+    def stop(self) -> None:
+        # Workers first so writes they already forwarded can complete
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            worker.stop(self.options.graceful_timeout)
+        if self.writer is not None:
+            self.writer.stop(self.options.graceful_timeout)
+        self.public_socket.close()
+        self.writer_socket.close()
+
+    # ── Main loop ──
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum == getattr(signal, "SIGHUP", None):
+            self._restart = True
+        else:
+            self._stop = True
+
+    def run(self) -> None:
+        signums = [signal.SIGTERM, signal.SIGINT]
+        if hasattr(signal, "SIGHUP"):
+            signums.append(signal.SIGHUP)
+        for signum in signums:
+            signal.signal(signum, self._on_signal)
+        self.start()
+        try:
+            while not self._stop:
+                time.sleep(self.options.health_interval)
+                if self._stop:
+                    break
+                if self._restart:
+                    self._restart = False
+                    self.rolling_restart()
+                else:
+                    self.check_health()
+        finally:
+            logger.info("Shutting down")
+            self.stop()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.serve")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+        help="API worker processes (default: CPU count - 1)",
+    )
+    parser.add_argument("--writer-port", type=int, default=8001)
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument("--health-interval", type=float, default=5.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    options = parser.parse_args(argv)
+    options.writer_url = f"http://127.0.0.1:{options.writer_port}"
+
+    logging.basicConfig(level=logging.INFO)
+    # One request per process per health interval is not worth logging
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    Supervisor(options).run()
+
+
+if __name__ == "__main__":
+    main()
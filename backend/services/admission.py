@@ -0,0 +1,216 @@
+"""Admission control — per-endpoint concurrency limits with a bounded queue.
+
+Requests that call the model API — ``POST /api/chat`` and the email
+ingest and summary writes — each pass a gate that admits at most ``ADMISSION_<POOL>_CONCURRENCY`` at a time.  Further
+requests wait in a FIFO queue of at most ``ADMISSION_<POOL>_QUEUE``
+entries for up to ``ADMISSION_QUEUE_TIMEOUT`` seconds.  A request that
+finds the queue full, or is still waiting at its deadline, is shed with
+``503`` and a ``Retry-After`` estimated from recent service times, so a
+burst degrades into fast rejections instead of piling up upstream calls
+that all time out.
+
+A detail read only needs the model when it generates a missing summary,
+so the route takes that slot itself with :func:`admit`.  Other reads are
+never gated.
+
+Limits are per process.  On an API worker, writes are forwarded before
+they reach a gate here and are admitted by the writer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from backend.config import settings
+from backend.services import metrics
+
+# Weight of the newest request in the service time average
+_EWMA_ALPHA = 0.2
+
+_SHED_MESSAGE = "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+
+_gates: dict[str, Gate] = {}
+
+
+class Overloaded(Exception):
+    """The request was shed; ``retry_after`` is in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Gate:
+    """Concurrency limit with a bounded FIFO wait queue."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.service_time = 0.0
+        self.shed = {"queue_full": 0, "deadline": 0}
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"admission_{self.name}_active", self.active)
+        metrics.set_gauge(f"admission_{self.name}_queued", self.queued)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead has likely drained."""
+        return max(1, math.ceil(self.service_time * (self.queued + 1) / max(self.limit, 1)))
+
+    def _shed(self, reason: str) -> Overloaded:
+        self.shed[reason] += 1
+        metrics.incr(f"admission_{self.name}_shed_{reason}")
+        return Overloaded(reason, self.retry_after())
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the queue if needed; raise :class:`Overloaded`."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._publish()
+            return
+        if self.queued >= self.queue_size:
+            raise self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except TimeoutError:
+            # Unless release() handed over the slot just as the deadline passed
+            if waiter.cancelled() or not waiter.done():
+                self._waiters.remove(waiter)
+                raise self._shed("deadline") from None
+        except BaseException:
+            # Cancelled after release() handed this waiter the slot
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._publish()
+
+    def release(self, duration: float | None = None) -> None:
+        """Free a slot, handing it straight to the oldest waiter."""
+        if duration is not None:
+            self.service_time += _EWMA_ALPHA * (duration - self.service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+        self.active -= 1
+        self._publish()
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "limit": self.limit,
+            "queued": self.queued,
+            "queue_size": self.queue_size,
+            "shed": dict(self.shed),
+            "service_time": round(self.service_time, 4),
+        }
+
+
+def _pool(method: str, path: str) -> str | None:
+    if method != "POST":
+        return None
+    if path == "/api/chat":
+        return "chat"
+    if path in ("/api/emails", "/api/emails/bulk"):
+        return "emails"
+    if path.startswith("/api/emails/") and path.endswith("/summary"):
+        return "emails"
+    return None
+
+
+def gate(name: str) -> Gate:
+    """The gate of pool *name*, built from the settings on first use."""
+    if name not in _gates:
+        prefix = f"ADMISSION_{name.upper()}"
+        _gates[name] = Gate(
+            name,
+            getattr(settings, f"{prefix}_CONCURRENCY"),
+            getattr(settings, f"{prefix}_QUEUE"),
+            settings.ADMISSION_QUEUE_TIMEOUT,
+        )
+    return _gates[name]
+
+
+def status() -> dict:
+    """Active requests, queue depth and shed counts of every pool used so far."""
+    return {name: g.status() for name, g in _gates.items()}
+
+
+def reset() -> None:
+    _gates.clear()
+
+
+@asynccontextmanager
+async def admit(name: str):
+    """Hold a slot of pool *name* inside a route; shed with a 503 ``HTTPException``."""
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+    pool = gate(name)
+    try:
+        await pool.acquire()
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503, detail=_SHED_MESSAGE, headers={"Retry-After": str(e.retry_after)}
+        ) from None
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        pool.release(time.perf_counter() - started)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware; the slot is held until the response body is sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        name = _pool(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None or not settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        pool = gate(name)
+        try:
+            await pool.acquire()
+        except Overloaded as e:
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": _SHED_MESSAGE},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release(time.perf_counter() - started)
@@ -0,0 +1,91 @@
+"""In-process category cache.
+
+Categories are read on every ingest (to build the classification prompt)
+and by every category edit, but change rarely.  The cache holds one
+immutable snapshot — rows, lookups by id and by name, and the name tuple
+the classifier renders its prompts from — and is replaced as a whole.
+
+The writer process (``all``/``writer`` role) owns every category write, so
+:func:`invalidate` after ``add_category``/``update_category``/
+``delete_category`` keeps it exact there.  API workers cannot see those
+calls; they compare the ``categories`` table version before reusing a
+snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from backend.config import settings
+from backend.db.sqlite import get_categories, get_table_version
+from backend.services import cluster, metrics
+
+_snapshot: dict | None = None
+# Bumped by invalidate(), so a load that raced a write is not kept
+_generation = 0
+_load_lock = asyncio.Lock()
+
+
+def _build(rows: list[dict], version: int) -> dict:
+    return {
+        "db_path": settings.DB_PATH,
+        "version": version,
+        "rows": tuple(rows),
+        "by_id": {row["id"]: row for row in rows},
+        "by_name": {row["name"]: row for row in rows},
+        "names": tuple(row["name"] for row in rows),
+    }
+
+
+def _fresh(snapshot: dict | None, version: int | None) -> bool:
+    if snapshot is None or snapshot["db_path"] != settings.DB_PATH:
+        return False
+    return version is None or snapshot["version"] == version
+
+
+async def snapshot() -> dict:
+    """Current categories: ``rows``, ``by_id``, ``by_name`` and ``names``.
+
+    The snapshot is shared — callers must not modify it.
+    """
+    global _snapshot
+    # Only the writer's own writes change categories; elsewhere check the version
+    version = None if cluster.is_writer() else await get_table_version("categories")
+    if _fresh(_snapshot, version):
+        metrics.incr("category_cache_hits")
+        return _snapshot
+    async with _load_lock:
+        if _fresh(_snapshot, version):
+            return _snapshot
+        generation = _generation
+        # Version before rows: a concurrent write only costs one extra reload
+        loaded_version = await get_table_version("categories")
+        loaded = _build(await get_categories(), loaded_version)
+        metrics.incr("category_cache_loads")
+        if generation == _generation:
+            _snapshot = loaded
+    return loaded
+
+
+async def get_all() -> list[dict]:
+    """All categories ordered by name, as plain dicts."""
+    return [dict(row) for row in (await snapshot())["rows"]]
+
+
+async def get_names() -> tuple[str, ...]:
+    return (await snapshot())["names"]
+
+
+async def get_by_id(category_id: int) -> dict | None:
+    return (await snapshot())["by_id"].get(category_id)
+
+
+async def get_by_name(name: str) -> dict | None:
+    return (await snapshot())["by_name"].get(name)
+
+
+def invalidate() -> None:
+    """Drop the snapshot; call after every category write."""
+    global _snapshot, _generation
+    _snapshot = None
+    _generation += 1
@@ -0,0 +1,190 @@
+"""Local first-stage classifier — per-category centroids of email embeddings.
+
+An email is represented by the mean of its normalized chunk vectors.  For
+every category we keep the running sum and count of those email vectors, so
+classifying, correcting or deleting an email only touches one or two sums
+instead of rebuilding the model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import numpy as np
+
+from backend.config import settings
+from backend.db.sqlite import get_labeled_emails
+from backend.services.embeddings import open_collection
+
+logger = logging.getLogger(__name__)
+
+# Emails whose chunks are read per collection call while loading
+_LOAD_PAGE_EMAILS = 200
+
+_sums: dict[str, np.ndarray] = {}
+_counts: dict[str, int] = {}
+_loaded = False
+_load_lock = asyncio.Lock()
+
+
+# ── Helpers ──────────────────────────────────────────────────────────
+
+
+def _normalize_rows(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def email_vector(chunk_vectors) -> np.ndarray | None:
+    """Collapse the chunk vectors of one email into a single vector."""
+    if chunk_vectors is None or len(chunk_vectors) == 0:
+        return None
+    return _normalize_rows(chunk_vectors).mean(axis=0)
+
+
+# ── Incremental updates ──────────────────────────────────────────────
+
+
+def add_example(category: str, vector: np.ndarray | None) -> None:
+    """Add a classified email to the centroid of *category*."""
+    if not _loaded or vector is None or category == "미분류":
+        return
+    total = _sums.get(category)
+    if total is None or total.shape != vector.shape:
+        _sums[category] = np.zeros_like(vector)
+        _counts[category] = 0
+    _sums[category] += vector
+    _counts[category] += 1
+
+
+def remove_example(category: str, vector: np.ndarray | None) -> None:
+    """Remove an email from the centroid of *category*."""
+    total = _sums.get(category)
+    if not _loaded or vector is None or total is None or total.shape != vector.shape:
+        return
+    _counts[category] -= 1
+    if _counts[category] <= 0:
+        del _sums[category]
+        del _counts[category]
+    else:
+        total -= vector
+
+
+def move_example(old_category: str, new_category: str, vector: np.ndarray | None) -> None:
+    """Move an email between centroids after a manual correction."""
+    remove_example(old_category, vector)
+    add_example(new_category, vector)
+
+
+def is_loaded() -> bool:
+    return _loaded
+
+
+def reset() -> None:
+    """Drop all centroids; they are rebuilt on the next :func:`ensure_loaded`."""
+    global _loaded
+    _sums.clear()
+    _counts.clear()
+    _loaded = False
+
+
+def _load(labels: dict[int, str], collection) -> tuple[dict[str, np.ndarray], dict[str, int]]:
+    """Sum the email vectors of the labeled emails per category (worker thread).
+
+    One pass over the collection, *labels* a page of email ids at a time,
+    so every chunk of an email comes back in the same page.
+    """
+    sums: dict[str, np.ndarray] = {}
+    counts: dict[str, int] = {}
+    email_ids = sorted(labels)
+    for start in range(0, len(email_ids), _LOAD_PAGE_EMAILS):
+        page = collection.get(
+            where={"email_id": {"$in": email_ids[start:start + _LOAD_PAGE_EMAILS]}},
+            include=["embeddings", "metadatas"],
+        )
+        if not len(page["ids"]):
+            continue
+        rows = _normalize_rows(page["embeddings"])
+        chunks: dict[int, list[int]] = {}
+        for i, meta in enumerate(page["metadatas"]):
+            chunks.setdefault(meta["email_id"], []).append(i)
+        for email_id, indexes in chunks.items():
+            category = labels[email_id]
+            vector = rows[indexes].mean(axis=0)
+            if category not in sums:
+                sums[category] = np.zeros_like(vector)
+                counts[category] = 0
+            sums[category] += vector
+            counts[category] += 1
+    return sums, counts
+
+
+async def ensure_loaded() -> None:
+    """Build the centroids from labeled emails and their stored vectors."""
+    global _loaded
+    if _loaded:
+        return
+
+    async with _load_lock:
+        if _loaded:
+            return
+
+        # Labels come from SQLite, which is the source of truth for categories
+        labels = await get_labeled_emails()
+        collection = await open_collection()
+        sums, counts = await asyncio.to_thread(_load, labels, collection)
+
+        _sums.clear()
+        _counts.clear()
+        _sums.update(sums)
+        _counts.update(counts)
+        _loaded = True
+        logger.info("Local classifier loaded %d emails into %d centroids", sum(counts.values()), len(sums))
+
+
+# ── Prediction ───────────────────────────────────────────────────────
+
+
+def is_ready() -> bool:
+    """Whether at least one category has enough examples to predict."""
+    return any(count >= settings.LOCAL_CLASSIFIER_MIN_SUPPORT for count in _counts.values())
+
+
+def predict(vector: np.ndarray | None) -> dict | None:
+    """Score *vector* against the centroids.
+
+    Returns ``None`` when no category has enough support, otherwise the best
+    category with its cosine similarity (``confidence``), the margin over the
+    runner-up and whether both clear the configured thresholds.
+    """
+    if vector is None:
+        return None
+
+    eligible = [
+        name for name, count in _counts.items()
+        if count >= settings.LOCAL_CLASSIFIER_MIN_SUPPORT and _sums[name].shape == vector.shape
+    ]
+    if not eligible:
+        return None
+
+    centroids = _normalize_rows([_sums[name] for name in eligible])
+    query = vector / (np.linalg.norm(vector) or 1.0)
+    scores = centroids @ query
+
+    order = np.argsort(scores)[::-1]
+    best = float(scores[order[0]])
+    runner_up = float(scores[order[1]]) if len(order) > 1 else 0.0
+    margin = best - runner_up
+
+    return {
+        "category": eligible[order[0]],
+        "confidence": best,
+        "margin": margin,
+        "confident": (
+            best >= settings.LOCAL_CLASSIFIER_THRESHOLD
+            and margin >= settings.LOCAL_CLASSIFIER_MARGIN
+        ),
+    }
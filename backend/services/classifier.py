@@ -4,18 +4,43 @@ from __future__ import annotations
 
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 
+from backend.config import settings
 from backend.services.llm import chat_completion, LLMError
+from backend.services.prompts import read_prompt
+from backend.services.tokens import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
 _PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "classify.txt"
+_SUMMARY_PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "summarize.txt"
+_CLASSIFY_ONLY_PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "classify_only.txt"
+_BATCH_PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "classify_batch.txt"
+_BATCH_ONLY_PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "classify_batch_only.txt"
 _MAX_BODY_LENGTH = 50000
+# Longer emails are classified on their own rather than packed into a batch
+_MAX_BATCH_BODY_LENGTH = 4000
 
 
-def _load_prompt() -> str:
-    return _PROMPT_PATH.read_text(encoding="utf-8")
+def _load_summary_prompt() -> str:
+    return read_prompt(_SUMMARY_PROMPT_PATH)
+
+
+@lru_cache(maxsize=32)
+def _render_prompt(path: Path, categories: tuple[str, ...]) -> str:
+    """System prompt *path* filled in with *categories*.
+
+    Callers pass the category cache's name tuple, so each prompt is
+    rendered once per category change rather than once per email.
+    """
+    return read_prompt(path).format(categories=", ".join(categories))
+
+
+def _user_message(body: str, sender: str | None) -> dict:
+    truncated_body = body[:_MAX_BODY_LENGTH]
+    return {"role": "user", "content": f"발신자: {sender or '알 수 없음'}\n\n메일 본문:\n{truncated_body}"}
 
 
 def _parse_llm_response(raw: str) -> dict:
@@ -44,15 +69,11 @@ async def classify_and_summarize(
     categories: list[str],
 ) -> dict:
     """Classify and summarize an email using LLM."""
-    # Truncate body if too long
-    truncated_body = body[:_MAX_BODY_LENGTH]
-
-    prompt_template = _load_prompt()
-    prompt = prompt_template.format(categories=", ".join(categories))
+    prompt = _render_prompt(_PROMPT_PATH, tuple(categories))
 
     messages = [
         {"role": "system", "content": prompt},
-        {"role": "user", "content": f"발신자: {sender or '알 수 없음'}\n\n메일 본문:\n{truncated_body}"},
+        _user_message(body, sender),
     ]
 
     try:
@@ -71,3 +92,208 @@ async def classify_and_summarize(
             "date_extracted": None,
             "status": "pending",
         }
+
+
+async def classify(
+    body: str,
+    sender: str | None,
+    categories: list[str],
+) -> dict:
+    """Classify an email without summarizing it (lazy summary mode).
+
+    The response is only a category and a date, so the output budget is
+    capped at ``CLASSIFY_MAX_TOKENS``.  ``summary`` is ``None`` so it can be
+    generated on first read.
+    """
+    prompt = _render_prompt(_CLASSIFY_ONLY_PROMPT_PATH, tuple(categories))
+
+    messages = [
+        {"role": "system", "content": prompt},
+        _user_message(body, sender),
+    ]
+
+    try:
+        raw = await chat_completion(
+            messages=messages,
+            response_format={"type": "json_object"},
+            max_tokens=settings.CLASSIFY_MAX_TOKENS,
+        )
+        result = _parse_llm_response(raw)
+        result["summary"] = None
+        return result
+    except LLMError as e:
+        logger.error("LLM call failed during classification: %s", e)
+        return {
+            "category": "미분류",
+            "subject": "",
+            "summary": None,
+            "date_extracted": None,
+            "status": "pending",
+        }
+
+
+async def summarize(body: str, sender: str | None) -> dict:
+    """Summarize an email whose category is already known (no category list in the prompt)."""
+    messages = [
+        {"role": "system", "content": _load_summary_prompt()},
+        _user_message(body, sender),
+    ]
+
+    try:
+        raw = await chat_completion(
+            messages=messages,
+            response_format={"type": "json_object"},
+        )
+        result = _parse_llm_response(raw)
+        del result["category"]
+        return result
+    except LLMError as e:
+        logger.error("LLM call failed during summarization: %s", e)
+        return {
+            "subject": "",
+            "summary": "요약 보류 — LLM 서비스 오류",
+            "date_extracted": None,
+            "status": "pending",
+        }
+
+
+# ── Batched classification ───────────────────────────────────────────
+
+
+def _item_tokens(item: dict) -> int:
+    return estimate_tokens(item["body"]) + estimate_tokens(item.get("sender") or "") + 16
+
+
+def _pack_batches(items: list[dict]) -> tuple[list[list[dict]], list[dict]]:
+    """Greedily pack *items* into batches within the token and size budget.
+
+    Returns the batches and the items that should be classified alone
+    (too long for a batch, or left over as a batch of one); the latter are
+    picked up by the single-call fallback.
+    """
+    batches: list[list[dict]] = []
+    singles: list[dict] = []
+    current: list[dict] = []
+    current_tokens = 0
+
+    for item in items:
+        tokens = _item_tokens(item)
+        if len(item["body"]) > _MAX_BATCH_BODY_LENGTH or tokens > settings.BATCH_CLASSIFY_TOKEN_BUDGET:
+            singles.append(item)
+            continue
+        if current and (
+            current_tokens + tokens > settings.BATCH_CLASSIFY_TOKEN_BUDGET
+            or len(current) >= settings.BATCH_CLASSIFY_MAX_ITEMS
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+
+    # A batch of one saves nothing over the single-email prompt
+    for batch in [b for b in batches if len(b) == 1]:
+        batches.remove(batch)
+        singles.extend(batch)
+    return batches, singles
+
+
+def _batch_user_message(batch: list[dict]) -> dict:
+    sections = [
+        f"[메일 id={item['batch_id']}]\n발신자: {item.get('sender') or '알 수 없음'}\n\n메일 본문:\n{item['body']}"
+        for item in batch
+    ]
+    return {"role": "user", "content": "\n\n".join(sections)}
+
+
+def _validate_batch_entry(entry, categories: list[str], summarize: bool) -> dict | None:
+    """Return the parsed result of one batch entry, or ``None`` if unusable."""
+    if not isinstance(entry, dict):
+        return None
+    category = entry.get("category")
+    if not isinstance(category, str) or (category not in categories and category != "미분류"):
+        return None
+    summary = entry.get("summary") if summarize else None
+    if summarize and not isinstance(summary, str):
+        return None
+    date_extracted = entry.get("date_extracted")
+    if not isinstance(date_extracted, str) or date_extracted == "null":
+        date_extracted = None
+    return {
+        "category": category,
+        "subject": entry.get("subject") if isinstance(entry.get("subject"), str) else "",
+        "summary": summary,
+        "date_extracted": date_extracted,
+    }
+
+
+async def _classify_packed(batch: list[dict], categories: list[str], summarize: bool) -> dict:
+    """Classify one packed batch; return results keyed by ``batch_id``."""
+    path = _BATCH_PROMPT_PATH if summarize else _BATCH_ONLY_PROMPT_PATH
+    prompt = _render_prompt(path, tuple(categories))
+    messages = [
+        {"role": "system", "content": prompt},
+        _batch_user_message(batch),
+    ]
+
+    try:
+        raw = await chat_completion(
+            messages=messages,
+            response_format={"type": "json_object"},
+        )
+        entries = json.loads(raw).get("results")
+    except LLMError as e:
+        logger.error("LLM call failed during batch classification: %s", e)
+        return {}
+    except (json.JSONDecodeError, AttributeError) as e:
+        logger.warning("Batch LLM response parse failed: %s", e)
+        return {}
+
+    batch_ids = {item["batch_id"] for item in batch}
+    results: dict = {}
+    for entry in entries if isinstance(entries, list) else []:
+        batch_id = str(entry.get("id")) if isinstance(entry, dict) else None
+        if batch_id not in batch_ids or batch_id in results:
+            continue
+        parsed = _validate_batch_entry(entry, categories, summarize)
+        if parsed is not None:
+            results[batch_id] = parsed
+    return results
+
+
+async def classify_batch(
+    items: list[dict],
+    categories: list[str],
+    summarize: bool = True,
+) -> list[dict]:
+    """Classify many emails, packing several into each LLM request.
+
+    *items* are dicts with ``body`` and ``sender``.  Results come back in the
+    same order.  Items missing or invalid in a batch response are retried
+    with a single-email call, so every item gets a result; ``batched`` in
+    each result tells which of the two produced it.
+    """
+    indexed = [{**item, "batch_id": str(i)} for i, item in enumerate(items)]
+    batches, singles = _pack_batches(indexed)
+
+    results: dict[str, dict] = {}
+    for batch in batches:
+        for batch_id, result in (await _classify_packed(batch, categories, summarize)).items():
+            results[batch_id] = {**result, "batched": True}
+
+    # Items that were never batched or came back missing/invalid
+    fallback = [item for item in indexed if item["batch_id"] not in results]
+    if fallback:
+        logger.info("Classifying %d of %d emails with single calls", len(fallback), len(items))
+    single_fn = classify_and_summarize if summarize else classify
+    for item in fallback:
+        result = await single_fn(
+            body=item["body"],
+            sender=item.get("sender"),
+            categories=categories,
+        )
+        results[item["batch_id"]] = {**result, "batched": False}
+
+    return [results[item["batch_id"]] for item in indexed]
@@ -0,0 +1,153 @@
+"""Process roles for the multi-process deployment (see :mod:`backend.serve`).
+
+- ``writer`` — the single process that writes emails, categories and rules,
+  runs the outbox indexer (the queue that feeds every ChromaDB upsert),
+  summary pre-generation and re-indexing.
+- ``api`` — any number of processes serving reads and chat.  Mutating
+  requests and the admin endpoints are forwarded to the writer; the vector
+  store is opened read-only and reloaded in the background when the writer
+  bumps ``vector_version`` (at most every ``VECTOR_RELOAD_MIN_INTERVAL``
+  seconds) or switches the active collection.  Their only SQLite writes are chat sessions and lazily
+  generated summaries — single-row updates that WAL mode handles.
+- ``all`` — everything in one process (development, tests).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from backend.config import settings
+from backend.db.chromadb import (
+    DEFAULT_COLLECTION,
+    is_loaded,
+    reload_collection,
+    reset_client,
+    set_active_collection,
+)
+from backend.db.sqlite import get_index_state
+from backend.services import metrics
+
+logger = logging.getLogger(__name__)
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Headers that describe one hop, not the forwarded message
+_HOP_HEADERS = {
+    "host", "connection", "keep-alive", "transfer-encoding", "te", "upgrade",
+    "content-length", "content-encoding",
+}
+
+_writer_client = None
+# (vector_version, active_collection) the vector store was last opened at
+_seen_version: tuple | None = None
+_last_reload = 0.0
+
+
+def is_writer() -> bool:
+    return settings.SERVER_ROLE in ("all", "writer")
+
+
+# ── Write forwarding ─────────────────────────────────────────────────
+
+
+def forwards_to_writer(method: str, path: str) -> bool:
+    """Whether an API worker hands this request to the writer process."""
+    if settings.SERVER_ROLE != "api":
+        return False
+    if path.startswith("/api/admin"):
+        return True
+    return method not in _SAFE_METHODS and not path.startswith("/api/chat")
+
+
+def _get_writer_client():
+    global _writer_client
+    if _writer_client is None:
+        import httpx
+
+        _writer_client = httpx.AsyncClient(
+            base_url=settings.WRITER_URL, timeout=settings.WRITER_TIMEOUT
+        )
+    return _writer_client
+
+
+async def forward_to_writer(request: Request) -> Response:
+    """Replay *request* against the writer and return its response."""
+    import httpx
+
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS}
+    try:
+        resp = await _get_writer_client().request(
+            request.method,
+            request.url.path,
+            params=request.query_params,
+            # Streamed, so a large upload is never held in memory
+            content=request.stream(),
+            headers=headers,
+        )
+    except httpx.HTTPError as e:
+        logger.error("Failed to forward %s %s to writer: %s", request.method, request.url.path, e)
+        metrics.incr("writer_forward_failures")
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "쓰기 서버에 연결할 수 없습니다. 잠시 후 다시 시도해주세요."},
+            headers={"Retry-After": "1"},
+        )
+    metrics.incr("writer_forwarded")
+    return Response(
+        content=resp.content,
+        status_code=resp.status_code,
+        headers={k: v for k, v in resp.headers.items() if k.lower() not in _HOP_HEADERS},
+    )
+
+
+async def close() -> None:
+    global _writer_client
+    if _writer_client is not None:
+        await _writer_client.aclose()
+        _writer_client = None
+
+
+# ── Read-only vector store ───────────────────────────────────────────
+
+
+async def sync_vector_store() -> bool:
+    """Reopen the vector store if the writer changed it; return whether it did.
+
+    New vectors are picked up at most every ``VECTOR_RELOAD_MIN_INTERVAL``
+    seconds; a switch of the active collection is picked up at once.  A
+    loaded store is replaced only after the new one is warm.
+    """
+    global _seen_version, _last_reload
+    state = await get_index_state()
+    version = (state.get("vector_version"), state.get("active_collection"))
+    if version == _seen_version:
+        return False
+    switched = _seen_version is None or version[1] != _seen_version[1]
+    if not switched and time.monotonic() - _last_reload < settings.VECTOR_RELOAD_MIN_INTERVAL:
+        return False
+
+    if is_loaded():
+        await asyncio.to_thread(reload_collection, state.get("active_collection") or DEFAULT_COLLECTION)
+    else:
+        # Nothing warm to keep; the next use opens it
+        reset_client()
+        if state.get("active_collection"):
+            set_active_collection(state["active_collection"], load=False)
+    _seen_version = version
+    _last_reload = time.monotonic()
+    metrics.incr("vector_store_reloads")
+    return True
+
+
+async def run_vector_refresher() -> None:
+    """Background task of API workers: follow the writer's vector store changes."""
+    while True:
+        await asyncio.sleep(settings.VECTOR_REFRESH_INTERVAL)
+        try:
+            await sync_vector_store()
+        except Exception as e:
+            logger.error("Vector store refresh failed: %s", e)
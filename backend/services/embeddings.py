@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
-from backend.db.chromadb import get_collection
+import asyncio
+
+import numpy as np
+
+from backend.config import settings
+from backend.db.chromadb import embedding_model, get_collection, is_loaded
 from backend.services.llm import create_embedding
 
 # ── Chunking parameters ─────────────────────────────────────────────
@@ -10,6 +15,12 @@ from backend.services.llm import create_embedding
 _CHUNK_SIZE = 1000
 _CHUNK_OVERLAP = 200
 
+# Chunks per collection.update call when re-tagging many emails
+_METADATA_BATCH_SIZE = 500
+
+# Chunks per embeddings request when indexing many emails at once
+_EMBED_BATCH_SIZE = 256
+
 
 def _chunk_text(text: str) -> list[str]:
     """Split *text* into overlapping chunks."""
@@ -28,49 +39,191 @@ def _chunk_text(text: str) -> list[str]:
 # ── Public API ───────────────────────────────────────────────────────
 
 
-async def store_email_embedding(
-    email_id: int,
-    body: str,
-    metadata: dict,
-) -> None:
-    """Chunk *body*, embed each chunk, and upsert into ChromaDB."""
+async def open_collection():
+    """The active collection, opened in a worker thread on first use.
+
+    Opening imports ``chromadb`` and loads the index — seconds on a cold
+    start that would otherwise stall every request on the event loop.
+    """
+    if is_loaded():
+        return get_collection()
+    return await asyncio.to_thread(get_collection)
+
+
+async def active_embedding_model() -> str:
+    """Model that query and ingest embeddings must use for the active collection."""
+    return embedding_model(await open_collection())
+
+
+async def embed_body(body: str, model: str | None = None) -> tuple[list[str], list[list[float]]]:
+    """Chunk *body* and embed each chunk (by default with the active collection's model)."""
     chunks = _chunk_text(body)
     if not chunks:
+        return [], []
+    vectors = await create_embedding(chunks, model=model or await active_embedding_model())
+    return chunks, vectors
+
+
+async def embed_chunks(chunks: list[str], model: str | None = None) -> list[list[float]]:
+    """Embed many chunks in as few requests as the batch size allows."""
+    vectors: list[list[float]] = []
+    for start in range(0, len(chunks), _EMBED_BATCH_SIZE):
+        vectors.extend(
+            await create_embedding(chunks[start:start + _EMBED_BATCH_SIZE], model=model)
+        )
+    return vectors
+
+
+def upsert_chunks(entries: list[dict], collection=None) -> None:
+    """Upsert the chunks of several emails with one collection call.
+
+    Each entry has ``email_id``, ``chunks``, ``vectors`` and ``metadata``.
+    *collection* defaults to the active one.
+    """
+    ids: list[str] = []
+    embeddings: list[list[float]] = []
+    documents: list[str] = []
+    metadatas: list[dict] = []
+    for entry in entries:
+        email_id = entry["email_id"]
+        for i, (chunk, vector) in enumerate(zip(entry["chunks"], entry["vectors"])):
+            ids.append(f"email_{email_id}_chunk_{i}")
+            embeddings.append(vector)
+            documents.append(chunk)
+            metadatas.append({**entry["metadata"], "email_id": email_id, "chunk_index": i})
+    if ids:
+        (collection or get_collection()).upsert(
+            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+        )
+
+
+def update_emails_metadata(updates: dict[int, dict], collection=None) -> None:
+    """Merge per-email metadata into every stored chunk of those emails."""
+    if not updates:
         return
+    collection = collection or get_collection()
+    existing = collection.get(where={"email_id": {"$in": list(updates)}}, include=["metadatas"])
+    ids = existing["ids"]
+    metadatas = [updates[meta["email_id"]] for meta in existing["metadatas"]]
+    for start in range(0, len(ids), _METADATA_BATCH_SIZE):
+        collection.update(
+            ids=ids[start:start + _METADATA_BATCH_SIZE],
+            metadatas=metadatas[start:start + _METADATA_BATCH_SIZE],
+        )
 
-    vectors = await create_embedding(chunks)
-    collection = get_collection()
 
-    ids = [f"email_{email_id}_chunk_{i}" for i in range(len(chunks))]
-    metadatas = [
-        {**metadata, "email_id": email_id, "chunk_index": i}
-        for i in range(len(chunks))
-    ]
-
-    collection.upsert(
-        ids=ids,
-        embeddings=vectors,
-        documents=chunks,
-        metadatas=metadatas,
-    )
+def delete_emails_embeddings(email_ids: list[int], collection=None) -> None:
+    """Delete all chunks belonging to any of *email_ids*."""
+    if email_ids:
+        (collection or get_collection()).delete(where={"email_id": {"$in": email_ids}})
+
+
+def update_category_metadata(old_category: str, new_category: str, collection=None) -> int:
+    """Re-tag every chunk of *old_category* as *new_category*; return the chunk count."""
+    collection = collection or get_collection()
+    existing = collection.get(where={"category": old_category}, include=[])
+    ids = existing["ids"]
+    for start in range(0, len(ids), _METADATA_BATCH_SIZE):
+        batch = ids[start:start + _METADATA_BATCH_SIZE]
+        collection.update(ids=batch, metadatas=[{"category": new_category}] * len(batch))
+    return len(ids)
+
+
+def _build_where(category: str | None, sender: str | None) -> dict | None:
+    conditions = []
+    if category is not None:
+        conditions.append({"category": category})
+    if sender is not None:
+        conditions.append({"sender": sender})
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def _select_mmr(
+    query_vector,
+    items: list[dict],
+    embeddings,
+    top_k: int,
+    mmr_lambda: float,
+    max_per_email: int,
+) -> list[dict]:
+    """Pick up to *top_k* items by maximal marginal relevance.
+
+    Each step takes the candidate with the best trade-off between similarity
+    to the query and similarity to the chunks already picked, skipping emails
+    that reached *max_per_email* chunks.  Without embeddings the candidates
+    keep their relevance order and only the per-email cap applies.
+    """
+    if not items:
+        return []
+    per_email: dict = {}
+
+    def allowed(item: dict) -> bool:
+        return per_email.get(item["email_id"], 0) < max_per_email
+
+    def take(item: dict) -> None:
+        per_email[item["email_id"]] = per_email.get(item["email_id"], 0) + 1
+
+    if embeddings is None or len(embeddings) != len(items):
+        selected = []
+        for item in items:
+            if len(selected) == top_k:
+                break
+            if allowed(item):
+                selected.append(item)
+                take(item)
+        return selected
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    relevance = vectors @ (query / (np.linalg.norm(query) or 1.0))
+    # Highest similarity of each candidate to anything already selected
+    redundancy = np.full(len(items), -np.inf, dtype=np.float32)
+    remaining = set(range(len(items)))
+
+    selected = []
+    while remaining and len(selected) < top_k:
+        candidates = [i for i in remaining if allowed(items[i])]
+        if not candidates:
+            break
+        penalty = np.where(np.isinf(redundancy[candidates]), 0.0, redundancy[candidates])
+        scores = mmr_lambda * relevance[candidates] - (1 - mmr_lambda) * penalty
+        best = candidates[int(np.argmax(scores))]
+        remaining.discard(best)
+        selected.append(items[best])
+        take(items[best])
+        redundancy = np.maximum(redundancy, vectors @ vectors[best])
+    return selected
 
 
 async def search_similar(
     query: str,
     top_k: int = 5,
     category: str | None = None,
+    sender: str | None = None,
 ) -> list[dict]:
-    """Return the *top_k* most similar chunks for *query*."""
-    query_vector = await create_embedding([query])
-    collection = get_collection()
+    """Return up to *top_k* relevant, mutually diverse chunks for *query*.
+
+    ``RETRIEVAL_FETCH_K`` candidates are fetched and re-ranked with maximal
+    marginal relevance, taking at most ``RETRIEVAL_MAX_CHUNKS_PER_EMAIL``
+    chunks per email.  *category* and *sender* pre-filter the search on
+    chunk metadata.
+    """
+    collection = await open_collection()
+    query_vector = await create_embedding([query], model=embedding_model(collection))
 
     kwargs: dict = {
         "query_embeddings": query_vector,
-        "n_results": top_k,
-        "include": ["documents", "distances", "metadatas"],
+        "n_results": max(top_k, settings.RETRIEVAL_FETCH_K),
+        "include": ["documents", "distances", "metadatas", "embeddings"],
     }
-    if category is not None:
-        kwargs["where"] = {"category": category}
+    where = _build_where(category, sender)
+    if where is not None:
+        kwargs["where"] = where
 
     results = collection.query(**kwargs)
 
@@ -86,10 +239,24 @@ async def search_similar(
             "metadata": meta,
             "email_id": meta.get("email_id"),
         })
-    return items
+
+    embeddings = results.get("embeddings")
+    return _select_mmr(
+        query_vector[0],
+        items,
+        embeddings[0] if embeddings is not None else None,
+        top_k,
+        settings.RETRIEVAL_MMR_LAMBDA,
+        settings.RETRIEVAL_MAX_CHUNKS_PER_EMAIL,
+    )
 
 
-async def delete_email_embedding(email_id: int) -> None:
-    """Delete all chunks belonging to *email_id*."""
+def get_email_vectors(email_id: int) -> list[list[float]]:
+    """Return the stored chunk vectors of *email_id*."""
     collection = get_collection()
-    collection.delete(where={"email_id": email_id})
+    results = collection.get(where={"email_id": email_id}, include=["embeddings"])
+    embeddings = results.get("embeddings")
+    if embeddings is None:
+        return []
+    return [list(vector) for vector in embeddings]
+
@@ -0,0 +1,164 @@
+"""Streaming NDJSON export and restore.
+
+An export is one JSON object per line:
+
+- ``{"type": "header", ...}`` — format version and export time
+- ``{"type": "category", "name", "description"}`` — every category
+- ``{"type": "email", ...}`` — every settled email with its body and,
+  when vectors are requested, its ``chunks``, their ``embeddings`` and the
+  ``embedding_model`` they were computed with
+
+Emails are read by id a page at a time (:func:`backend.db.sqlite.iter_emails`)
+and their chunks fetched from the vector store per page, so memory stays
+flat however large the mailbox is.
+
+Restoring is an import of ``format=ndjson`` (see
+:mod:`backend.services.mailbox`), with the same checkpoints, resume and
+Message-ID dedupe.  Stored embeddings are handed to the indexer with the
+email, so nothing is re-embedded as long as the collection uses the same
+model and the chunking is unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+
+import orjson
+
+from backend.config import settings
+from backend.db.chromadb import embedding_model
+from backend.db.sqlite import add_category, get_existing_message_ids, insert_email, iter_emails
+from backend.services import category_cache
+from backend.services.embeddings import _chunk_text, open_collection
+
+FORMAT_VERSION = 1
+_EMAIL_FIELDS = (
+    "sender", "subject", "body", "summary", "category", "date_extracted",
+    "classification_path", "classification_confidence", "message_id", "input_subject", "created_at",
+)
+
+
+def _line(record: dict) -> bytes:
+    # Chroma returns embeddings as numpy arrays
+    return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+
+
+# ── Export ───────────────────────────────────────────────────────────
+
+
+def _page_chunks(collection, email_ids: list[int]) -> dict[int, list[tuple[int, str, object]]]:
+    """Chunks of *email_ids* as ``(chunk_index, document, embedding)`` (worker thread)."""
+    results = collection.get(
+        where={"email_id": {"$in": email_ids}}, include=["documents", "embeddings", "metadatas"]
+    )
+    chunks: dict[int, list[tuple[int, str, object]]] = {}
+    for document, vector, meta in zip(results["documents"], results["embeddings"], results["metadatas"]):
+        chunks.setdefault(meta["email_id"], []).append((meta["chunk_index"], document, vector))
+    for entries in chunks.values():
+        entries.sort(key=lambda entry: entry[0])
+    return chunks
+
+
+async def export_ndjson(include_vectors: bool = False) -> AsyncIterator[bytes]:
+    """Yield the export in NDJSON, one page of emails per chunk."""
+    yield _line({
+        "type": "header",
+        "version": FORMAT_VERSION,
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "vectors": include_vectors,
+    })
+    for category in await category_cache.get_all():
+        yield _line({"type": "category", "name": category["name"], "description": category["description"]})
+
+    collection = await open_collection() if include_vectors else None
+    model = embedding_model(collection) if collection is not None else None
+    async for page in iter_emails(settings.EXPORT_PAGE_SIZE):
+        chunks = {}
+        if collection is not None:
+            chunks = await asyncio.to_thread(_page_chunks, collection, [email["id"] for email in page])
+        lines = []
+        for email in page:
+            record = {"type": "email", **{field: email[field] for field in _EMAIL_FIELDS}}
+            # Emails still waiting in the outbox have no chunks yet
+            if email["id"] in chunks:
+                entries = chunks[email["id"]]
+                record["chunks"] = [document for _, document, _ in entries]
+                record["embeddings"] = [vector for _, _, vector in entries]
+                record["embedding_model"] = model
+            lines.append(_line(record))
+        yield b"".join(lines)
+
+
+# ── Restore ──────────────────────────────────────────────────────────
+
+
+def iter_ndjson(path: Path, start: int = 0) -> Iterator[tuple[int, bytes | None]]:
+    """Yield ``(end offset, line)`` from byte offset *start*, skipping blank lines.
+
+    Lines larger than ``IMPORT_MAX_MESSAGE_BYTES`` are yielded as ``None``.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            yield offset, None if len(line) > settings.IMPORT_MAX_MESSAGE_BYTES else line
+
+
+def parse_record(line: bytes) -> dict | None:
+    """One export line as a dict; ``None`` if it is not a JSON object."""
+    try:
+        record = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _message_id(record: dict) -> str:
+    if record.get("message_id"):
+        return record["message_id"]
+    # Same fallback as the mailbox import: a content hash, so resumes still dedupe
+    key = "\n".join(str(record.get(field) or "") for field in ("sender", "subject", "created_at", "body"))
+    return "sha1:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _vectors(record: dict) -> list | None:
+    """Stored embeddings, if they still match how the body is chunked today."""
+    if not record.get("embeddings") or record.get("chunks") != _chunk_text(record.get("body") or ""):
+        return None
+    return record["embeddings"]
+
+
+async def _restore_categories(records: list[dict]) -> None:
+    added = False
+    for record in records:
+        if record.get("name") and await category_cache.get_by_name(record["name"]) is None:
+            await add_category(record["name"], record.get("description"))
+            added = True
+    if added:
+        category_cache.invalidate()
+
+
+async def restore_batch(records: list[dict]) -> dict:
+    """Store the categories and emails of *records*; skip emails already stored."""
+    await _restore_categories([record for record in records if record.get("type") == "category"])
+
+    emails = [record for record in records if record.get("type") == "email"]
+    existing = await get_existing_message_ids([_message_id(record) for record in emails])
+    imported = 0
+    for record in emails:
+        message_id = _message_id(record)
+        if message_id in existing:
+            continue
+        existing.add(message_id)
+        email_data = {field: record.get(field) for field in _EMAIL_FIELDS if record.get(field) is not None}
+        email_data.update(message_id=message_id, body=record.get("body") or "", status="completed")
+        await insert_email(email_data, _vectors(record), record.get("embedding_model"))
+        imported += 1
+    return {"imported": imported, "duplicates": len(emails) - imported}
@@ -0,0 +1,130 @@
+"""Chat history compaction against a token budget.
+
+The newest turns are passed to the model verbatim.  Once the history no
+longer fits ``CHAT_HISTORY_TOKENS``, the older turns are collapsed into a
+rolling summary.  Summaries are cached by a hash chain over the summarized
+prefix, so the next compaction of the same conversation only summarizes the
+turns added since (previous summary + new turns), and a conversation whose
+prefix is already summarized costs no LLM call at all.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+
+from backend.config import settings
+from backend.services import metrics
+from backend.services.llm import LLMError, chat_completion
+from backend.services.prompts import read_prompt
+from backend.services.tokens import estimate_messages_tokens
+
+logger = logging.getLogger(__name__)
+
+_PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "history_summary.txt"
+
+# prefix hash -> summary of the history up to that point (LRU)
+_summaries: OrderedDict[str, str] = OrderedDict()
+
+
+def _load_prompt() -> str:
+    return read_prompt(_PROMPT_PATH)
+
+
+def _prefix_hashes(messages: list[dict]) -> list[str]:
+    """``hashes[i]`` identifies ``messages[:i]``."""
+    hashes = [""]
+    for message in messages:
+        digest = hashlib.sha1(hashes[-1].encode())
+        digest.update(json.dumps(
+            [message.get("role"), message.get("content")], ensure_ascii=False
+        ).encode())
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+def _cache_get(key: str) -> str | None:
+    summary = _summaries.get(key)
+    if summary is not None:
+        _summaries.move_to_end(key)
+    return summary
+
+
+def _cache_put(key: str, summary: str) -> None:
+    _summaries[key] = summary
+    _summaries.move_to_end(key)
+    while len(_summaries) > settings.CHAT_SUMMARY_CACHE_SIZE:
+        _summaries.popitem(last=False)
+
+
+def _summary_message(summary: str) -> dict:
+    return {"role": "system", "content": f"이전 대화 요약:\n{summary}"}
+
+
+def _split_point(messages: list[dict], suffix_tokens: list[int], budget: int) -> int:
+    """Where to start the verbatim part of a history that overflows *budget*.
+
+    Leaves only half the budget verbatim so the next few turns fit without
+    another summary, and starts at a user turn when one follows.
+    """
+    split = next(i for i, tokens in enumerate(suffix_tokens) if tokens <= budget // 2)
+    for i in range(split, len(messages)):
+        if messages[i].get("role") == "user":
+            return i
+    return split
+
+
+async def _summarize(previous: str | None, messages: list[dict]) -> str:
+    transcript = "\n".join(f"{m.get('role')}: {m.get('content')}" for m in messages)
+    content = f"[기존 요약]\n{previous or '(없음)'}\n\n[이어지는 대화]\n{transcript}"
+    summary = await chat_completion(
+        messages=[
+            {"role": "system", "content": _load_prompt()},
+            {"role": "user", "content": content},
+        ],
+        max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+    )
+    metrics.incr("chat_history_summaries")
+    return summary.strip()
+
+
+async def compact_history(chat_history: list[dict]) -> list[dict]:
+    """Fit *chat_history* into ``CHAT_HISTORY_TOKENS`` for the next prompt."""
+    budget = settings.CHAT_HISTORY_TOKENS
+    total = estimate_messages_tokens(chat_history)
+    metrics.incr("chat_history_tokens_in", total)
+    if total <= budget:
+        metrics.incr("chat_history_tokens_out", total)
+        return chat_history
+
+    suffix_tokens = [estimate_messages_tokens(chat_history[i:]) for i in range(len(chat_history) + 1)]
+    hashes = _prefix_hashes(chat_history)
+
+    # Reuse an existing summary whose verbatim remainder still fits
+    split, summary = None, None
+    for i in range(1, len(chat_history) + 1):
+        if suffix_tokens[i] <= budget and (cached := _cache_get(hashes[i])) is not None:
+            split, summary = i, cached
+            break
+
+    if summary is None:
+        split = _split_point(chat_history, suffix_tokens, budget)
+        # Extend the longest summarized prefix instead of starting over
+        start = max((i for i in range(1, split) if hashes[i] in _summaries), default=0)
+        previous = _cache_get(hashes[start]) if start else None
+        try:
+            summary = await _summarize(previous, chat_history[start:split])
+        except LLMError as e:
+            logger.error("Chat history summary failed: %s", e)
+            summary = previous
+        if summary is not None and summary is not previous:
+            _cache_put(hashes[split], summary)
+
+    compacted = chat_history[split:]
+    if summary:
+        compacted = [_summary_message(summary), *compacted]
+    metrics.incr("chat_history_tokens_out", estimate_messages_tokens(compacted))
+    return compacted
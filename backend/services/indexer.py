@@ -0,0 +1,253 @@
+"""Outbox indexer — applies queued email changes to the vector store.
+
+Every email or category write also inserts ``vector_outbox`` rows in the same
+SQLite transaction (see :mod:`backend.db.sqlite`).  This module drains those
+rows in id-order batches, folds several changes of one email into a single
+operation and applies each batch to ChromaDB with a few bulk calls.  When a
+batch fails its entries are applied one at a time, so one bad email does not
+hold back the others; failed entries stay in the outbox and are retried with
+exponential backoff while entries of other emails keep flowing, and after ``INDEXER_MAX_ATTEMPTS`` failures move to
+``vector_outbox_dead``.  The vector store converges on SQLite even across
+crashes and restarts.
+
+While a re-index is running every batch is applied to the rebuild target as
+well as to the active collection (see :mod:`backend.services.reindex`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
+from backend.config import settings
+from backend.db.chromadb import embedding_model, get_build_collection
+from backend.db.sqlite import (
+    dead_letter_outbox_entries,
+    defer_outbox_entries,
+    delete_outbox_entries,
+    get_email_bodies,
+    get_outbox_batch,
+)
+from backend.services import metrics
+from backend.services.embeddings import (
+    _chunk_text,
+    delete_emails_embeddings,
+    embed_chunks,
+    open_collection,
+    update_category_metadata,
+    update_emails_metadata,
+    upsert_chunks,
+)
+
+logger = logging.getLogger(__name__)
+
+_wake: asyncio.Event | None = None
+_drain_lock = asyncio.Lock()
+
+
+def notify() -> None:
+    """Wake the indexer after new outbox entries were committed."""
+    if _wake is not None:
+        _wake.set()
+
+
+@asynccontextmanager
+async def exclusive():
+    """Hold off outbox batches while the caller writes to the vector store."""
+    async with _drain_lock:
+        yield
+
+
+# ── Coalescing ───────────────────────────────────────────────────────
+
+
+def _coalesce(entries: list[dict]) -> list[tuple[str, dict]]:
+    """Fold the entries into steps that keep the original order.
+
+    Consecutive per-email entries collapse into one ``("emails", ops)`` step
+    with the net operation for each email (a delete wins, metadata merges into
+    an upsert).  A category re-tag touches many emails, so it closes the
+    current step and becomes a ``("category", payload)`` step of its own.
+    """
+    steps: list[tuple[str, dict]] = []
+    ops: dict[int, dict] = {}
+
+    for entry in entries:
+        payload = entry["payload"]
+        if entry["op"] == "category":
+            if ops:
+                steps.append(("emails", ops))
+                ops = {}
+            steps.append(("category", payload))
+            continue
+
+        email_id = entry["email_id"]
+        current = ops.get(email_id)
+        if entry["op"] == "delete":
+            ops[email_id] = {"op": "delete"}
+        elif entry["op"] == "upsert":
+            ops[email_id] = {
+                "op": "upsert",
+                "metadata": dict(payload["metadata"]),
+                "vectors": entry["vectors"],
+                "model": payload.get("model"),
+            }
+        elif current is None:
+            ops[email_id] = {"op": "metadata", "metadata": dict(payload["metadata"])}
+        elif current["op"] != "delete":
+            current["metadata"].update(payload["metadata"])
+
+    if ops:
+        steps.append(("emails", ops))
+    return steps
+
+
+# ── Applying ─────────────────────────────────────────────────────────
+
+
+async def _apply_emails(ops: dict[int, dict], collection) -> None:
+    deletes = [email_id for email_id, op in ops.items() if op["op"] == "delete"]
+    upserts = {email_id: op for email_id, op in ops.items() if op["op"] == "upsert"}
+    updates = {email_id: op["metadata"] for email_id, op in ops.items() if op["op"] == "metadata"}
+
+    model = embedding_model(collection)
+    delete_emails_embeddings(deletes, collection)
+
+    if upserts:
+        bodies = await get_email_bodies(list(upserts))
+        entries: list[dict] = []
+        missing: list[dict] = []
+        for email_id, op in upserts.items():
+            if email_id not in bodies:
+                # Deleted since; its delete entry is still queued
+                continue
+            chunks = _chunk_text(bodies[email_id])
+            entry = {
+                "email_id": email_id,
+                "chunks": chunks,
+                # Precomputed vectors only fit a collection of the same model
+                "vectors": op["vectors"] if op["model"] == model else None,
+                "metadata": op["metadata"],
+            }
+            if entry["vectors"] is None or len(entry["vectors"]) != len(chunks):
+                missing.append(entry)
+            entries.append(entry)
+
+        # Embed every email that arrived without vectors in shared requests
+        if missing:
+            vectors = await embed_chunks(
+                [chunk for entry in missing for chunk in entry["chunks"]], model=model
+            )
+            offset = 0
+            for entry in missing:
+                entry["vectors"] = vectors[offset:offset + len(entry["chunks"])]
+                offset += len(entry["chunks"])
+
+        upsert_chunks(entries, collection)
+
+    update_emails_metadata(updates, collection)
+
+
+async def drain_once(limit: int | None = None) -> int:
+    """Apply one batch of due outbox entries; return how many were applied."""
+    async with _drain_lock:
+        entries = await get_outbox_batch(limit or settings.INDEXER_BATCH_SIZE)
+        if not entries:
+            return 0
+
+        targets = [await open_collection()]
+        build = await asyncio.to_thread(get_build_collection)
+        if build is not None:
+            targets.append(build)
+        try:
+            await _apply(entries, targets)
+        except Exception as e:
+            logger.error("Failed to apply %d outbox entries: %s", len(entries), e)
+            metrics.incr("indexer_failures")
+            if len(entries) == 1:
+                return await _settle([], {entries[0]["id"]: str(e)}, entries)
+            return await _settle(*await _apply_one_by_one(entries, targets), entries)
+
+        await delete_outbox_entries([entry["id"] for entry in entries])
+        metrics.incr("indexer_batches")
+        metrics.incr("indexer_entries", len(entries))
+        return len(entries)
+
+
+async def _apply(entries: list[dict], targets: list) -> None:
+    for kind, step in _coalesce(entries):
+        for collection in targets:
+            if kind == "category":
+                update_category_metadata(step["old"], step["new"], collection)
+            else:
+                await _apply_emails(step, collection)
+
+
+async def _apply_one_by_one(entries: list[dict], targets: list) -> tuple[list[int], dict[int, str]]:
+    """After a batch failed, apply its entries singly so one bad email can't block the rest.
+
+    Later entries of an email whose entry failed stay queued behind it, and
+    nothing after a failed category re-tag is applied, so no change overtakes
+    an earlier one.  Returns the applied ids and the errors of failed ids.
+    """
+    applied: list[int] = []
+    failed: dict[int, str] = {}
+    blocked: set[int] = set()
+    for entry in entries:
+        if entry["email_id"] in blocked:
+            continue
+        try:
+            await _apply([entry], targets)
+        except Exception as e:
+            failed[entry["id"]] = str(e)
+            if entry["op"] == "category":
+                break
+            blocked.add(entry["email_id"])
+            continue
+        applied.append(entry["id"])
+    return applied, failed
+
+
+async def _settle(applied: list[int], failed: dict[int, str], entries: list[dict]) -> int:
+    """Delete applied entries; retry failed ones later or dead-letter them."""
+    if applied:
+        await delete_outbox_entries(applied)
+        metrics.incr("indexer_entries", len(applied))
+    attempts = {entry["id"]: entry["attempts"] for entry in entries}
+    dead = [entry_id for entry_id in failed if attempts[entry_id] + 1 >= settings.INDEXER_MAX_ATTEMPTS]
+    for entry_id in dead:
+        logger.error("Dead-lettering outbox entry %d: %s", entry_id, failed[entry_id])
+        await dead_letter_outbox_entries([entry_id], failed[entry_id])
+    if dead:
+        metrics.incr("indexer_dead_letters", len(dead))
+    for entry_id, error in failed.items():
+        if entry_id not in dead:
+            await defer_outbox_entries([entry_id], error, settings.INDEXER_MAX_BACKOFF)
+    return len(applied) + len(dead)
+
+
+async def drain() -> int:
+    """Apply outbox entries until none are due; return the total applied."""
+    total = 0
+    while applied := await drain_once():
+        total += applied
+    return total
+
+
+async def run_indexer() -> None:
+    """Background task: drain the outbox whenever it is notified or polled."""
+    global _wake
+    _wake = asyncio.Event()
+    try:
+        while True:
+            _wake.clear()
+            try:
+                if await drain_once():
+                    continue
+            except Exception as e:
+                logger.error("Outbox indexer failed: %s", e)
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(_wake.wait(), timeout=settings.INDEXER_POLL_INTERVAL)
+    finally:
+        _wake = None
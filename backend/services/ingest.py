@@ -0,0 +1,291 @@
+"""Email ingest pipeline — classify, summarize and store incoming emails."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from backend.config import settings
+from backend.db.sqlite import insert_email, update_email_classification
+from backend.services import category_cache, centroids, indexer, rules
+from backend.services.classifier import (
+    classify, classify_and_summarize, classify_batch, summarize
+)
+from backend.services.embeddings import active_embedding_model, embed_body
+
+logger = logging.getLogger(__name__)
+
+# Emails routed (rules + embedding) concurrently during bulk ingest
+_ROUTE_CONCURRENCY = 4
+
+
+async def _predict_locally(
+    body: str, model: str
+) -> tuple[list[list[float]] | None, dict | None]:
+    """Embed *body* and score it with the local classifier.
+
+    The chunk vectors are returned as well so they can be stored without a
+    second embedding call.
+    """
+    try:
+        await centroids.ensure_loaded()
+        _, chunk_vectors = await embed_body(body, model)
+    except Exception as e:
+        logger.warning("Local classification unavailable: %s", e)
+        return None, None
+    return chunk_vectors, centroids.predict(centroids.email_vector(chunk_vectors))
+
+
+def _calls_summary(mode: str) -> bool:
+    return mode != "skip" and settings.SUMMARY_MODE != "lazy"
+
+
+async def _summarize_known(body: str, sender: str | None, category: str, mode: str) -> dict:
+    """Build the result for an email whose category is already decided.
+
+    With ``mode="skip"`` or the lazy summary mode no LLM call is made; the
+    summary is left ``None`` and generated on first read.
+    """
+    if not _calls_summary(mode):
+        result = {"subject": "", "summary": None, "date_extracted": None}
+    else:
+        result = await summarize(body=body, sender=sender)
+        if result.pop("status", None) == "pending":
+            result["summary"] = None
+    result["category"] = category
+    return result
+
+
+def _now() -> str:
+    """Current UTC time in SQLite's CURRENT_TIMESTAMP format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def _decide(
+    body: str,
+    sender: str | None,
+    rule: dict | None,
+    prediction: dict | None,
+    category_names: tuple[str, ...],
+) -> dict:
+    """Settle the category from a rule or a confident local prediction.
+
+    Returns the classification state; ``result`` is ``None`` when the email
+    still needs LLM classification.
+    """
+    state = {
+        "result": None,
+        "path": "llm",
+        "confidence": prediction["confidence"] if prediction else None,
+    }
+
+    if rule is not None:
+        # A learned rule beats both the centroids and the LLM
+        state["result"] = await _summarize_known(body, sender, rule["category"], settings.RULE_MODE)
+        state["path"] = "rule_summary" if _calls_summary(settings.RULE_MODE) else "rule"
+        state["confidence"] = rule["confidence"]
+    elif (
+        prediction is not None
+        and prediction["confident"]
+        and prediction["category"] in category_names
+    ):
+        # Confident local match — the LLM only writes the summary, if at all
+        state["result"] = await _summarize_known(
+            body, sender, prediction["category"], settings.LOCAL_CLASSIFIER_MODE
+        )
+        state["path"] = "local_summary" if _calls_summary(settings.LOCAL_CLASSIFIER_MODE) else "local"
+
+    return state
+
+
+def _email_data(state: dict, base: dict) -> dict:
+    """Merge a classification state into the email row fields."""
+    result = state["result"]
+    return {
+        **base,
+        "subject": result.get("subject") or base["subject"],
+        "summary": result.get("summary"),
+        "category": result.get("category", "미분류"),
+        "date_extracted": result.get("date_extracted"),
+        "status": result.get("status", "completed"),
+        "classification_path": state["path"],
+        "classification_confidence": state["confidence"],
+    }
+
+
+async def _embed(email_id: int, body: str, model: str) -> list[list[float]] | None:
+    """Embed *body*; ``None`` on failure, the indexer then embeds it later."""
+    try:
+        _, chunk_vectors = await embed_body(body, model)
+        return chunk_vectors
+    except Exception as e:
+        logger.error("Failed to embed email %d: %s", email_id, e)
+        return None
+
+
+async def _release(email_id: int, base: dict) -> None:
+    """Finalize a reserved row whose ingest failed as an unclassified ``pending`` email."""
+    try:
+        await update_email_classification(email_id, {**base, "category": "미분류", "status": "pending"})
+        indexer.notify()
+    except Exception as e:
+        logger.error("Failed to release email %d: %s", email_id, e)
+
+
+async def ingest_email(
+    body: str,
+    sender: str | None = None,
+    subject: str | None = None,
+) -> dict:
+    """Classify, summarize and store one email; return the saved row.
+
+    The row is reserved first so the embedding can start immediately and
+    run concurrently with classification.  The classified row and its
+    chunk vectors are committed together to SQLite and the vector outbox;
+    the indexer writes them to ChromaDB.  If anything fails before that,
+    the embedding is cancelled and the row is left ``pending`` and
+    unclassified instead of ``processing``.
+    """
+    base = {
+        "sender": sender,
+        "subject": subject,
+        "input_subject": subject,
+        "body": body,
+        "created_at": _now(),
+    }
+    email_id = await insert_email({
+        **base,
+        "summary": None,
+        "status": "processing",
+        "classification_path": None,
+    })
+
+    embed_task: asyncio.Task | None = None
+    try:
+        # The embedding does not depend on the classification — start it now
+        model = await active_embedding_model()
+        embed_task = asyncio.create_task(_embed(email_id, body, model))
+
+        category_names = await category_cache.get_names()
+
+        rule = None
+        if settings.RULES_ENABLED:
+            rule = await rules.match(sender, subject, category_names)
+
+        prediction = None
+        if rule is None and settings.LOCAL_CLASSIFIER_ENABLED:
+            try:
+                await centroids.ensure_loaded()
+            except Exception as e:
+                logger.warning("Local classification unavailable: %s", e)
+            # Only wait for this email's vector when the centroids can use it
+            if centroids.is_ready():
+                prediction = centroids.predict(centroids.email_vector(await embed_task))
+
+        state = await _decide(body, sender, rule, prediction, category_names)
+        if state["result"] is None:
+            classify_fn = classify if settings.SUMMARY_MODE == "lazy" else classify_and_summarize
+            state["result"] = await classify_fn(
+                body=body,
+                sender=sender,
+                categories=category_names,
+            )
+
+        email_data = _email_data(state, base)
+        chunk_vectors = await embed_task
+        await update_email_classification(
+            email_id, email_data, vectors=chunk_vectors, embedding_model=model
+        )
+    except BaseException:
+        if embed_task is not None:
+            embed_task.cancel()
+        await _release(email_id, base)
+        raise
+    indexer.notify()
+    if chunk_vectors and email_data["status"] == "completed":
+        centroids.add_example(email_data["category"], centroids.email_vector(chunk_vectors))
+
+    return {"id": email_id, **email_data}
+
+
+async def _route(
+    body: str,
+    sender: str | None,
+    subject: str | None,
+    category_names: tuple[str, ...],
+) -> dict:
+    """Try the learned rules and the local classifier for one email (bulk ingest)."""
+    rule = None
+    if settings.RULES_ENABLED:
+        rule = await rules.match(sender, subject, category_names)
+
+    model = await active_embedding_model()
+    chunk_vectors = None
+    prediction = None
+    if settings.LOCAL_CLASSIFIER_ENABLED:
+        chunk_vectors, prediction = await _predict_locally(body, model)
+
+    state = await _decide(body, sender, rule, prediction, category_names)
+    state["base"] = {
+        "sender": sender, "subject": subject, "input_subject": subject, "body": body, "created_at": _now(),
+    }
+    state["chunk_vectors"] = chunk_vectors
+    state["embedding_model"] = model
+    return state
+
+
+async def _store(state: dict) -> dict:
+    """Insert a classified email and queue its chunks for indexing.
+
+    Vectors computed by the local classifier are reused; otherwise the
+    indexer embeds the chunks together with the rest of the batch.
+    """
+    email_data = _email_data(state, state["base"])
+    email_id = await insert_email(
+        email_data, vectors=state["chunk_vectors"], embedding_model=state["embedding_model"]
+    )
+
+    if state["chunk_vectors"] and email_data["status"] == "completed":
+        centroids.add_example(
+            email_data["category"], centroids.email_vector(state["chunk_vectors"])
+        )
+
+    return {"id": email_id, **email_data}
+
+
+async def ingest_emails(items: list[dict]) -> list[dict]:
+    """Ingest many emails, classifying the LLM-bound ones in batched requests.
+
+    *items* are dicts with ``body`` and optional ``sender``/``subject``,
+    plus ``created_at``/``message_id`` for imported mail.  Rows are inserted
+    in input order and returned in that order.
+    """
+    category_names = await category_cache.get_names()
+
+    semaphore = asyncio.Semaphore(_ROUTE_CONCURRENCY)
+
+    async def route(item: dict) -> dict:
+        async with semaphore:
+            state = await _route(item["body"], item.get("sender"), item.get("subject"), category_names)
+        state["base"]["message_id"] = item.get("message_id")
+        if item.get("created_at"):
+            state["base"]["created_at"] = item["created_at"]
+        return state
+
+    states = await asyncio.gather(*(route(item) for item in items))
+
+    pending = [state for state in states if state["result"] is None]
+    if pending:
+        results = await classify_batch(
+            [{"body": state["base"]["body"], "sender": state["base"]["sender"]} for state in pending],
+            category_names,
+            summarize=settings.SUMMARY_MODE != "lazy",
+        )
+        for state, result in zip(pending, results):
+            state["path"] = "llm_batch" if result.pop("batched") else "llm"
+            state["result"] = result
+
+    stored = [await _store(state) for state in states]
+    indexer.notify()
+    return stored
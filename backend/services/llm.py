@@ -1,14 +1,37 @@
-"""GitHub Models API client — chat completions & embeddings via httpx."""
+"""GitHub Models API client — chat completions & embeddings via httpx.
+
+One pooled ``httpx.AsyncClient`` per process keeps TLS connections to the
+API alive between calls.  ``httpx`` is imported when that client is first
+created, not at module import.
+
+Identical requests in flight at the same time share one upstream call
+(single flight, keyed by a hash of endpoint and body, which includes the
+model): every caller gets its result or its error.  Results are shared —
+callers must not modify them.
+"""
 
 from __future__ import annotations
 
-import httpx
+import asyncio
+import hashlib
+from functools import partial
+from typing import TYPE_CHECKING
+
+import orjson
 
 from backend.config import settings
+from backend.services import metrics
+
+if TYPE_CHECKING:
+    import httpx
 
 _BASE_URL = "https://models.github.ai"
 _TIMEOUT = 30.0
 
+_client: httpx.AsyncClient | None = None
+# Request hash -> upstream call that identical requests wait on
+_in_flight: dict[str, asyncio.Task] = {}
+
 
 # ── Custom exceptions ────────────────────────────────────────────────
 
@@ -32,6 +55,32 @@ class LLMTimeoutError(LLMError):
 # ── Helpers ──────────────────────────────────────────────────────────
 
 
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        import httpx
+
+        _client = httpx.AsyncClient(
+            base_url=_BASE_URL, timeout=_TIMEOUT, verify=settings.SSL_VERIFY
+        )
+    return _client
+
+
+async def warm_up() -> None:
+    """Open the pooled connection (DNS + TLS) before the first real call.
+
+    Any HTTP response will do; only connection failures are raised.
+    """
+    await _get_client().head("/")
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 def _headers() -> dict[str, str]:
     return {
         "Authorization": f"Bearer {settings.GITHUB_TOKEN}",
@@ -59,6 +108,54 @@ def _handle_error(exc: httpx.HTTPStatusError) -> None:
     ) from exc
 
 
+async def _post(path: str, body: dict, timeout_message: str) -> dict:
+    import httpx
+
+    try:
+        resp = await _get_client().post(path, headers=_headers(), json=body)
+        resp.raise_for_status()
+    except httpx.TimeoutException as exc:
+        raise LLMTimeoutError(timeout_message) from exc
+    except httpx.HTTPStatusError as exc:
+        _handle_error(exc)
+
+    return resp.json()
+
+
+# ── Single flight ────────────────────────────────────────────────────
+
+
+def _flight_key(path: str, body: dict) -> str:
+    return hashlib.sha256(orjson.dumps([path, body], option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _landed(key: str, task: asyncio.Task) -> None:
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+    if not task.cancelled():
+        # Retrieved here too, in case every caller gave up waiting
+        task.exception()
+
+
+async def _shared_post(kind: str, path: str, body: dict, timeout_message: str) -> dict:
+    """POST *body*, joining an identical request that is already in flight."""
+    if not settings.LLM_SINGLE_FLIGHT:
+        metrics.incr(f"llm_{kind}_calls")
+        return await _post(path, body, timeout_message)
+
+    key = _flight_key(path, body)
+    task = _in_flight.get(key)
+    if task is None:
+        metrics.incr(f"llm_{kind}_calls")
+        task = asyncio.ensure_future(_post(path, body, timeout_message))
+        _in_flight[key] = task
+        task.add_done_callback(partial(_landed, key))
+    else:
+        metrics.incr(f"llm_{kind}_coalesced")
+    # A caller that is cancelled must not cancel the call others wait on
+    return await asyncio.shield(task)
+
+
 # ── Public API ───────────────────────────────────────────────────────
 
 
@@ -66,6 +163,7 @@ async def chat_completion(
     messages: list[dict],
     model: str | None = None,
     response_format: dict | None = None,
+    max_tokens: int | None = None,
 ) -> str:
     """Send a chat-completion request and return the assistant content."""
     body: dict = {
@@ -74,48 +172,32 @@ async def chat_completion(
     }
     if response_format is not None:
         body["response_format"] = response_format
+    if max_tokens is not None:
+        body["max_tokens"] = max_tokens
 
-    try:
-        async with httpx.AsyncClient(
-            base_url=_BASE_URL, timeout=_TIMEOUT, verify=settings.SSL_VERIFY
-        ) as client:
-            resp = await client.post(
-                "/inference/chat/completions",
-                headers=_headers(),
-                json=body,
-            )
-            resp.raise_for_status()
-    except httpx.TimeoutException as exc:
-        raise LLMTimeoutError("Chat completion request timed out") from exc
-    except httpx.HTTPStatusError as exc:
-        _handle_error(exc)
-
-    return resp.json()["choices"][0]["message"]["content"]
+    data = await _shared_post(
+        "chat", "/inference/chat/completions", body, "Chat completion request timed out"
+    )
+    return data["choices"][0]["message"]["content"]
 
 
 async def create_embedding(
     texts: list[str],
     model: str | None = None,
 ) -> list[list[float]]:
-    """Create embeddings for a list of texts."""
+    """Create embeddings for a list of texts.
+
+    Repeated texts (e.g. the same signature chunk in a bulk import) are sent
+    once and share their vector.
+    """
+    unique = list(dict.fromkeys(texts))
+    if len(unique) < len(texts):
+        metrics.incr("llm_embedding_duplicates", len(texts) - len(unique))
     body: dict = {
         "model": model or settings.EMBEDDING_MODEL,
-        "input": texts,
+        "input": unique,
     }
 
-    try:
-        async with httpx.AsyncClient(
-            base_url=_BASE_URL, timeout=_TIMEOUT, verify=settings.SSL_VERIFY
-        ) as client:
-            resp = await client.post(
-                "/inference/embeddings",
-                headers=_headers(),
-                json=body,
-            )
-            resp.raise_for_status()
-    except httpx.TimeoutException as exc:
-        raise LLMTimeoutError("Embedding request timed out") from exc
-    except httpx.HTTPStatusError as exc:
-        _handle_error(exc)
-
-    return [item["embedding"] for item in resp.json()["data"]]
+    data = await _shared_post("embedding", "/inference/embeddings", body, "Embedding request timed out")
+    vectors = {text: item["embedding"] for text, item in zip(unique, data["data"])}
+    return [vectors[text] for text in texts]
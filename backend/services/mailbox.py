@@ -0,0 +1,427 @@
+"""Streaming mailbox import — mbox archives and .eml files.
+
+A source is read one message at a time (an mbox line by line), so memory
+stays flat however large the archive is.  Each message is parsed for
+sender, subject, date, Message-ID and its text (``text/plain`` parts, or
+``text/html`` reduced to text), decoding legacy charsets such as EUC-KR.
+Parsed messages go through :func:`backend.services.ingest.ingest_emails`
+in batches, a bounded number of batches at a time.  NDJSON exports are
+restored through the same jobs (:mod:`backend.services.export`).
+
+Progress is checkpointed in ``import_jobs`` as a position in the source —
+the byte offset of the next message in an mbox or line in an export, the
+next file number for .eml files — advanced only past batches that finished, in order.  Running
+the same source again resumes there; Message-IDs already stored are
+skipped, so batches that were in flight during a crash are not duplicated.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from datetime import timezone
+from email.header import decode_header
+from email.message import Message
+from email.parser import BytesParser
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from pathlib import Path
+
+from backend.config import settings
+from backend.db.sqlite import (
+    get_existing_message_ids,
+    get_import_job,
+    get_import_jobs,
+    save_import_job,
+)
+from backend.services import export
+from backend.services.ingest import ingest_emails
+
+logger = logging.getLogger(__name__)
+
+_ESCAPED_FROM = re.compile(rb"^>+From ")
+# Mail labelled EUC-KR often contains CP949-only Hangul; CP949 is a superset
+_CHARSET_ALIASES = {
+    "euc-kr": "cp949",
+    "ks_c_5601-1987": "cp949",
+    "ks_c_5601": "cp949",
+    "x-windows-949": "cp949",
+    "unknown-8bit": None,
+}
+_CHARSET_FALLBACKS = ("utf-8", "cp949")
+_BLOCK_TAGS = {"br", "p", "div", "tr", "li", "h1", "h2", "h3", "h4", "table", "blockquote"}
+
+# Upload bytes buffered per spool write, which runs in a worker thread
+_SPOOL_WRITE_BYTES = 1024 * 1024
+
+# job id -> running import task (writer process only)
+_tasks: dict[str, asyncio.Task] = {}
+
+
+# ── Parsing ──────────────────────────────────────────────────────────
+
+
+def _decode_bytes(data: bytes, charset: str | None) -> str:
+    candidates = []
+    if charset:
+        name = charset.strip('"').lower()
+        candidates.append(_CHARSET_ALIASES.get(name, name))
+    for candidate in [*candidates, *_CHARSET_FALLBACKS]:
+        if not candidate:
+            continue
+        try:
+            return data.decode(candidate)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+def _header(message: Message, name: str) -> str | None:
+    value = message.get(name)
+    if value is None:
+        return None
+    parts = []
+    for chunk, charset in decode_header(value):
+        parts.append(_decode_bytes(chunk, charset) if isinstance(chunk, bytes) else chunk)
+    # Folded headers carry line breaks and indentation
+    return " ".join("".join(parts).split()) or None
+
+
+def _date(message: Message) -> str | None:
+    """The Date header in UTC, in SQLite's CURRENT_TIMESTAMP format."""
+    value = message.get("Date")
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class _HTMLText(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.parts: list[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs) -> None:
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag) -> None:
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data) -> None:
+        if not self._skip:
+            self.parts.append(data)
+
+
+def _html_to_text(html: str) -> str:
+    parser = _HTMLText()
+    parser.feed(html)
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def _text_body(message: Message) -> str:
+    plain: list[str] = []
+    html: list[str] = []
+    for part in message.walk():
+        if part.is_multipart() or part.get_content_disposition() == "attachment":
+            continue
+        content_type = part.get_content_type()
+        if content_type not in ("text/plain", "text/html"):
+            continue
+        payload = part.get_payload(decode=True) or b""
+        text = _decode_bytes(payload, part.get_content_charset())
+        (plain if content_type == "text/plain" else html).append(text)
+    if plain:
+        body = "\n\n".join(plain)
+    else:
+        body = "\n\n".join(_html_to_text(text) for text in html)
+    return body.replace("\r\n", "\n").strip()
+
+
+def parse_message(raw: bytes) -> dict | None:
+    """Ingest item for one raw message, or ``None`` if it has no text."""
+    message = BytesParser().parsebytes(raw)
+    body = _text_body(message)
+    if not body:
+        return None
+    return {
+        "sender": _header(message, "From"),
+        "subject": _header(message, "Subject"),
+        "body": body,
+        "created_at": _date(message),
+        # Messages without one get a content hash, so resumes still dedupe
+        "message_id": _header(message, "Message-ID") or "sha1:" + hashlib.sha1(raw).hexdigest(),
+    }
+
+
+# ── Sources ──────────────────────────────────────────────────────────
+
+
+def detect_format(path: Path) -> str:
+    """``eml`` for a directory or a single message, ``mbox`` for an archive,
+    ``ndjson`` for an export (:mod:`backend.services.export`)."""
+    if path.is_dir():
+        return "eml"
+    with open(path, "rb") as f:
+        head = f.read(5)
+    if head == b"From ":
+        return "mbox"
+    return "ndjson" if head.startswith(b"{") else "eml"
+
+
+def iter_mbox(path: Path, start: int = 0) -> Iterator[tuple[int, bytes | None]]:
+    """Yield ``(end offset, raw message)`` from byte offset *start*.
+
+    Messages larger than ``IMPORT_MAX_MESSAGE_BYTES`` are yielded as
+    ``None`` (skipped) without being buffered.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        lines: list[bytes] | None = None
+        size = 0
+        previous_blank = True
+        for line in f:
+            if previous_blank and line.startswith(b"From "):
+                if lines is not None or size:
+                    yield offset, None if lines is None else b"".join(lines)
+                lines, size = [], 0
+            elif lines is not None:
+                # mboxrd: one level of ">From " quoting was added on write
+                unescaped = line[1:] if _ESCAPED_FROM.match(line) else line
+                size += len(unescaped)
+                if size > settings.IMPORT_MAX_MESSAGE_BYTES:
+                    lines = None
+                else:
+                    lines.append(unescaped)
+            offset += len(line)
+            previous_blank = not line.strip()
+        if lines is not None or size:
+            yield offset, None if lines is None else b"".join(lines)
+
+
+def iter_eml(path: Path, start: int = 0) -> Iterator[tuple[int, bytes | None]]:
+    """Yield ``(next file number, raw message)`` for one file or a directory."""
+    files = sorted(path.rglob("*.eml")) if path.is_dir() else [path]
+    for number, file in enumerate(files[start:], start=start + 1):
+        if file.stat().st_size > settings.IMPORT_MAX_MESSAGE_BYTES:
+            yield number, None
+        else:
+            yield number, file.read_bytes()
+
+
+def _read_batch(
+    messages: Iterator[tuple[int, bytes | None]], size: int, parse=parse_message
+) -> dict | None:
+    """Read and parse up to *size* messages (runs in a worker thread)."""
+    items: list[dict] = []
+    skipped = 0
+    end = None
+    for end, raw in messages:
+        item = parse(raw) if raw is not None else None
+        if item is None:
+            skipped += 1
+        else:
+            items.append(item)
+        if len(items) + skipped >= size:
+            break
+    if end is None:
+        return None
+    return {"items": items, "skipped": skipped, "end": end}
+
+
+# ── Import jobs ──────────────────────────────────────────────────────
+
+
+def source_key(path: Path) -> str:
+    return hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:16]
+
+
+async def _import_batch(items: list[dict]) -> dict:
+    existing = await get_existing_message_ids([item["message_id"] for item in items])
+    fresh = []
+    for item in items:
+        if item["message_id"] not in existing:
+            existing.add(item["message_id"])
+            fresh.append(item)
+    if fresh:
+        await ingest_emails(fresh)
+    return {"imported": len(fresh), "duplicates": len(items) - len(fresh)}
+
+
+def _source(fmt: str):
+    """Reader, parser and batch importer of a source format."""
+    if fmt == "ndjson":
+        return export.iter_ndjson, export.parse_record, export.restore_batch
+    return (iter_mbox if fmt == "mbox" else iter_eml), parse_message, _import_batch
+
+
+async def run_import(
+    path: Path,
+    fmt: str | None = None,
+    job_id: str | None = None,
+    restart: bool = False,
+) -> dict:
+    """Import *path* (resuming its job unless *restart*); return the job."""
+    fmt = fmt or detect_format(path)
+    job_id = job_id or source_key(path)
+    job = None if restart else await get_import_job(job_id)
+    if job is None:
+        job = {"id": job_id, "source": str(path), "format": fmt, "position": 0,
+               "imported": 0, "duplicates": 0, "skipped": 0}
+    elif job["status"] == "completed":
+        return job
+    job.update(status="running", error=None)
+    await save_import_job(job)
+    logger.info("Importing %s (%s) from position %d", path, fmt, job["position"])
+
+    reader, parse, import_batch = _source(fmt)
+    messages = reader(path, job["position"])
+    in_flight: dict[asyncio.Task, tuple[int, dict]] = {}
+    finished: dict[int, tuple[dict, dict]] = {}
+    read_count = 0
+    next_checkpoint = 0
+    exhausted = False
+    try:
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < settings.IMPORT_CONCURRENCY:
+                batch = await asyncio.to_thread(
+                    _read_batch, messages, settings.IMPORT_BATCH_SIZE, parse
+                )
+                if batch is None:
+                    exhausted = True
+                    break
+                task = asyncio.create_task(import_batch(batch["items"]))
+                in_flight[task] = (read_count, batch)
+                read_count += 1
+            if not in_flight:
+                break
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                number, batch = in_flight.pop(task)
+                finished[number] = (batch, task.result())
+            # Only an unbroken run of finished batches moves the checkpoint
+            while next_checkpoint in finished:
+                batch, counts = finished.pop(next_checkpoint)
+                job["position"] = batch["end"]
+                job["imported"] += counts["imported"]
+                job["duplicates"] += counts["duplicates"]
+                job["skipped"] += batch["skipped"]
+                next_checkpoint += 1
+            await save_import_job(job)
+    except asyncio.CancelledError:
+        # Shutdown: the job stays "running" and resumes at the next start
+        for task in in_flight:
+            task.cancel()
+        raise
+    except Exception as e:
+        for task in in_flight:
+            task.cancel()
+        job.update(status="failed", error=str(e))
+        await save_import_job(job)
+        raise
+    finally:
+        messages.close()
+
+    job["status"] = "completed"
+    await save_import_job(job)
+    logger.info(
+        "Imported %s: %d new, %d duplicates, %d skipped",
+        path, job["imported"], job["duplicates"], job["skipped"],
+    )
+    return job
+
+
+async def spool(chunks: AsyncIterator[bytes]) -> tuple[Path, str] | None:
+    """Write an uploaded archive to the spool directory; return (path, job id).
+
+    The job id is the content hash, so uploading the same archive again
+    resumes its import.  ``None`` for an empty upload.
+    """
+    directory = Path(settings.IMPORT_SPOOL_PATH)
+    if not directory.is_absolute():
+        directory = Path(__file__).resolve().parent.parent / directory
+    directory.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    partial = directory / f"upload-{uuid.uuid4().hex}.part"
+    size = 0
+    buffer = bytearray()
+    f = await asyncio.to_thread(open, partial, "wb")
+    try:
+        async for chunk in chunks:
+            digest.update(chunk)
+            buffer += chunk
+            size += len(chunk)
+            if len(buffer) >= _SPOOL_WRITE_BYTES:
+                await asyncio.to_thread(f.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(f.write, bytes(buffer))
+    finally:
+        await asyncio.to_thread(f.close)
+    if not size:
+        partial.unlink()
+        return None
+    job_id = digest.hexdigest()[:16]
+    path = directory / f"{job_id}.upload"
+    if path.exists():
+        partial.unlink()
+    else:
+        partial.rename(path)
+    return path, job_id
+
+
+async def _run(path: Path, fmt: str | None, job_id: str, cleanup: bool) -> None:
+    try:
+        await run_import(path, fmt, job_id)
+    except Exception as e:
+        logger.error("Import of %s failed: %s", path, e)
+        return
+    if cleanup:
+        path.unlink(missing_ok=True)
+
+
+async def start(path: Path, fmt: str | None, job_id: str, cleanup: bool = False) -> dict:
+    """Import in the background unless this job is already running."""
+    fmt = fmt or detect_format(path)
+    job = await get_import_job(job_id)
+    task = _tasks.get(job_id)
+    if task is None or task.done():
+        task = asyncio.create_task(_run(path, fmt, job_id, cleanup))
+        _tasks[job_id] = task
+        task.add_done_callback(lambda _: _tasks.pop(job_id, None))
+        # The task saves the job on its first step; until then it is queued
+        if job is None:
+            job = {"id": job_id, "source": str(path), "format": fmt, "position": 0,
+                   "imported": 0, "duplicates": 0, "skipped": 0, "status": "queued"}
+        if job["status"] != "completed":
+            job["status"] = "queued"
+    return job
+
+
+async def resume_interrupted() -> None:
+    """Restart imports a previous writer process left running (at startup)."""
+    for job in await get_import_jobs(status="running"):
+        path = Path(job["source"])
+        if path.exists():
+            await start(path, job["format"], job["id"], cleanup=path.suffix == ".upload")
+        else:
+            job.update(status="failed", error="source file is gone")
+            await save_import_job(job)
@@ -0,0 +1,26 @@
+"""In-process counters and gauges exposed by the admin metrics endpoint."""
+
+from __future__ import annotations
+
+_counters: dict[str, int] = {}
+_gauges: dict[str, float] = {}
+
+
+def incr(name: str, amount: int = 1) -> None:
+    """Increase counter *name* by *amount*."""
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Record the latest value of gauge *name*."""
+    _gauges[name] = value
+
+
+def snapshot() -> dict:
+    """Copy of all counters and gauges."""
+    return {"counters": dict(_counters), "gauges": dict(_gauges)}
+
+
+def reset() -> None:
+    _counters.clear()
+    _gauges.clear()
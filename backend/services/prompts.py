@@ -0,0 +1,22 @@
+"""Prompt templates, read from ``backend/prompts`` once per process."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+
+@lru_cache(maxsize=None)
+def read_prompt(path: Path) -> str:
+    """Contents of prompt file *path* (cached; edits need a restart)."""
+    return path.read_text(encoding="utf-8")
+
+
+def preload() -> int:
+    """Read every prompt file into the cache; return how many there are."""
+    paths = sorted(PROMPTS_DIR.glob("*.txt"))
+    for path in paths:
+        read_prompt(path)
+    return len(paths)
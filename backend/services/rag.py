@@ -5,47 +5,132 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 
-from backend.services.embeddings import search_similar
+from backend.config import settings
+from backend.services import metrics
+from backend.services.embeddings import _CHUNK_OVERLAP, search_similar
+from backend.services.history import compact_history
 from backend.services.llm import LLMError, chat_completion
+from backend.services.prompts import read_prompt
+from backend.services.tokens import estimate_messages_tokens, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
 _PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "qa.txt"
-_MAX_CONTEXT_CHARS = 16_000  # ~8 000 tokens
+_SEPARATOR = "\n\n---\n\n"
+_GAP = "\n(...)\n"
+# Knapsack capacity is counted in units of this many tokens at most
+_MAX_KNAPSACK_CELLS = 512
 
 
 def _load_prompt() -> str:
-    return _PROMPT_PATH.read_text(encoding="utf-8")
-
-
-def _build_context(results: list[dict]) -> tuple[str, list[int]]:
-    """Build context string from search results, respecting token limit."""
-    context_parts: list[str] = []
-    source_ids: set[int] = set()
-    total_chars = 0
-
-    for result in results:
-        chunk_text = result.get("document", "")
-        email_id = result.get("metadata", {}).get("email_id")
-        if total_chars + len(chunk_text) > _MAX_CONTEXT_CHARS:
-            break
-        context_parts.append(f"[메일 #{email_id}] {chunk_text}")
-        if email_id is not None:
-            source_ids.add(email_id)
-        total_chars += len(chunk_text)
-
-    return "\n\n---\n\n".join(context_parts), sorted(source_ids)
+    return read_prompt(_PROMPT_PATH)
+
+
+# ── Context packing ──────────────────────────────────────────────────
+
+
+def _merge_chunks(chunks: list[tuple[int | None, str]]) -> str:
+    """Join the chunks of one email in order, dropping the shared overlap.
+
+    Consecutive chunks repeat the last ``_CHUNK_OVERLAP`` characters of
+    their predecessor; non-consecutive ones are joined with a gap marker.
+    """
+    text = ""
+    previous = None
+    for index, chunk in chunks:
+        if not text:
+            text = chunk
+        elif (
+            index is not None
+            and previous is not None
+            and index == previous + 1
+            and text.endswith(chunk[:_CHUNK_OVERLAP])
+        ):
+            text += chunk[_CHUNK_OVERLAP:]
+        else:
+            text += _GAP + chunk
+        previous = index
+    return text
+
+
+def _group_by_email(results: list[dict]) -> list[dict]:
+    """One candidate per email: merged text, token cost and relevance value.
+
+    Results arrive best-first, so an email's value is the sum of its chunks'
+    reciprocal ranks.  Chunks without an email id stay separate.
+    """
+    groups: dict = {}
+    for rank, result in enumerate(results):
+        metadata = result.get("metadata") or {}
+        email_id = metadata.get("email_id")
+        key = email_id if email_id is not None else ("chunk", rank)
+        group = groups.setdefault(key, {"email_id": email_id, "rank": rank, "chunks": [], "value": 0.0})
+        group["chunks"].append((metadata.get("chunk_index"), result.get("document", "")))
+        group["value"] += 1.0 / (rank + 1)
+
+    candidates = []
+    for group in groups.values():
+        chunks = sorted(group["chunks"], key=lambda c: (c[0] is None, c[0] or 0))
+        group["text"] = f"[메일 #{group['email_id']}] {_merge_chunks(chunks)}"
+        group["tokens"] = estimate_tokens(group["text"]) + estimate_tokens(_SEPARATOR)
+        candidates.append(group)
+    return candidates
+
+
+def _knapsack(candidates: list[dict], budget: int) -> list[dict]:
+    """Choose the candidates with the highest total value within *budget* tokens."""
+    unit = max(1, -(-budget // _MAX_KNAPSACK_CELLS))
+    capacity = budget // unit
+    costs = [-(-c["tokens"] // unit) for c in candidates]
+
+    # best[w] = (value, chosen indices) using at most w units
+    best: list[tuple[float, tuple[int, ...]]] = [(0.0, ())] * (capacity + 1)
+    for i, cost in enumerate(costs):
+        if cost > capacity:
+            continue
+        for w in range(capacity, cost - 1, -1):
+            value = best[w - cost][0] + candidates[i]["value"]
+            if value > best[w][0]:
+                best[w] = (value, best[w - cost][1] + (i,))
+    return [candidates[i] for i in best[capacity][1]]
+
+
+def _build_context(results: list[dict], budget: int | None = None) -> tuple[str, list[int]]:
+    """Pack search results into a context string within a token budget.
+
+    Chunks are grouped per email, ordered by ``chunk_index`` and merged so
+    overlapping text appears once.  The emails that fit are chosen
+    knapsack-style, so a smaller email still fills the room an oversized
+    one leaves; they are emitted in relevance order.
+    """
+    budget = budget or settings.RAG_CONTEXT_TOKENS
+    chosen = sorted(_knapsack(_group_by_email(results), budget), key=lambda c: c["rank"])
+    context = _SEPARATOR.join(candidate["text"] for candidate in chosen)
+    source_ids = sorted({c["email_id"] for c in chosen if c["email_id"] is not None})
+    return context, source_ids
+
+
+async def retrieve(question: str, category: str | None = None, sender: str | None = None) -> list[dict]:
+    """Search the email chunks relevant to *question*."""
+    return await search_similar(question, top_k=5, category=category, sender=sender)
 
 
 async def answer_question(
     question: str,
     chat_history: list[dict] | None = None,
+    category: str | None = None,
+    sender: str | None = None,
+    results: list[dict] | None = None,
 ) -> dict:
-    """Answer a question using the RAG pipeline."""
+    """Answer a question using the RAG pipeline, optionally scoped to a category/sender.
+
+    Pass *results* to answer from already retrieved chunks instead of searching.
+    """
     chat_history = chat_history or []
 
     # Search for relevant email chunks
-    results = await search_similar(question, top_k=5)
+    if results is None:
+        results = await retrieve(question, category=category, sender=sender)
 
     if not results:
         return {
@@ -59,9 +144,13 @@ async def answer_question(
 
     messages = [
         {"role": "system", "content": prompt_template.format(context=context)},
-        *chat_history,
+        *await compact_history(chat_history),
         {"role": "user", "content": question},
     ]
+    prompt_tokens = estimate_messages_tokens(messages)
+    metrics.incr("rag_requests")
+    metrics.incr("rag_prompt_tokens", prompt_tokens)
+    metrics.set_gauge("rag_last_prompt_tokens", prompt_tokens)
 
     try:
         answer = await chat_completion(messages=messages)
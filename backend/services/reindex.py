@@ -0,0 +1,227 @@
+"""Online re-index — rebuild the vector store into a new versioned collection.
+
+Emails are streamed from SQLite in id order, re-chunked and embedded with
+bounded concurrency into ``emails_v<N>``.  A checkpoint (the last finished
+email id) is stored after every page, so an interrupted rebuild resumes
+where it stopped.  While the rebuild runs, queries keep using the active
+collection and the indexer writes every change to both collections; at the
+end the active collection is switched in one step.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import suppress
+
+from backend.config import settings
+from backend.db.chromadb import (
+    delete_collection,
+    get_collection,
+    set_active_collection,
+    set_build_collection,
+)
+from backend.db.sqlite import (
+    get_email_bodies,
+    get_emails_after,
+    get_emails_by_ids,
+    get_index_state,
+    index_metadata,
+    set_index_state,
+)
+from backend.services import centroids, indexer
+from backend.services.embeddings import (
+    _CHUNK_OVERLAP,
+    _CHUNK_SIZE,
+    _EMBED_BATCH_SIZE,
+    _chunk_text,
+    upsert_chunks,
+)
+from backend.services.llm import create_embedding
+
+logger = logging.getLogger(__name__)
+
+_task: asyncio.Task | None = None
+_last_error: str | None = None
+
+
+def _collection_metadata(checkpoint: dict) -> dict:
+    return {
+        "embedding_model": checkpoint["embedding_model"],
+        "chunk_size": checkpoint["chunk_size"],
+        "chunk_overlap": checkpoint["chunk_overlap"],
+    }
+
+
+async def load_state() -> None:
+    """Restore the active collection and an unfinished rebuild target at startup.
+
+    Only the names are restored; the collections open on first use.
+    """
+    state = await get_index_state()
+    if state.get("active_collection"):
+        set_active_collection(state["active_collection"], load=False)
+    checkpoint = state.get("reindex")
+    if checkpoint:
+        # Keep dual-writing so changes made before the resume are not lost
+        set_build_collection(checkpoint["collection"], _collection_metadata(checkpoint), load=False)
+
+
+def is_running() -> bool:
+    return _task is not None and not _task.done()
+
+
+async def status() -> dict:
+    """Active collection plus progress of the current or interrupted rebuild."""
+    state = await get_index_state()
+    checkpoint = state.get("reindex") or {}
+    return {
+        "running": is_running(),
+        "active_collection": get_collection().name,
+        "target_collection": checkpoint.get("collection"),
+        "embedding_model": checkpoint.get("embedding_model"),
+        "last_id": checkpoint.get("last_id"),
+        "indexed": checkpoint.get("indexed"),
+        "error": _last_error,
+    }
+
+
+# ── Rebuild ──────────────────────────────────────────────────────────
+
+
+def _group(entries: list[dict]) -> list[list[dict]]:
+    """Pack emails into embedding requests of at most ``_EMBED_BATCH_SIZE`` chunks."""
+    groups: list[list[dict]] = []
+    current: list[dict] = []
+    size = 0
+    for entry in entries:
+        if current and size + len(entry["chunks"]) > _EMBED_BATCH_SIZE:
+            groups.append(current)
+            current, size = [], 0
+        current.append(entry)
+        size += len(entry["chunks"])
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def _embed_page(entries: list[dict], model: str) -> None:
+    semaphore = asyncio.Semaphore(settings.REINDEX_CONCURRENCY)
+
+    async def embed(group: list[dict]) -> None:
+        async with semaphore:
+            vectors = await create_embedding(
+                [chunk for entry in group for chunk in entry["chunks"]], model=model
+            )
+        offset = 0
+        for entry in group:
+            entry["vectors"] = vectors[offset:offset + len(entry["chunks"])]
+            offset += len(entry["chunks"])
+
+    await asyncio.gather(*(embed(group) for group in _group(entries)))
+
+
+async def _checkpoint(embedding_model: str | None) -> dict:
+    """Resume the unfinished rebuild or start a new versioned one."""
+    state = await get_index_state()
+    if state.get("reindex"):
+        return state["reindex"]
+
+    version = state.get("index_version", 0) + 1
+    checkpoint = {
+        "collection": f"emails_v{version}",
+        "embedding_model": embedding_model or settings.EMBEDDING_MODEL,
+        "chunk_size": _CHUNK_SIZE,
+        "chunk_overlap": _CHUNK_OVERLAP,
+        "last_id": 0,
+        "indexed": 0,
+    }
+    await set_index_state({"index_version": version, "reindex": checkpoint})
+    return checkpoint
+
+
+async def run_reindex(embedding_model: str | None = None) -> dict:
+    """Rebuild the vector index and switch to it; return a short report.
+
+    *embedding_model* only applies to a new rebuild — a resumed one keeps
+    the model it was started with.
+    """
+    checkpoint = await _checkpoint(embedding_model)
+    collection = set_build_collection(checkpoint["collection"], _collection_metadata(checkpoint))
+    logger.info(
+        "Re-indexing into %s from email %d", checkpoint["collection"], checkpoint["last_id"]
+    )
+
+    while True:
+        page = await get_emails_after(checkpoint["last_id"], settings.REINDEX_PAGE_SIZE)
+        if not page:
+            break
+
+        bodies = await get_email_bodies([email["id"] for email in page])
+        entries = [
+            {"email_id": email_id, "chunks": _chunk_text(body)}
+            for email_id, body in bodies.items()
+        ]
+        entries = [entry for entry in entries if entry["chunks"]]
+        await _embed_page(entries, checkpoint["embedding_model"])
+
+        # Re-read the rows with the indexer held off: any later change is
+        # still in the outbox and will be applied to this collection after us
+        async with indexer.exclusive():
+            rows = await get_emails_by_ids([entry["email_id"] for entry in entries])
+            current = {email["id"]: email for email in rows}
+            live = [
+                {**entry, "metadata": index_metadata(current[entry["email_id"]])}
+                for entry in entries
+                if entry["email_id"] in current
+            ]
+            upsert_chunks(live, collection)
+            checkpoint["last_id"] = page[-1]["id"]
+            checkpoint["indexed"] += len(live)
+            await set_index_state({"reindex": checkpoint})
+
+    # Atomic switch: new queries use the new collection, running ones finish
+    async with indexer.exclusive():
+        state = await get_index_state()
+        previous = get_collection().name
+        await set_index_state({
+            "active_collection": checkpoint["collection"],
+            "previous_collection": previous,
+            "reindex": None,
+        })
+        set_active_collection(checkpoint["collection"])
+        set_build_collection(None)
+
+    # Keep the collection just replaced for rollback; drop the one before it
+    older = state.get("previous_collection")
+    if older and older != checkpoint["collection"]:
+        with suppress(Exception):
+            delete_collection(older)
+
+    # Centroids were built from the old vectors
+    centroids.reset()
+    logger.info("Re-index finished: %d emails in %s", checkpoint["indexed"], checkpoint["collection"])
+    return {
+        "collection": checkpoint["collection"],
+        "previous_collection": previous,
+        "embedding_model": checkpoint["embedding_model"],
+        "indexed": checkpoint["indexed"],
+    }
+
+
+async def _run(embedding_model: str | None) -> None:
+    global _last_error
+    try:
+        await run_reindex(embedding_model)
+    except Exception as e:
+        _last_error = str(e)
+        logger.error("Re-index failed: %s", e)
+
+
+async def start(embedding_model: str | None = None) -> dict:
+    """Start (or resume) a rebuild in the background unless one is running."""
+    global _task, _last_error
+    if not is_running():
+        _last_error = None
+        _task = asyncio.create_task(_run(embedding_model))
+    return await status()
@@ -0,0 +1,104 @@
+"""Routing rules learned from manual category corrections.
+
+Every correction counts towards three keys of the email — the sender, the
+sender's domain and a normalized subject prefix.  At ingest the same keys
+are looked up; a key whose corrections agree strongly enough on one
+category routes the email without asking the LLM to classify it.
+
+Lookup happens before classification, when only the subject supplied by
+the caller is known, so rules learn from that same subject
+(``emails.input_subject``) and never from the LLM-extracted ``subject``.
+An email ingested without a subject teaches sender and domain rules only.
+"""
+
+from __future__ import annotations
+
+import re
+
+from backend.config import settings
+from backend.db.sqlite import add_rule_support, find_rules
+
+# Most specific first — the first confident key wins
+_KIND_PRECEDENCE = ("sender", "subject", "domain")
+
+_SUBJECT_PREFIX_LENGTH = 20
+_REPLY_PREFIX_RE = re.compile(r"^\s*((re|fw|fwd|회신|답장|전달)\s*:\s*)+", re.IGNORECASE)
+_ADDRESS_RE = re.compile(r"[\w.+-]+@([\w-]+\.)+[\w-]+")
+
+
+def normalize_subject(subject: str) -> str:
+    """Reduce a subject to a stable prefix: no reply markers, digits or case."""
+    text = _REPLY_PREFIX_RE.sub("", subject)
+    text = re.sub(r"\d+", "#", text)
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return text[:_SUBJECT_PREFIX_LENGTH]
+
+
+def rule_keys(sender: str | None, subject: str | None) -> list[tuple[str, str]]:
+    """Return the (kind, pattern) keys an email can be routed by."""
+    keys: list[tuple[str, str]] = []
+
+    if sender and sender.strip():
+        address = _ADDRESS_RE.search(sender)
+        normalized = address.group(0).lower() if address else sender.strip().lower()
+        keys.append(("sender", normalized))
+        if address:
+            keys.append(("domain", normalized.split("@", 1)[1]))
+
+    if subject:
+        prefix = normalize_subject(subject)
+        if prefix:
+            keys.append(("subject", prefix))
+
+    return keys
+
+
+async def learn(sender: str | None, subject: str | None, category: str) -> None:
+    """Record a manual correction of an email to *category*.
+
+    *subject* must be the one supplied at ingest, as :func:`match` sees it.
+    """
+    keys = rule_keys(sender, subject)
+    if keys:
+        await add_rule_support(keys, category)
+
+
+async def match(
+    sender: str | None,
+    subject: str | None,
+    categories: list[str],
+) -> dict | None:
+    """Find a confident rule for the email, or ``None``.
+
+    For each key the category with the most support wins; it is confident
+    when its support reaches ``RULE_MIN_SUPPORT`` and its share of all
+    corrections for that key reaches ``RULE_MIN_SHARE``.
+    """
+    keys = rule_keys(sender, subject)
+    rules = await find_rules(keys)
+    if not rules:
+        return None
+
+    by_key: dict[tuple[str, str], list[dict]] = {}
+    for rule in rules:
+        by_key.setdefault((rule["kind"], rule["pattern"]), []).append(rule)
+
+    for kind, pattern in sorted(keys, key=lambda k: _KIND_PRECEDENCE.index(k[0])):
+        candidates = by_key.get((kind, pattern))
+        if not candidates:
+            continue
+        best = max(candidates, key=lambda r: r["support"])
+        share = best["support"] / sum(r["support"] for r in candidates)
+        if (
+            best["support"] >= settings.RULE_MIN_SUPPORT
+            and share >= settings.RULE_MIN_SHARE
+            and best["category"] in categories
+        ):
+            return {
+                "category": best["category"],
+                "confidence": share,
+                "rule_id": best["id"],
+                "kind": kind,
+            }
+
+    return None
@@ -0,0 +1,184 @@
+"""Server-side chat sessions.
+
+The conversation lives in SQLite (``chat_sessions``) with a sliding TTL, so
+clients send only the new question.  Each process also keeps a small
+per-session context cache:
+
+- retrieval results by ``(question, category, sender)`` — a repeated or
+  regenerated question skips the embedding call and vector search;
+- the chunks of the previous turn, appended to a new question's results
+  when they match its category/sender scope, so a follow-up ("그 메일
+  보낸 사람은?") still sees what the last answer used;
+- source enrichment by email id, so emails cited again are not re-read.
+
+Results and sources are dropped whenever mail changes — the ``emails``
+table version or the indexer's ``vector_version`` moves — so neither
+outlives a new, deleted or recategorized email.  The cache is only an
+accelerator: a miss (another worker, eviction, expiry) falls back to
+normal retrieval.
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+
+from backend.config import settings
+from backend.db.sqlite import (
+    append_chat_messages,
+    create_chat_session,
+    delete_chat_session,
+    delete_expired_chat_sessions,
+    get_chat_session,
+    get_emails_by_ids,
+    get_index_state,
+    get_table_version,
+)
+from backend.services import metrics
+from backend.services.rag import answer_question, retrieve
+
+# session id -> {"results": OrderedDict[key, results], "last": results,
+#                "sources": {id: source}, "versions": mail versions the caches were filled at}
+_contexts: OrderedDict[str, dict] = OrderedDict()
+_RESULTS_PER_SESSION = 8
+
+
+class SessionNotFound(Exception):
+    """Raised when a session does not exist or has expired."""
+
+
+def _expires_at() -> float:
+    return time.time() + settings.CHAT_SESSION_TTL
+
+
+def _context(session_id: str) -> dict:
+    context = _contexts.get(session_id)
+    if context is None:
+        context = {"results": OrderedDict(), "last": [], "sources": {}, "versions": None}
+        _contexts[session_id] = context
+        while len(_contexts) > settings.CHAT_SESSION_CACHE_SIZE:
+            _contexts.popitem(last=False)
+    _contexts.move_to_end(session_id)
+    return context
+
+
+def _chunk_key(result: dict) -> tuple:
+    metadata = result.get("metadata") or {}
+    return metadata.get("email_id"), metadata.get("chunk_index")
+
+
+async def create_session() -> dict:
+    """Start an empty session."""
+    await delete_expired_chat_sessions()
+    session_id = uuid.uuid4().hex
+    expires_at = _expires_at()
+    await create_chat_session(session_id, expires_at)
+    return {"session_id": session_id, "history": [], "expires_at": expires_at}
+
+
+async def get_session(session_id: str) -> dict:
+    session = await get_chat_session(session_id)
+    if session is None:
+        _contexts.pop(session_id, None)
+        raise SessionNotFound(session_id)
+    return {
+        "session_id": session["id"],
+        "history": session["history"],
+        "expires_at": session["expires_at"],
+    }
+
+
+async def delete_session(session_id: str) -> bool:
+    _contexts.pop(session_id, None)
+    return await delete_chat_session(session_id)
+
+
+def _in_scope(result: dict, category: str | None, sender: str | None) -> bool:
+    metadata = result.get("metadata") or {}
+    return (category is None or metadata.get("category") == category) and (
+        sender is None or metadata.get("sender") == sender
+    )
+
+
+async def _invalidate_on_change(context: dict) -> None:
+    """Drop cached results and sources once any email or vector has changed."""
+    versions = (await get_table_version("emails"), (await get_index_state()).get("vector_version"))
+    if versions != context["versions"]:
+        context["results"].clear()
+        context["sources"].clear()
+        context["versions"] = versions
+
+
+async def _retrieve(context: dict, question: str, category: str | None, sender: str | None) -> list[dict]:
+    key = (question.strip(), category, sender)
+    cached = context["results"].get(key)
+    if cached is not None:
+        context["results"].move_to_end(key)
+        metrics.incr("chat_session_retrieval_hits")
+        return cached
+
+    metrics.incr("chat_session_retrieval_misses")
+    results = await retrieve(question, category=category, sender=sender)
+    # Carry the previous turn's chunks along for follow-up questions in the same scope
+    seen = {_chunk_key(r) for r in results}
+    results = results + [
+        r for r in context["last"] if _chunk_key(r) not in seen and _in_scope(r, category, sender)
+    ]
+    context["results"][key] = results
+    while len(context["results"]) > _RESULTS_PER_SESSION:
+        context["results"].popitem(last=False)
+    return results
+
+
+async def enrich_sources(source_ids: list[int], cache: dict | None = None) -> list[dict]:
+    """Email details for the cited ids, in order; *cache* maps id -> source."""
+    cache = {} if cache is None else cache
+    missing = [email_id for email_id in dict.fromkeys(source_ids) if email_id not in cache]
+    for email in await get_emails_by_ids(missing):
+        cache[email["id"]] = {
+            "email_id": email["id"],
+            "sender": email.get("sender"),
+            "subject": email.get("subject"),
+            "summary": (email.get("summary") or "")[:200],
+        }
+    return [cache[email_id] for email_id in dict.fromkeys(source_ids) if email_id in cache]
+
+
+async def ask(
+    session_id: str,
+    question: str,
+    category: str | None = None,
+    sender: str | None = None,
+) -> dict:
+    """Answer *question* in a session and append the turn to its history."""
+    session = await get_session(session_id)
+    context = _context(session_id)
+    await _invalidate_on_change(context)
+
+    results = await _retrieve(context, question, category, sender)
+    result = await answer_question(
+        question=question,
+        chat_history=session["history"],
+        category=category,
+        sender=sender,
+        results=results,
+    )
+    if result.get("source_ids"):
+        cited = set(result["source_ids"])
+        context["last"] = [r for r in results if _chunk_key(r)[0] in cited]
+
+    turn = [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": result["answer"]},
+    ]
+    if not await append_chat_messages(session_id, turn, _expires_at()):
+        _contexts.pop(session_id, None)
+        raise SessionNotFound(session_id)
+
+    return {
+        "answer": result["answer"],
+        "source_ids": result.get("source_ids", []),
+        "sources": await enrich_sources(result.get("source_ids", []), context["sources"]),
+        "session_id": session_id,
+    }
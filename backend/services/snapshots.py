@@ -0,0 +1,273 @@
+"""Online snapshots of the SQLite database and the active vector collection.
+
+A snapshot is a directory under ``SNAPSHOT_PATH``:
+
+- ``mail_assistant.db`` — copied with the SQLite backup API,
+  ``SNAPSHOT_PAGES_PER_STEP`` pages per step.  Between steps the source is
+  unlocked, so writes continue; a write makes the copy start over, and
+  after ``SNAPSHOT_MAX_RESTARTS`` of those the rest is copied in one step.
+- ``vectors.f32`` / ``chunks.ndjson`` — every chunk of the active
+  collection: float32 embeddings row by row, and id, document and metadata
+  in the same order.
+- ``manifest.json`` — collection name and metadata, counts, sizes and
+  duration.
+
+The indexer is paused for both copies, so every change missing from the
+vector copy is still queued in the outbox of the database copy and is
+applied after a restore.  Reads and SQLite writes are not blocked.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import shutil
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import orjson
+
+from backend.config import settings
+from backend.db.chromadb import delete_collection, get_client, set_active_collection
+from backend.db.sqlite import get_db_path, init_db, set_index_state
+from backend.services import category_cache, indexer
+from backend.services.embeddings import open_collection
+
+logger = logging.getLogger(__name__)
+
+_DB_FILE = "mail_assistant.db"
+_VECTORS_FILE = "vectors.f32"
+_CHUNKS_FILE = "chunks.ndjson"
+_MANIFEST_FILE = "manifest.json"
+_VECTOR_PAGE_SIZE = 1000
+
+_task: asyncio.Task | None = None
+_last_error: str | None = None
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def snapshot_root() -> Path:
+    """``SNAPSHOT_PATH``; a relative path is under ``backend/`` (git-ignored)."""
+    directory = Path(settings.SNAPSHOT_PATH)
+    if not directory.is_absolute():
+        directory = Path(__file__).resolve().parent.parent / directory
+    return directory
+
+
+# ── Copying ──────────────────────────────────────────────────────────
+
+
+def _backup_sqlite(source: Path, target: Path) -> dict:
+    """Copy *source* to *target* in page steps (runs in a worker thread)."""
+    restarts = 0
+    previous: int | None = None
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal restarts, previous
+        # A write by another connection restarts the copy, so nothing is left behind
+        if previous is not None and remaining >= previous:
+            restarts += 1
+            if restarts > settings.SNAPSHOT_MAX_RESTARTS:
+                raise _TooManyRestarts
+        previous = remaining
+
+    src = sqlite3.connect(str(source))
+    dst = sqlite3.connect(str(target))
+    try:
+        try:
+            src.backup(
+                dst, pages=settings.SNAPSHOT_PAGES_PER_STEP, progress=progress,
+                sleep=settings.SNAPSHOT_STEP_SLEEP,
+            )
+        except _TooManyRestarts:
+            # Steady writes keep restarting the copy; take the rest in one read
+            src.backup(dst, pages=-1)
+        pages = dst.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    return {"sqlite_pages": pages, "sqlite_restarts": restarts, "sqlite_bytes": target.stat().st_size}
+
+
+def _copy_collection(collection, directory: Path) -> dict:
+    """Write every chunk of *collection* to *directory* page by page (worker thread)."""
+    count = 0
+    dimension = None
+    with open(directory / _VECTORS_FILE, "wb") as vectors, open(directory / _CHUNKS_FILE, "wb") as chunks:
+        while True:
+            page = collection.get(
+                limit=_VECTOR_PAGE_SIZE, offset=count, include=["documents", "embeddings", "metadatas"]
+            )
+            if not len(page["ids"]):
+                break
+            matrix = np.asarray(page["embeddings"], dtype=np.float32)
+            dimension = matrix.shape[1]
+            matrix.tofile(vectors)
+            for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                chunks.write(orjson.dumps(
+                    {"id": chunk_id, "document": document, "metadata": metadata},
+                    option=orjson.OPT_APPEND_NEWLINE,
+                ))
+            count += len(page["ids"])
+    return {
+        "collection": collection.name,
+        "collection_metadata": collection.metadata or {},
+        "vector_count": count,
+        "dimension": dimension,
+        "vector_bytes": (directory / _VECTORS_FILE).stat().st_size + (directory / _CHUNKS_FILE).stat().st_size,
+    }
+
+
+def _restore_sqlite(source: Path, target: Path) -> None:
+    src = sqlite3.connect(str(source))
+    dst = sqlite3.connect(str(target))
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _restore_collection(directory: Path, manifest: dict) -> None:
+    """Recreate the snapshot's collection from its chunk files (worker thread)."""
+    name = manifest["collection"]
+    client = get_client()
+    if name in {collection.name for collection in client.list_collections()}:
+        delete_collection(name)
+    collection = client.get_or_create_collection(name=name, metadata=manifest["collection_metadata"] or None)
+    if not manifest["vector_count"]:
+        return
+    matrix = np.memmap(
+        directory / _VECTORS_FILE, dtype=np.float32, mode="r",
+        shape=(manifest["vector_count"], manifest["dimension"]),
+    )
+    with open(directory / _CHUNKS_FILE, "rb") as f:
+        start = 0
+        while True:
+            rows = [orjson.loads(line) for _, line in zip(range(_VECTOR_PAGE_SIZE), f)]
+            if not rows:
+                break
+            collection.upsert(
+                ids=[row["id"] for row in rows],
+                embeddings=np.array(matrix[start:start + len(rows)]),
+                documents=[row["document"] for row in rows],
+                metadatas=[row["metadata"] for row in rows],
+            )
+            start += len(rows)
+
+
+# ── Snapshots ────────────────────────────────────────────────────────
+
+
+def _read_manifest(directory: Path) -> dict:
+    return json.loads((directory / _MANIFEST_FILE).read_text(encoding="utf-8"))
+
+
+def list_snapshots() -> list[dict]:
+    """Manifests of the finished snapshots, newest first."""
+    root = snapshot_root()
+    if not root.exists():
+        return []
+    directories = [path for path in root.iterdir() if (path / _MANIFEST_FILE).exists()]
+    return [_read_manifest(path) for path in sorted(directories, reverse=True)]
+
+
+async def create_snapshot() -> dict:
+    """Copy the database and the active collection; return the manifest."""
+    root = snapshot_root()
+    root.mkdir(parents=True, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    name = created.strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while (root / name).exists():
+        suffix += 1
+        name = f"{created:%Y%m%d-%H%M%S}-{suffix}"
+    partial = root / f"{name}.partial"
+    partial.mkdir()
+
+    started = time.perf_counter()
+    collection = await open_collection()
+    try:
+        # No outbox entry is applied in between, so the two copies agree
+        async with indexer.exclusive():
+            sqlite_info = await asyncio.to_thread(_backup_sqlite, await get_db_path(), partial / _DB_FILE)
+            vector_info = await asyncio.to_thread(_copy_collection, collection, partial)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+
+    manifest = {
+        "name": name,
+        "created_at": created.isoformat(timespec="seconds"),
+        "duration_seconds": round(time.perf_counter() - started, 3),
+        "bytes": sqlite_info["sqlite_bytes"] + vector_info["vector_bytes"],
+        **sqlite_info,
+        **vector_info,
+    }
+    (partial / _MANIFEST_FILE).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    partial.rename(root / name)
+    logger.info(
+        "Snapshot %s: %.1f MB in %.2fs (%d chunks, %d backup restarts)",
+        name, manifest["bytes"] / (1024 * 1024), manifest["duration_seconds"],
+        manifest["vector_count"], manifest["sqlite_restarts"],
+    )
+    return manifest
+
+
+async def restore_snapshot(name: str) -> dict:
+    """Replace the database and the snapshot's collection (server stopped)."""
+    directory = snapshot_root() / name
+    if not (directory / _MANIFEST_FILE).exists():
+        raise FileNotFoundError(f"No snapshot named {name!r} in {snapshot_root()}")
+    manifest = _read_manifest(directory)
+
+    started = time.perf_counter()
+    await asyncio.to_thread(_restore_sqlite, directory / _DB_FILE, await get_db_path())
+    await init_db()
+    # Only the active collection is in the snapshot; an unfinished re-index starts over
+    await set_index_state({"active_collection": manifest["collection"], "reindex": None})
+    await asyncio.to_thread(_restore_collection, directory, manifest)
+    set_active_collection(manifest["collection"], load=False)
+    category_cache.invalidate()
+    return {
+        "name": name,
+        "duration_seconds": round(time.perf_counter() - started, 3),
+        "bytes": manifest["bytes"],
+        "vector_count": manifest["vector_count"],
+    }
+
+
+# ── Background ───────────────────────────────────────────────────────
+
+
+def is_running() -> bool:
+    return _task is not None and not _task.done()
+
+
+def status() -> dict:
+    return {"running": is_running(), "error": _last_error, "snapshots": list_snapshots()}
+
+
+async def _run() -> None:
+    global _last_error
+    try:
+        await create_snapshot()
+    except Exception as e:
+        _last_error = str(e)
+        logger.error("Snapshot failed: %s", e)
+
+
+async def start() -> dict:
+    """Take a snapshot in the background unless one is running."""
+    global _task, _last_error
+    if not is_running():
+        _last_error = None
+        _task = asyncio.create_task(_run())
+    return status()
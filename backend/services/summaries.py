@@ -0,0 +1,68 @@
+"""On-demand email summaries for the lazy summary mode.
+
+Emails ingested without a summary keep ``summary = NULL``.  The summary is
+generated the first time the email is read (or on explicit request),
+cached in the ``summary`` column, and optionally pre-generated for the
+newest emails by a background worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from backend.config import settings
+from backend.db.sqlite import get_emails_without_summary, update_email_summary
+from backend.services.classifier import summarize
+
+logger = logging.getLogger(__name__)
+
+# email_id -> in-flight generation, so concurrent readers share one LLM call
+_inflight: dict[int, asyncio.Task] = {}
+
+
+async def _generate(email: dict) -> dict:
+    result = await summarize(body=email["body"], sender=email.get("sender"))
+    if result.get("status") == "pending":
+        # Do not cache the fallback text — the next read retries
+        return {**email, "summary": result["summary"]}
+
+    await update_email_summary(email["id"], result["summary"], result.get("subject"))
+    return {
+        **email,
+        "summary": result["summary"],
+        "subject": email.get("subject") or result.get("subject") or None,
+    }
+
+
+async def ensure_summary(email: dict, force: bool = False) -> dict:
+    """Return *email* with a summary, generating and caching it if missing."""
+    if email.get("summary") is not None and not force:
+        return email
+
+    task = _inflight.get(email["id"])
+    if task is None:
+        task = asyncio.create_task(_generate(email))
+        _inflight[email["id"]] = task
+        task.add_done_callback(lambda _: _inflight.pop(email["id"], None))
+    return await task
+
+
+async def pregenerate_recent(limit: int) -> int:
+    """Summarize up to *limit* of the newest unsummarized emails."""
+    emails = await get_emails_without_summary(limit)
+    for email in emails:
+        await ensure_summary(email)
+    return len(emails)
+
+
+async def run_pregeneration_worker() -> None:
+    """Periodically pre-generate summaries until cancelled."""
+    while True:
+        try:
+            count = await pregenerate_recent(settings.SUMMARY_PREGENERATE_LIMIT)
+            if count:
+                logger.info("Pre-generated %d summaries", count)
+        except Exception as e:
+            logger.error("Summary pre-generation failed: %s", e)
+        await asyncio.sleep(settings.SUMMARY_PREGENERATE_INTERVAL)
@@ -0,0 +1,23 @@
+"""Cheap token estimates for prompt budgeting — no tokenizer dependency."""
+
+from __future__ import annotations
+
+import math
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of *text*.
+
+    ASCII averages about four characters per token; Hangul and other
+    non-ASCII characters are counted as roughly one token each, which errs
+    on the safe side for Korean mail.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def estimate_messages_tokens(messages: list[dict]) -> int:
+    """Estimate the prompt tokens of a chat message list (incl. per-message overhead)."""
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
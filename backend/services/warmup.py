@@ -0,0 +1,91 @@
+"""Start-up warm-up and readiness.
+
+Everything the first ``/api/chat`` would otherwise pay for is done once in
+the background right after start-up:
+
+- ``vector_store`` — open the active collection and run one query so the
+  HNSW index (or the flat matrix) is paged in (``VECTOR_STORE_PRELOAD``);
+- ``http`` — open the pooled TLS connection to the model API (``WARMUP_HTTP``);
+- ``db`` — first SQLite queries, which also load the category list;
+- ``prompts`` — read all prompt templates into the cache.
+
+``/health`` answers throughout (liveness); ``/ready`` only once every step
+has run, so a load balancer routes traffic to warm processes only.  A failed
+step is logged and reported but does not block readiness — the request that
+needs it will retry on demand.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from backend.config import settings
+from backend.db.chromadb import get_collection, page_in
+from backend.db.sqlite import get_emails
+from backend.services import category_cache, llm, prompts
+
+logger = logging.getLogger(__name__)
+
+_ready = False
+# step name -> {"seconds": float} or {"error": str}
+_steps: dict[str, dict] = {}
+
+
+def _touch_index() -> int:
+    """Open the active collection and page its index in; return its size."""
+    return page_in(get_collection())
+
+
+async def _warm_db() -> None:
+    await category_cache.snapshot()
+    await get_emails(limit=1)
+
+
+async def _warm_vector_store() -> None:
+    await asyncio.to_thread(_touch_index)
+
+
+async def _warm_prompts() -> None:
+    prompts.preload()
+
+
+def _plan() -> list[tuple[str, Callable[[], Awaitable[None]]]]:
+    steps = [("db", _warm_db), ("prompts", _warm_prompts)]
+    if settings.VECTOR_STORE_PRELOAD:
+        steps.append(("vector_store", _warm_vector_store))
+    if settings.WARMUP_HTTP:
+        steps.append(("http", llm.warm_up))
+    return steps
+
+
+async def _run_step(name: str, step) -> None:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(step(), timeout=settings.WARMUP_TIMEOUT)
+    except Exception as e:
+        logger.error("Warm-up step %s failed: %s", name, e)
+        _steps[name] = {"error": str(e) or type(e).__name__}
+    else:
+        _steps[name] = {"seconds": round(time.perf_counter() - start, 3)}
+
+
+async def run_warmup() -> None:
+    """Background task: run all enabled warm-up steps concurrently, then mark ready."""
+    global _ready
+    _ready = False
+    _steps.clear()
+    if settings.WARMUP_ENABLED:
+        await asyncio.gather(*(_run_step(name, step) for name, step in _plan()))
+        logger.info("Warm-up finished: %s", _steps)
+    _ready = True
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def status() -> dict:
+    return {"ready": is_ready(), "steps": dict(_steps)}
@@ -4,6 +4,7 @@ import sys
 sys.path.insert(0, "C:/dev/mail-assistant")
 
 import json
+import re
 import pytest
 import chromadb
 import httpx
@@ -11,6 +12,7 @@ from httpx import ASGITransport
 from unittest.mock import AsyncMock
 
 import backend.db.chromadb as chromadb_module
+from backend.services import centroids
 from backend.config import settings
 from backend.db.sqlite import init_db
 from backend.main import app
@@ -35,6 +37,9 @@ async def temp_db(tmp_path, monkeypatch):
 async def temp_chromadb(monkeypatch):
     """Create an ephemeral ChromaDB client for testing."""
     ephemeral_client = chromadb.EphemeralClient()
+    # Ephemeral clients share state in-process — start every test empty
+    for existing in ephemeral_client.list_collections():
+        ephemeral_client.delete_collection(existing.name)
     collection = ephemeral_client.get_or_create_collection(
         name="emails",
         metadata={"hnsw:space": "cosine"},
@@ -43,13 +48,21 @@ async def temp_chromadb(monkeypatch):
     # Reset module-level globals
     monkeypatch.setattr(chromadb_module, "_client", ephemeral_client)
     monkeypatch.setattr(chromadb_module, "_collection", collection)
+    monkeypatch.setattr(chromadb_module, "_active_name", chromadb_module.DEFAULT_COLLECTION)
+    monkeypatch.setattr(chromadb_module, "_build_name", None)
+    monkeypatch.setattr(chromadb_module, "_build_collection", None)
 
     # Patch get_client / get_collection to return our ephemeral instances
     monkeypatch.setattr(chromadb_module, "get_client", lambda: ephemeral_client)
     monkeypatch.setattr(chromadb_module, "get_collection", lambda: collection)
 
+    # Local classifier centroids are derived from the collection
+    centroids.reset()
+
     yield collection
 
+    centroids.reset()
+
 
 # ── Mock LLM ─────────────────────────────────────────────────────────
 
@@ -64,6 +77,13 @@ def _make_classification_response() -> str:
     })
 
 
+def _make_batch_classification_response(user_content: str) -> str:
+    """Mock batched classification JSON — one result per [메일 id=...] section."""
+    item = json.loads(_make_classification_response())
+    ids = re.findall(r"\[메일 id=(\w+)\]", user_content)
+    return json.dumps({"results": [{"id": i, **item} for i in ids]})
+
+
 def _make_rag_response() -> str:
     """Default mock RAG answer."""
     return "메일 #1에 따르면 테스트 관련 내용입니다."
@@ -75,10 +95,12 @@ async def mock_llm(monkeypatch):
 
     call_count = {"chat": 0}
 
-    async def fake_chat_completion(messages, model=None, response_format=None):
+    async def fake_chat_completion(messages, model=None, response_format=None, max_tokens=None):
         call_count["chat"] += 1
         # If response_format requests JSON → classification
         if response_format and response_format.get("type") == "json_object":
+            if "[메일 id=" in messages[-1]["content"]:
+                return _make_batch_classification_response(messages[-1]["content"])
             return _make_classification_response()
         # Otherwise → RAG answer
         return _make_rag_response()
@@ -104,6 +126,12 @@ async def mock_llm(monkeypatch):
     monkeypatch.setattr(
         "backend.services.rag.chat_completion", fake_chat_completion
     )
+    monkeypatch.setattr(
+        "backend.services.history.chat_completion", fake_chat_completion
+    )
+    monkeypatch.setattr(
+        "backend.services.reindex.create_embedding", fake_create_embedding
+    )
 
     yield call_count
 
@@ -0,0 +1,115 @@
+"""Tests for backend.services.admission (concurrency limits and load shedding)."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import asyncio
+
+import pytest
+
+from backend.config import settings
+from backend.services import admission
+
+
+@pytest.fixture(autouse=True)
+def fresh_gates():
+    admission.reset()
+    yield
+    admission.reset()
+
+
+class TestGate:
+    """Slots are handed to waiters in order; overflow and deadlines are shed."""
+
+    async def test_queue_then_shed(self):
+        gate = admission.Gate("test", limit=1, queue_size=1, timeout=5.0)
+        await gate.acquire()
+        waiting = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert (gate.active, gate.queued) == (1, 1)
+
+        with pytest.raises(admission.Overloaded) as exc_info:
+            await gate.acquire()
+        assert exc_info.value.reason == "queue_full"
+
+        gate.release(0.5)
+        await waiting
+        assert (gate.active, gate.queued) == (1, 0)
+        gate.release(0.5)
+        assert gate.active == 0
+        assert gate.status()["shed"] == {"queue_full": 1, "deadline": 0}
+
+    async def test_deadline(self):
+        gate = admission.Gate("test", limit=1, queue_size=4, timeout=0.01)
+        gate.service_time = 2.0
+        await gate.acquire()
+
+        with pytest.raises(admission.Overloaded) as exc_info:
+            await gate.acquire()
+
+        assert exc_info.value.reason == "deadline"
+        assert exc_info.value.retry_after == 2
+        assert gate.queued == 0
+
+    async def test_cancelled_waiter_skipped(self):
+        gate = admission.Gate("test", limit=1, queue_size=4, timeout=5.0)
+        await gate.acquire()
+        waiting = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        gate.release()
+        assert (gate.active, gate.queued) == (0, 0)
+
+
+class TestAdmissionMiddleware:
+    """POST /api/chat beyond the limit and queue gets 503 with Retry-After."""
+
+    async def test_chat_shed(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "ADMISSION_CHAT_CONCURRENCY", 1)
+        monkeypatch.setattr(settings, "ADMISSION_CHAT_QUEUE", 1)
+        release = asyncio.Event()
+
+        async def slow_answer(**kwargs):
+            await release.wait()
+            return {"answer": "답변", "source_ids": []}
+
+        monkeypatch.setattr("backend.routers.chat.answer_question", slow_answer)
+        requests = [
+            asyncio.ensure_future(client.post("/chat", json={"question": "질문"})) for _ in range(3)
+        ]
+        while not any(r.done() for r in requests):
+            await asyncio.sleep(0.01)
+        shed = next(r for r in requests if r.done()).result()
+        assert admission.status()["chat"]["queued"] == 1
+        release.set()
+        responses = await asyncio.gather(*requests)
+
+        assert sorted(r.status_code for r in responses) == [200, 200, 503]
+        assert shed.status_code == 503
+        assert int(shed.headers["retry-after"]) >= 1
+        health = (await client.get("http://test/health")).json()
+        assert health["admission"]["chat"]["shed"]["queue_full"] == 1
+        assert health["admission"]["chat"]["active"] == 0
+
+    async def test_only_model_calls_gated(self, client, monkeypatch):
+        from backend.db.sqlite import insert_email
+
+        monkeypatch.setattr(settings, "ADMISSION_EMAILS_CONCURRENCY", 0)
+        monkeypatch.setattr(settings, "ADMISSION_EMAILS_QUEUE", 0)
+        summarized = await insert_email({"body": "본문", "summary": "요약"})
+        unsummarized = await insert_email({"body": "본문", "summary": None})
+
+        assert (await client.get("/categories")).status_code == 200
+        assert (await client.get("/emails")).status_code == 200
+        assert (await client.get("/emails/stats/classification")).status_code == 200
+        assert (await client.get(f"/emails/{summarized}")).status_code == 200
+
+        shed = await client.get(f"/emails/{unsummarized}")
+        assert shed.status_code == 503
+        assert int(shed.headers["retry-after"]) >= 1
+        assert (await client.post("/emails", json={"body": "새 메일"})).status_code == 503
+        assert (await client.post("/emails/bulk", json=[{"body": "새 메일"}])).status_code == 503
+        assert (await client.post(f"/emails/{summarized}/summary")).status_code == 503
@@ -0,0 +1,104 @@
+"""Tests for compressed email body storage (backend.db.bodies and email_bodies)."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import aiosqlite
+import pytest
+
+from backend.benchmarks.body_storage import make_corpus
+from backend.config import settings
+from backend.db import bodies
+from backend.db.sqlite import (
+    add_body_dictionary, get_body_storage_stats, get_email_bodies, get_email_by_id,
+    get_emails, init_db, insert_email, recompress_bodies,
+)
+
+_LONG_BODY = "안녕하세요. 분기 실적 보고 일정 공유드립니다.\n" * 200
+
+
+class TestCodec:
+    """encode/decode round trips for every codec."""
+
+    @pytest.mark.parametrize("codec", ["raw", "zlib"])
+    def test_round_trip(self, monkeypatch, codec):
+        monkeypatch.setattr(settings, "BODY_COMPRESSION", codec)
+        name, blob = bodies.encode(_LONG_BODY)
+
+        assert name == codec
+        assert bodies.decode(name, blob) == _LONG_BODY
+
+    def test_short_body_stored_raw(self, monkeypatch):
+        monkeypatch.setattr(settings, "BODY_COMPRESSION", "zlib")
+        assert bodies.encode("짧은 메일") == ("raw", "짧은 메일".encode("utf-8"))
+
+    def test_zstd_with_dictionary(self, monkeypatch):
+        pytest.importorskip("zstandard")
+        monkeypatch.setattr(settings, "BODY_COMPRESSION", "zstd")
+        corpus = make_corpus(500)
+        dictionary = bodies.train_dictionary(corpus, 16384)
+
+        name, blob = bodies.encode(corpus[0], (7, dictionary))
+        plain = bodies.encode(corpus[0])[1]
+
+        assert name == "zstd:7"
+        assert len(blob) < len(plain)
+        assert bodies.decode(name, blob, {7: dictionary}) == corpus[0]
+
+
+class TestBodyTable:
+    """Bodies live in email_bodies and are only decoded on request."""
+
+    async def test_list_without_body(self, temp_db, monkeypatch):
+        monkeypatch.setattr(settings, "BODY_COMPRESSION", "zlib")
+        email_id = await insert_email({"sender": "a", "subject": "s", "body": _LONG_BODY})
+
+        listed = (await get_emails())[0]
+        assert "body" not in listed
+        assert listed["preview"] == _LONG_BODY[:200]
+
+        assert (await get_email_by_id(email_id, with_body=True))["body"] == _LONG_BODY
+        assert await get_email_bodies([email_id]) == {email_id: _LONG_BODY}
+
+        stats = await get_body_storage_stats()
+        assert stats["codecs"]["zlib"]["count"] == 1
+        assert stats["stored_bytes"] < stats["bytes"]
+
+    async def test_migrates_inline_bodies(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "old.db")
+        monkeypatch.setattr(settings, "DB_PATH", db_path)
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute("""
+                CREATE TABLE emails (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT, subject TEXT,
+                    body TEXT NOT NULL, summary TEXT, category TEXT DEFAULT '미분류',
+                    date_extracted TEXT, status TEXT DEFAULT 'completed',
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await db.execute("INSERT INTO emails (sender, body) VALUES ('a', ?)", (_LONG_BODY,))
+            await db.commit()
+
+        await init_db()
+
+        email = await get_email_by_id(1, with_body=True)
+        assert email["body"] == _LONG_BODY
+        assert email["preview"] == _LONG_BODY[:200]
+        async with aiosqlite.connect(db_path) as db:
+            cursor = await db.execute("PRAGMA table_info(emails)")
+            assert "body" not in {row[1] for row in await cursor.fetchall()}
+
+    async def test_recompress_with_dictionary(self, temp_db, monkeypatch):
+        pytest.importorskip("zstandard")
+        monkeypatch.setattr(settings, "BODY_COMPRESSION", "zlib")
+        corpus = make_corpus(300)
+        for body in corpus:
+            await insert_email({"sender": "a", "subject": "s", "body": body})
+
+        monkeypatch.setattr(settings, "BODY_COMPRESSION", "zstd")
+        dict_id = await add_body_dictionary(bodies.train_dictionary(corpus, 16384))
+        assert await recompress_bodies() == len(corpus)
+
+        stats = await get_body_storage_stats()
+        assert set(stats["codecs"]) <= {f"zstd:{dict_id}", "raw"}
+        assert (await get_email_bodies([1]))[1] == corpus[0]
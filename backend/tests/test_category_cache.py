@@ -0,0 +1,84 @@
+"""Tests for backend.services.category_cache."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import pytest
+
+import backend.services.category_cache as category_cache_module
+from backend.config import settings
+from backend.db.sqlite import add_category, get_categories
+from backend.services import category_cache
+from backend.services.classifier import _PROMPT_PATH, _render_prompt
+
+
+@pytest.fixture
+def count_loads(monkeypatch):
+    """Count the SQLite reads behind the cache."""
+    calls = []
+
+    async def counting():
+        calls.append(1)
+        return await get_categories()
+
+    monkeypatch.setattr(category_cache_module, "get_categories", counting)
+    return calls
+
+
+class TestSnapshot:
+    """The snapshot is loaded once and replaced after category writes."""
+
+    async def test_loaded_once(self, temp_db, count_loads):
+        first = await category_cache.snapshot()
+        second = await category_cache.snapshot()
+
+        assert first is second
+        assert len(count_loads) == 1
+        assert "미분류" in first["names"]
+
+    async def test_lookup_by_id_and_name(self, temp_db):
+        category_id = await add_category("여행", "출장 및 여행")
+        category_cache.invalidate()
+
+        assert (await category_cache.get_by_id(category_id))["name"] == "여행"
+        assert (await category_cache.get_by_name("여행"))["id"] == category_id
+        assert await category_cache.get_by_id(999999) is None
+
+    async def test_api_writes_invalidate(self, client):
+        await category_cache.snapshot()
+
+        created = (await client.post("/categories", json={"name": "신규"})).json()
+        assert "신규" in await category_cache.get_names()
+
+        await client.put(f"/categories/{created['id']}", json={"name": "변경"})
+        names = await category_cache.get_names()
+        assert "변경" in names and "신규" not in names
+
+        await client.delete(f"/categories/{created['id']}")
+        assert await category_cache.get_by_id(created["id"]) is None
+
+    async def test_api_worker_follows_table_version(self, temp_db, monkeypatch, count_loads):
+        monkeypatch.setattr(settings, "SERVER_ROLE", "api")
+        await category_cache.snapshot()
+        await category_cache.snapshot()
+        assert len(count_loads) == 1
+
+        # Written by the writer process: no invalidate() here
+        await add_category("외부")
+        assert "외부" in await category_cache.get_names()
+        assert len(count_loads) == 2
+
+
+class TestRenderedPrompt:
+    """The classification prompt is rendered once per category snapshot."""
+
+    async def test_prompt_reused(self, temp_db):
+        names = await category_cache.get_names()
+        _render_prompt.cache_clear()
+
+        first = _render_prompt(_PROMPT_PATH, names)
+        second = _render_prompt(_PROMPT_PATH, await category_cache.get_names())
+
+        assert first is second
+        assert _render_prompt.cache_info().hits == 1
+        assert ", ".join(names) in first
@@ -0,0 +1,115 @@
+"""Unit tests for backend.services.centroids module."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import numpy as np
+import pytest
+
+from backend.config import settings
+from backend.db.sqlite import insert_email
+from backend.services import centroids
+
+
+@pytest.fixture
+def loaded_centroids(monkeypatch):
+    """Empty, already-loaded centroid state with a low support threshold."""
+    centroids.reset()
+    monkeypatch.setattr(centroids, "_loaded", True)
+    monkeypatch.setattr(settings, "LOCAL_CLASSIFIER_MIN_SUPPORT", 2)
+    yield
+    centroids.reset()
+
+
+class TestEmailVector:
+    """Tests for email_vector function."""
+
+    async def test_email_vector_mean_of_normalized_chunks(self):
+        """Chunks should be normalized before averaging."""
+        vector = centroids.email_vector([[2.0, 0.0], [0.0, 10.0]])
+        assert np.allclose(vector, [0.5, 0.5])
+
+    async def test_email_vector_empty(self):
+        """No chunks should give no vector."""
+        assert centroids.email_vector([]) is None
+
+
+class TestPredict:
+    """Tests for predict function."""
+
+    async def test_predict_without_support(self, loaded_centroids):
+        """Categories below the support threshold should not be predicted."""
+        centroids.add_example("공지사항", np.array([1.0, 0.0]))
+        assert centroids.predict(np.array([1.0, 0.0])) is None
+
+    async def test_predict_confident(self, loaded_centroids):
+        """A vector close to one centroid should be a confident match."""
+        for _ in range(2):
+            centroids.add_example("공지사항", np.array([1.0, 0.0]))
+            centroids.add_example("HR/인사", np.array([0.0, 1.0]))
+
+        prediction = centroids.predict(np.array([0.99, 0.05]))
+        assert prediction["category"] == "공지사항"
+        assert prediction["confident"] is True
+
+    async def test_predict_ambiguous(self, loaded_centroids):
+        """A vector between two centroids should not be confident."""
+        for _ in range(2):
+            centroids.add_example("공지사항", np.array([1.0, 0.0]))
+            centroids.add_example("HR/인사", np.array([0.0, 1.0]))
+
+        prediction = centroids.predict(np.array([0.7, 0.7]))
+        assert prediction["confident"] is False
+
+    async def test_move_example(self, loaded_centroids):
+        """Corrections should move support between categories."""
+        vector = np.array([1.0, 0.0])
+        for _ in range(2):
+            centroids.add_example("공지사항", vector)
+        centroids.move_example("공지사항", "HR/인사", vector)
+
+        assert centroids._counts == {"공지사항": 1, "HR/인사": 1}
+
+    async def test_unclassified_is_ignored(self, loaded_centroids):
+        """'미분류' should never get a centroid."""
+        centroids.add_example("미분류", np.array([1.0, 0.0]))
+        assert centroids._counts == {}
+
+
+class TestEnsureLoaded:
+    """Tests for ensure_loaded function."""
+
+    async def test_ensure_loaded_uses_sqlite_labels(self, temp_db, temp_chromadb):
+        """Centroids should use SQLite categories, not stale Chroma metadata."""
+        email_id = await insert_email({"body": "공지", "category": "공지사항"})
+        pending_id = await insert_email({"body": "보류", "status": "pending"})
+        temp_chromadb.upsert(
+            ids=[f"email_{email_id}_chunk_0", f"email_{email_id}_chunk_1", f"email_{pending_id}_chunk_0"],
+            embeddings=[[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]],
+            documents=["a", "b", "c"],
+            metadatas=[
+                {"email_id": email_id, "chunk_index": 0, "category": "프로젝트"},
+                {"email_id": email_id, "chunk_index": 1, "category": "프로젝트"},
+                {"email_id": pending_id, "chunk_index": 0, "category": "미분류"},
+            ],
+        )
+
+        await centroids.ensure_loaded()
+
+        assert centroids._counts == {"공지사항": 1}
+        assert np.allclose(centroids._sums["공지사항"], [1.0, 0.0])
+
+    async def test_ensure_loaded_pages_by_email(self, temp_db, temp_chromadb, monkeypatch):
+        """Every chunk of an email should count once, whichever page it is read in."""
+        monkeypatch.setattr(centroids, "_LOAD_PAGE_EMAILS", 1)
+        ids = [await insert_email({"body": f"공지 {i}", "category": "공지사항"}) for i in range(3)]
+        temp_chromadb.upsert(
+            ids=[f"email_{email_id}_chunk_{c}" for email_id in ids for c in range(2)],
+            embeddings=[[1.0, 0.0], [0.0, 1.0]] * 3,
+            metadatas=[{"email_id": email_id, "chunk_index": c} for email_id in ids for c in range(2)],
+        )
+
+        await centroids.ensure_loaded()
+
+        assert centroids._counts == {"공지사항": 3}
+        assert np.allclose(centroids._sums["공지사항"], [1.5, 1.5])
@@ -0,0 +1,58 @@
+"""Unit tests for backend.db.chromadb module."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import chromadb
+
+from backend.config import settings
+from backend.db import chromadb as chromadb_module
+
+
+class TestHnswParameters:
+    """Tests for HNSW parameters taken from settings."""
+
+    async def test_new_collection_uses_settings(self, monkeypatch):
+        """New collections should be built with the configured M and ef values."""
+        monkeypatch.setattr(settings, "HNSW_M", 24)
+        monkeypatch.setattr(settings, "HNSW_CONSTRUCTION_EF", 150)
+        monkeypatch.setattr(settings, "HNSW_SEARCH_EF", 60)
+        client = chromadb.EphemeralClient()
+        if "hnsw_test" in [c.name for c in client.list_collections()]:
+            client.delete_collection("hnsw_test")
+
+        collection = client.create_collection("hnsw_test", metadata=chromadb_module.hnsw_metadata())
+        hnsw = collection.configuration["hnsw"]
+        assert (hnsw["max_neighbors"], hnsw["ef_construction"], hnsw["ef_search"]) == (24, 150, 60)
+
+    async def test_search_ef_applied_to_existing_collection(self, monkeypatch):
+        """Opening an existing collection should update its search_ef."""
+        client = chromadb.EphemeralClient()
+        if "hnsw_test" in [c.name for c in client.list_collections()]:
+            client.delete_collection("hnsw_test")
+        collection = client.create_collection("hnsw_test", metadata={"hnsw:search_ef": 100})
+
+        monkeypatch.setattr(settings, "HNSW_SEARCH_EF", 40)
+        chromadb_module._apply_search_ef(collection)
+        assert client.get_collection("hnsw_test").configuration["hnsw"]["ef_search"] == 40
+
+
+class TestReloadCollection:
+    """Tests for reload_collection function."""
+
+    async def test_swaps_in_fresh_collection(self, tmp_path, monkeypatch):
+        """Reloading should see new writes while the old collection keeps answering."""
+        monkeypatch.setattr(settings, "CHROMA_PATH", str(tmp_path / "chroma"))
+        monkeypatch.setattr(chromadb_module, "_client", None)
+        monkeypatch.setattr(chromadb_module, "_collection", None)
+        monkeypatch.setattr(chromadb_module, "_build_collection", None)
+        old = chromadb_module.get_collection()
+        old.upsert(ids=["a"], embeddings=[[1.0, 0.0]])
+
+        chromadb_module.reload_collection(chromadb_module.DEFAULT_COLLECTION)
+        new = chromadb_module.get_collection()
+
+        assert new is not old
+        assert chromadb_module.is_loaded()
+        assert old.query(query_embeddings=[[1.0, 0.0]], n_results=1)["ids"] == [["a"]]
+        assert new.count() == 1
@@ -6,7 +6,15 @@ sys.path.insert(0, "C:/dev/mail-assistant")
 import pytest
 from unittest.mock import AsyncMock
 
-from backend.services.classifier import _parse_llm_response, classify_and_summarize
+import json
+
+from backend.services.classifier import (
+    _pack_batches,
+    _parse_llm_response,
+    classify,
+    classify_and_summarize,
+    classify_batch,
+)
 from backend.services.llm import LLMError
 
 
@@ -106,3 +114,113 @@ class TestClassifyAndSummarize:
         # Verify the body was truncated
         assert len(called_with_body) < len(long_body) + 100  # Account for sender prefix
         assert result["category"] == "업무"
+
+
+class TestClassify:
+    """Tests for classify function (lazy summary mode)."""
+
+    async def test_classify_caps_output_and_skips_summary(self, monkeypatch):
+        """Classification-only calls should cap output tokens and leave summary unset."""
+        captured = {}
+
+        async def mock_chat_completion(messages, response_format=None, max_tokens=None):
+            captured["max_tokens"] = max_tokens
+            captured["system"] = messages[0]["content"]
+            return '{"category": "일정", "date_extracted": "2026-03-02"}'
+
+        monkeypatch.setattr("backend.services.classifier.chat_completion", mock_chat_completion)
+        monkeypatch.setattr("backend.config.settings.CLASSIFY_MAX_TOKENS", 64)
+
+        result = await classify(body="3월 2일 워크숍", sender=None, categories=["일정", "공지사항"])
+
+        assert captured["max_tokens"] == 64
+        assert "일정, 공지사항" in captured["system"]
+        assert result["category"] == "일정"
+        assert result["date_extracted"] == "2026-03-02"
+        assert result["summary"] is None
+
+    async def test_classify_llm_failure(self, monkeypatch):
+        """LLM failure should leave the email pending without a summary."""
+        async def mock_chat_completion(messages, response_format=None, max_tokens=None):
+            raise LLMError("down")
+
+        monkeypatch.setattr("backend.services.classifier.chat_completion", mock_chat_completion)
+
+        result = await classify(body="본문", sender=None, categories=["일정"])
+
+        assert result["status"] == "pending"
+        assert result["summary"] is None
+
+
+class TestClassifyBatch:
+    """Tests for batched classification."""
+
+    async def test_pack_batches_respects_limits(self, monkeypatch):
+        """Batches should respect the item cap; long emails and leftovers go single."""
+        monkeypatch.setattr("backend.config.settings.BATCH_CLASSIFY_MAX_ITEMS", 2)
+        items = [{"body": "짧은 공지", "batch_id": str(i)} for i in range(5)]
+        items.append({"body": "x" * 5000, "batch_id": "long"})
+
+        batches, singles = _pack_batches(items)
+
+        assert [[i["batch_id"] for i in b] for b in batches] == [["0", "1"], ["2", "3"]]
+        assert {i["batch_id"] for i in singles} == {"4", "long"}
+
+    async def test_classify_batch_one_request(self, monkeypatch):
+        """Several short emails should be classified in one request, in order."""
+        calls = []
+
+        async def mock_chat_completion(messages, response_format=None, max_tokens=None):
+            calls.append(messages)
+            return json.dumps({"results": [
+                {"id": "1", "category": "HR/인사", "subject": "b", "summary": "요약 b", "date_extracted": None},
+                {"id": "0", "category": "공지사항", "subject": "a", "summary": "요약 a", "date_extracted": "2026-01-02"},
+            ]})
+
+        monkeypatch.setattr("backend.services.classifier.chat_completion", mock_chat_completion)
+
+        results = await classify_batch(
+            [{"body": "공지", "sender": "총무"}, {"body": "인사", "sender": "인사팀"}],
+            categories=["공지사항", "HR/인사"],
+        )
+
+        assert len(calls) == 1
+        assert "[메일 id=0]" in calls[0][1]["content"]
+        assert [r["category"] for r in results] == ["공지사항", "HR/인사"]
+        assert results[0]["date_extracted"] == "2026-01-02"
+        assert all(r["batched"] for r in results)
+
+    async def test_classify_batch_invalid_items_fall_back(self, monkeypatch):
+        """Missing or invalid items should be retried with single calls."""
+        single_bodies = []
+
+        async def mock_chat_completion(messages, response_format=None, max_tokens=None):
+            if "[메일 id=" in messages[1]["content"]:
+                return json.dumps({"results": [
+                    {"id": "0", "category": "공지사항", "summary": "요약"},
+                    {"id": "1", "category": "없는카테고리", "summary": "요약"},
+                ]})
+            single_bodies.append(messages[1]["content"])
+            return '{"category": "HR/인사", "subject": "", "summary": "단건", "date_extracted": null}'
+
+        monkeypatch.setattr("backend.services.classifier.chat_completion", mock_chat_completion)
+
+        results = await classify_batch(
+            [{"body": "a"}, {"body": "b"}, {"body": "c"}],
+            categories=["공지사항", "HR/인사"],
+        )
+
+        assert [r["category"] for r in results] == ["공지사항", "HR/인사", "HR/인사"]
+        assert [r["batched"] for r in results] == [True, False, False]
+        assert len(single_bodies) == 2
+
+    async def test_classify_batch_llm_failure(self, monkeypatch):
+        """A failed batch request should fall back to single calls for all items."""
+        async def mock_chat_completion(messages, response_format=None, max_tokens=None):
+            raise LLMError("down")
+
+        monkeypatch.setattr("backend.services.classifier.chat_completion", mock_chat_completion)
+
+        results = await classify_batch([{"body": "a"}, {"body": "b"}], categories=["공지사항"])
+
+        assert all(r["status"] == "pending" for r in results)
@@ -0,0 +1,118 @@
+"""Tests for backend.services.cluster (multi-process roles)."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import json
+
+import httpx
+import pytest
+
+from backend.config import settings
+from backend.db.sqlite import delete_outbox_entries, set_index_state
+from backend.services import cluster
+
+
+@pytest.fixture
+def api_role(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_ROLE", "api")
+
+
+class TestForwardsToWriter:
+    """Tests for the request routing of API workers."""
+
+    def test_single_process_never_forwards(self):
+        assert settings.SERVER_ROLE == "all"
+        assert not cluster.forwards_to_writer("POST", "/api/emails")
+
+    def test_api_worker_routing(self, api_role):
+        assert cluster.forwards_to_writer("POST", "/api/emails")
+        assert cluster.forwards_to_writer("DELETE", "/api/categories/3")
+        assert cluster.forwards_to_writer("GET", "/api/admin/metrics")
+        assert not cluster.forwards_to_writer("GET", "/api/emails")
+        assert not cluster.forwards_to_writer("POST", "/api/chat")
+        assert not cluster.forwards_to_writer("POST", "/api/chat/sessions")
+
+
+class TestForwardToWriter:
+    """Writes reaching an API worker are replayed against the writer."""
+
+    async def test_write_is_forwarded(self, client, api_role, monkeypatch):
+        seen = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen["method"] = request.method
+            seen["path"] = request.url.path
+            seen["body"] = request.content
+            return httpx.Response(201, json={"id": 99, "name": "긴급", "description": None})
+
+        monkeypatch.setattr(
+            cluster, "_writer_client",
+            httpx.AsyncClient(base_url="http://writer", transport=httpx.MockTransport(handler)),
+        )
+        resp = await client.post("/categories", json={"name": "긴급"})
+
+        assert resp.status_code == 201
+        assert resp.json()["id"] == 99
+        assert seen["method"] == "POST"
+        assert seen["path"] == "/api/categories"
+        assert json.loads(seen["body"]) == {"name": "긴급"}
+
+        # Reads are still served locally
+        assert (await client.get("/categories")).status_code == 200
+
+    async def test_writer_down_returns_503(self, client, api_role, monkeypatch):
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("connection refused")
+
+        monkeypatch.setattr(
+            cluster, "_writer_client",
+            httpx.AsyncClient(base_url="http://writer", transport=httpx.MockTransport(handler)),
+        )
+        resp = await client.delete("/emails/1")
+
+        assert resp.status_code == 503
+        assert resp.headers["retry-after"] == "1"
+
+
+class TestSyncVectorStore:
+    """API workers reopen the vector store when the writer changes it."""
+
+    async def test_reopens_on_version_change(self, temp_db, monkeypatch):
+        reopened = []
+        monkeypatch.setattr(cluster, "_seen_version", None)
+        monkeypatch.setattr(cluster, "is_loaded", lambda: False)
+        monkeypatch.setattr(cluster, "reset_client", lambda: reopened.append("reset"))
+        monkeypatch.setattr(
+            cluster, "set_active_collection", lambda name, load=True: reopened.append(name)
+        )
+        monkeypatch.setattr(settings, "VECTOR_RELOAD_MIN_INTERVAL", 0)
+
+        assert await cluster.sync_vector_store()
+        assert not await cluster.sync_vector_store()
+
+        # The indexer bumps vector_version when it applies a batch
+        await delete_outbox_entries([])
+        assert await cluster.sync_vector_store()
+
+        await set_index_state({"active_collection": "emails_v1"})
+        assert await cluster.sync_vector_store()
+        assert reopened == ["reset", "reset", "reset", "emails_v1"]
+
+    async def test_warm_store_reloaded_in_background_and_throttled(self, temp_db, monkeypatch):
+        reloaded = []
+        monkeypatch.setattr(cluster, "_seen_version", None)
+        monkeypatch.setattr(cluster, "is_loaded", lambda: True)
+        monkeypatch.setattr(cluster, "reload_collection", reloaded.append)
+        monkeypatch.setattr(settings, "VECTOR_RELOAD_MIN_INTERVAL", 3600)
+
+        assert await cluster.sync_vector_store()
+
+        # New vectors wait for the minimum interval
+        await delete_outbox_entries([])
+        assert not await cluster.sync_vector_store()
+
+        # A collection switch does not
+        await set_index_state({"active_collection": "emails_v1"})
+        assert await cluster.sync_vector_store()
+        assert reloaded == ["emails", "emails_v1"]
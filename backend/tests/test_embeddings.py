@@ -8,8 +8,11 @@ from unittest.mock import AsyncMock, MagicMock
 
 from backend.services.embeddings import (
     _chunk_text,
-    store_email_embedding,
+    _select_mmr,
+    delete_emails_embeddings,
     search_similar,
+    update_category_metadata,
+    upsert_chunks,
 )
 
 
@@ -50,89 +53,45 @@ class TestChunkText:
         assert chunks[0] == text
 
 
-class TestStoreEmailEmbedding:
-    """Tests for store_email_embedding function."""
+class TestUpsertChunks:
+    """Tests for upsert_chunks function."""
 
-    async def test_store_email_embedding(self, monkeypatch):
-        """Should chunk text, create embeddings, and upsert to collection."""
-        # Mock create_embedding
-        async def mock_create_embedding(texts):
-            return [[0.1, 0.2] for _ in texts]
-        
-        # Mock collection
+    async def test_upsert_chunks_one_call(self):
+        """Chunks of several emails should be upserted with one collection call."""
         mock_collection = MagicMock()
-        mock_collection.upsert = MagicMock()
-        
-        def mock_get_collection():
-            return mock_collection
-        
-        monkeypatch.setattr("backend.services.embeddings.create_embedding", mock_create_embedding)
-        monkeypatch.setattr("backend.services.embeddings.get_collection", mock_get_collection)
-        
-        # Call function
-        await store_email_embedding(
-            email_id=123,
-            body="This is a test email body that will be chunked.",
-            metadata={"category": "업무", "sender": "test@example.com"}
-        )
-        
-        # Verify upsert was called
-        assert mock_collection.upsert.called
-        call_args = mock_collection.upsert.call_args
-        
-        # Check that ids include email_id
-        assert "email_123_chunk_0" in call_args.kwargs["ids"]
-        # Check embeddings were passed
-        assert len(call_args.kwargs["embeddings"]) > 0
-        # Check metadata includes email_id
-        assert call_args.kwargs["metadatas"][0]["email_id"] == 123
-
-    async def test_store_email_embedding_empty_body(self, monkeypatch):
-        """Empty body should not call upsert."""
+
+        upsert_chunks([
+            {"email_id": 1, "chunks": ["a", "b"], "vectors": [[0.1], [0.2]], "metadata": {"category": "업무"}},
+            {"email_id": 2, "chunks": ["c"], "vectors": [[0.3]], "metadata": {"category": "개인"}},
+        ], mock_collection)
+
+        assert mock_collection.upsert.call_count == 1
+        kwargs = mock_collection.upsert.call_args.kwargs
+        assert kwargs["ids"] == ["email_1_chunk_0", "email_1_chunk_1", "email_2_chunk_0"]
+        assert kwargs["embeddings"] == [[0.1], [0.2], [0.3]]
+        assert kwargs["metadatas"][1] == {"category": "업무", "email_id": 1, "chunk_index": 1}
+
+    async def test_upsert_chunks_empty(self):
+        """Entries without chunks should not call upsert."""
         mock_collection = MagicMock()
-        mock_collection.upsert = MagicMock()
-        
-        def mock_get_collection():
-            return mock_collection
-        
-        monkeypatch.setattr("backend.services.embeddings.get_collection", mock_get_collection)
-        
-        await store_email_embedding(
-            email_id=456,
-            body="",
-            metadata={}
-        )
-        
-        # Verify upsert was NOT called
+
+        upsert_chunks([{"email_id": 1, "chunks": [], "vectors": [], "metadata": {}}], mock_collection)
+
         assert not mock_collection.upsert.called
 
-    async def test_store_email_embedding_multiple_chunks(self, monkeypatch):
-        """Large body should create multiple chunks and embeddings."""
-        long_body = "x" * 2500  # Creates multiple chunks
-        
-        async def mock_create_embedding(texts):
-            return [[0.1, 0.2] for _ in texts]
-        
+
+class TestDeleteEmailsEmbeddings:
+    """Tests for delete_emails_embeddings function."""
+
+    async def test_delete_emails_embeddings(self, monkeypatch):
+        """All chunks of the given emails should be deleted in one call."""
         mock_collection = MagicMock()
-        mock_collection.upsert = MagicMock()
-        
-        def mock_get_collection():
-            return mock_collection
-        
-        monkeypatch.setattr("backend.services.embeddings.create_embedding", mock_create_embedding)
-        monkeypatch.setattr("backend.services.embeddings.get_collection", mock_get_collection)
-        
-        await store_email_embedding(
-            email_id=789,
-            body=long_body,
-            metadata={"category": "개인"}
-        )
-        
-        # Verify multiple chunks were created
-        call_args = mock_collection.upsert.call_args
-        assert len(call_args.kwargs["ids"]) > 1
-        assert "email_789_chunk_0" in call_args.kwargs["ids"]
-        assert "email_789_chunk_1" in call_args.kwargs["ids"]
+        monkeypatch.setattr("backend.services.embeddings.get_collection", lambda: mock_collection)
+
+        delete_emails_embeddings([3, 4])
+        delete_emails_embeddings([])
+
+        mock_collection.delete.assert_called_once_with(where={"email_id": {"$in": [3, 4]}})
 
 
 class TestSearchSimilar:
@@ -141,7 +100,7 @@ class TestSearchSimilar:
     async def test_search_similar(self, monkeypatch):
         """Should create query embedding and return formatted results."""
         # Mock create_embedding
-        async def mock_create_embedding(texts):
+        async def mock_create_embedding(texts, model=None):
             return [[0.5, 0.6]]
         
         # Mock collection query
@@ -176,7 +135,7 @@ class TestSearchSimilar:
 
     async def test_search_similar_with_category_filter(self, monkeypatch):
         """Category filter should be passed to collection.query."""
-        async def mock_create_embedding(texts):
+        async def mock_create_embedding(texts, model=None):
             return [[0.5, 0.6]]
         
         mock_collection = MagicMock()
@@ -200,9 +159,30 @@ class TestSearchSimilar:
         assert "where" in call_args.kwargs
         assert call_args.kwargs["where"] == {"category": "업무"}
 
+    async def test_search_similar_with_category_and_sender(self, monkeypatch):
+        """Category and sender filters should be combined with $and."""
+        async def mock_create_embedding(texts, model=None):
+            return [[0.5, 0.6]]
+
+        mock_collection = MagicMock()
+        mock_collection.query.return_value = {
+            "documents": [[]],
+            "distances": [[]],
+            "metadatas": [[]]
+        }
+
+        monkeypatch.setattr("backend.services.embeddings.create_embedding", mock_create_embedding)
+        monkeypatch.setattr("backend.services.embeddings.get_collection", lambda: mock_collection)
+
+        await search_similar("test", category="업무", sender="김철수")
+
+        assert mock_collection.query.call_args.kwargs["where"] == {
+            "$and": [{"category": "업무"}, {"sender": "김철수"}]
+        }
+
     async def test_search_similar_no_results(self, monkeypatch):
         """Empty results should return empty list."""
-        async def mock_create_embedding(texts):
+        async def mock_create_embedding(texts, model=None):
             return [[0.5, 0.6]]
         
         mock_collection = MagicMock()
@@ -221,3 +201,58 @@ class TestSearchSimilar:
         results = await search_similar("no match query")
         
         assert results == []
+
+
+class TestSelectMmr:
+    """Tests for _select_mmr function."""
+
+    @staticmethod
+    def _items(*email_ids):
+        return [
+            {"document": f"chunk {i}", "distance": 0.0, "metadata": {"email_id": e}, "email_id": e}
+            for i, e in enumerate(email_ids)
+        ]
+
+    async def test_near_duplicate_loses_to_diverse_chunk(self):
+        """A chunk almost identical to a picked one should rank below a new topic."""
+        items = self._items(1, 2, 3)
+        embeddings = [[1.0, 0.2], [1.0, 0.25], [0.2, 1.0]]
+
+        selected = _select_mmr([1.0, 1.0], items, embeddings, top_k=2, mmr_lambda=0.5, max_per_email=2)
+
+        assert [item["email_id"] for item in selected] == [2, 3]
+
+    async def test_per_email_cap(self):
+        """No email should contribute more than max_per_email chunks."""
+        items = self._items(1, 1, 1, 2)
+        embeddings = [[1.0, 0.0], [1.0, 0.01], [1.0, 0.02], [0.0, 1.0]]
+
+        selected = _select_mmr([1.0, 0.0], items, embeddings, top_k=4, mmr_lambda=1.0, max_per_email=2)
+
+        assert [item["email_id"] for item in selected] == [1, 1, 2]
+
+    async def test_without_embeddings_keeps_order(self):
+        """Missing embeddings should fall back to relevance order with the cap."""
+        selected = _select_mmr([1.0], self._items(1, 1, 1, 2), None, top_k=3, mmr_lambda=0.7, max_per_email=1)
+
+        assert [item["email_id"] for item in selected] == [1, 2]
+
+
+class TestUpdateCategoryMetadata:
+    """Tests for update_category_metadata function."""
+
+    async def test_update_category_metadata_batches(self, monkeypatch):
+        """Chunks should be re-tagged in batched collection.update calls."""
+        mock_collection = MagicMock()
+        mock_collection.get.return_value = {"ids": [f"c{i}" for i in range(5)]}
+
+        monkeypatch.setattr("backend.services.embeddings.get_collection", lambda: mock_collection)
+        monkeypatch.setattr("backend.services.embeddings._METADATA_BATCH_SIZE", 2)
+
+        count = update_category_metadata("긴급", "미분류")
+
+        assert count == 5
+        assert mock_collection.get.call_args.kwargs["where"] == {"category": "긴급"}
+        batches = [c.kwargs["ids"] for c in mock_collection.update.call_args_list]
+        assert batches == [["c0", "c1"], ["c2", "c3"], ["c4"]]
+        assert mock_collection.update.call_args.kwargs["metadatas"] == [{"category": "미분류"}]
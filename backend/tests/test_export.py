@@ -0,0 +1,127 @@
+"""Tests for backend.services.export (streaming NDJSON export and restore)."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import json
+import sqlite3
+
+import numpy as np
+
+from backend.config import settings
+from backend.db.sqlite import add_category, get_categories, get_emails, init_db, insert_email, iter_emails
+from backend.services import indexer, mailbox
+from backend.services.embeddings import active_embedding_model
+
+
+def _email(number: int) -> dict:
+    return {
+        "sender": f"sender{number}@example.com",
+        "subject": f"제목 {number}",
+        "body": f"메일 본문 {number}번입니다.",
+        "summary": f"요약 {number}",
+        "category": "프로젝트",
+        "message_id": f"<msg{number}@example.com>",
+    }
+
+
+def _records(text: str) -> list[dict]:
+    return [json.loads(line) for line in text.splitlines()]
+
+
+class TestExport:
+    """GET /api/export streams categories and emails page by page."""
+
+    async def test_streams_emails(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "EXPORT_PAGE_SIZE", 2)
+        for i in range(5):
+            await insert_email(_email(i))
+
+        resp = await client.get("/export")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        records = _records(resp.text)
+
+        assert records[0]["type"] == "header"
+        categories = [r["name"] for r in records if r["type"] == "category"]
+        assert categories == [c["name"] for c in await get_categories()]
+        emails = [r for r in records if r["type"] == "email"]
+        assert [e["body"] for e in emails] == [f"메일 본문 {i}번입니다." for i in range(5)]
+        assert "embeddings" not in emails[0]
+
+    async def test_vectors(self, client):
+        await insert_email(_email(1), vectors=[[0.1, 0.2, 0.3]], embedding_model=await active_embedding_model())
+        await indexer.drain()
+
+        emails = [r for r in _records((await client.get("/export?vectors=true")).text) if r["type"] == "email"]
+
+        assert emails[0]["chunks"] == ["메일 본문 1번입니다."]
+        assert np.allclose(emails[0]["embeddings"], [[0.1, 0.2, 0.3]])
+        assert emails[0]["embedding_model"] == await active_embedding_model()
+
+    async def test_pages_leave_wal_free(self, temp_db):
+        for i in range(3):
+            await insert_email(_email(i))
+
+        seen = []
+        async for page in iter_emails(1):
+            if not seen:
+                await insert_email(_email(99))
+                # No read transaction is held between pages
+                db = sqlite3.connect(settings.DB_PATH)
+                busy, _, _ = db.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+                db.close()
+                assert busy == 0
+            seen += [email["sender"] for email in page]
+
+        assert seen == [f"sender{i}@example.com" for i in range(3)]
+
+
+class TestRestore:
+    """An export imports as format=ndjson without calling the embedding API."""
+
+    async def test_round_trip(self, client, temp_chromadb, tmp_path, monkeypatch):
+        model = await active_embedding_model()
+        await add_category("보관", "오래된 메일")
+        for i in range(3):
+            await insert_email(_email(i), vectors=[[0.1 * (i + 1), 0.5, 0.5]], embedding_model=model)
+        await indexer.drain()
+        path = tmp_path / "export.ndjson"
+        path.write_bytes((await client.get("/export?vectors=true")).content)
+
+        # Fresh database and collection
+        monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "restored.db"))
+        await init_db()
+        temp_chromadb.delete(ids=temp_chromadb.get()["ids"])
+
+        async def no_embedding(texts, model=None):
+            raise AssertionError("restore must reuse the exported embeddings")
+
+        monkeypatch.setattr("backend.services.embeddings.create_embedding", no_embedding)
+        assert mailbox.detect_format(path) == "ndjson"
+        job = await mailbox.run_import(path)
+        await indexer.drain()
+
+        assert (job["status"], job["imported"], job["skipped"]) == ("completed", 3, 0)
+        assert "보관" in [c["name"] for c in await get_categories()]
+        emails = {e["sender"]: e for e in await get_emails()}
+        assert emails["sender0@example.com"]["message_id"] == "<msg0@example.com>"
+        stored = temp_chromadb.get(include=["embeddings", "metadatas"])
+        vectors = {meta["email_id"]: vector for meta, vector in zip(stored["metadatas"], stored["embeddings"])}
+        assert np.allclose(vectors[emails["sender2@example.com"]["id"]], [0.3, 0.5, 0.5])
+
+        again = await mailbox.run_import(path, restart=True)
+        assert (again["imported"], again["duplicates"]) == (0, 3)
+
+    async def test_changed_chunks_reembedded(self, client, temp_chromadb, tmp_path, mock_llm):
+        line = {"type": "email", **_email(1), "chunks": ["다른 청크"], "embeddings": [[1.0, 0.0]],
+                "embedding_model": await active_embedding_model()}
+        path = tmp_path / "export.ndjson"
+        path.write_text(json.dumps(line, ensure_ascii=False) + "\n\nnot json\n", encoding="utf-8")
+
+        job = await mailbox.run_import(path, "ndjson")
+        await indexer.drain()
+
+        assert (job["imported"], job["skipped"]) == (1, 1)
+        stored = temp_chromadb.get(include=["embeddings"])
+        assert len(stored["embeddings"][0]) == 1536
@@ -0,0 +1,90 @@
+"""Unit tests for backend.db.flat_index module."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import numpy as np
+import pytest
+
+from backend.db import flat_index
+from backend.db.flat_index import FlatIndexClient
+
+
+@pytest.fixture
+def flat_collection(tmp_path):
+    client = FlatIndexClient(str(tmp_path))
+    return client.get_or_create_collection("emails", metadata={"hnsw:space": "cosine"})
+
+
+def _add(collection, count, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    collection.upsert(
+        ids=[f"email_{i}_chunk_0" for i in range(count)],
+        embeddings=vectors,
+        documents=[f"doc {i}" for i in range(count)],
+        metadatas=[
+            {"email_id": i, "chunk_index": 0, "category": "공지사항" if i % 2 else "일정"}
+            for i in range(count)
+        ],
+    )
+    return vectors
+
+
+class TestQuery:
+    """Tests for FlatIndexCollection.query."""
+
+    async def test_query_exact_nearest(self, flat_collection):
+        """The stored vector itself should be the top hit with distance ~0."""
+        vectors = _add(flat_collection, 50)
+        result = flat_collection.query(query_embeddings=[vectors[7]], n_results=3)
+        assert result["ids"][0][0] == "email_7_chunk_0"
+        assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+        assert len(result["ids"][0]) == 3
+
+    async def test_query_with_filter(self, flat_collection):
+        """Only rows matching the metadata filter should be returned."""
+        vectors = _add(flat_collection, 50)
+        result = flat_collection.query(
+            query_embeddings=[vectors[8]],
+            n_results=5,
+            where={"$and": [{"category": "공지사항"}, {"email_id": {"$in": [1, 3, 8]}}]},
+        )
+        assert sorted(result["ids"][0]) == ["email_1_chunk_0", "email_3_chunk_0"]
+
+
+class TestWrites:
+    """Tests for upsert, update, delete and compaction."""
+
+    async def test_upsert_replaces(self, flat_collection):
+        """Upserting an existing id should leave a single live row."""
+        _add(flat_collection, 5)
+        flat_collection.upsert(
+            ids=["email_1_chunk_0"], embeddings=[[1.0] * 8], documents=["new"],
+            metadatas=[{"email_id": 1, "category": "HR/인사"}],
+        )
+        assert flat_collection.count() == 5
+        assert flat_collection.get(ids=["email_1_chunk_0"])["documents"] == ["new"]
+
+    async def test_update_and_delete(self, flat_collection):
+        """Metadata updates merge; deletes by filter remove the rows."""
+        _add(flat_collection, 10)
+        flat_collection.update(ids=["email_2_chunk_0"], metadatas=[{"category": "HR/인사"}])
+        assert flat_collection.get(where={"category": "HR/인사"})["metadatas"][0]["email_id"] == 2
+
+        flat_collection.delete(where={"email_id": {"$in": [2, 3]}})
+        assert flat_collection.count() == 8
+        assert flat_collection.get(where={"email_id": 2})["ids"] == []
+
+    async def test_compaction_and_reload(self, tmp_path, monkeypatch):
+        """Tombstones should be compacted away and the state survive a reload."""
+        monkeypatch.setattr(flat_index, "_COMPACT_MIN_DEAD", 4)
+        collection = FlatIndexClient(str(tmp_path)).get_or_create_collection("emails")
+        vectors = _add(collection, 10)
+        collection.delete(ids=[f"email_{i}_chunk_0" for i in range(5)])
+        assert collection._generation == 1
+        assert len(collection._ids) == 5
+
+        reloaded = FlatIndexClient(str(tmp_path)).get_collection("emails")
+        assert reloaded.count() == 5
+        result = reloaded.query(query_embeddings=[vectors[9]], n_results=1)
+        assert result["ids"][0] == ["email_9_chunk_0"]
@@ -0,0 +1,88 @@
+"""Unit tests for backend.services.history module."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import pytest
+from unittest.mock import AsyncMock
+
+from backend.config import settings
+from backend.services import history
+from backend.services.history import compact_history
+from backend.services.llm import LLMError
+
+
+def _turns(count: int, start: int = 0) -> list[dict]:
+    messages = []
+    for i in range(start, start + count):
+        messages.append({"role": "user", "content": f"질문 {i} " + "가" * 40})
+        messages.append({"role": "assistant", "content": f"답변 {i} " + "나" * 40})
+    return messages
+
+
+@pytest.fixture(autouse=True)
+def small_budget(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_HISTORY_TOKENS", 200)
+    history._summaries.clear()
+    yield
+    history._summaries.clear()
+
+
+class TestCompactHistory:
+    """Tests for compact_history function."""
+
+    async def test_short_history_unchanged(self, monkeypatch):
+        """History within the budget should be passed through without an LLM call."""
+        mock_llm = AsyncMock(return_value="요약")
+        monkeypatch.setattr("backend.services.history.chat_completion", mock_llm)
+
+        messages = _turns(1)
+        assert await compact_history(messages) == messages
+        mock_llm.assert_not_called()
+
+    async def test_long_history_summarized_and_reused(self, monkeypatch):
+        """Older turns should be summarized once and the summary reused next turn."""
+        mock_llm = AsyncMock(return_value="요약 1")
+        monkeypatch.setattr("backend.services.history.chat_completion", mock_llm)
+
+        messages = _turns(5)
+        compacted = await compact_history(messages)
+
+        assert compacted[0] == {"role": "system", "content": "이전 대화 요약:\n요약 1"}
+        assert compacted[1]["role"] == "user"
+        assert compacted[1:] == messages[-(len(compacted) - 1):]
+        assert mock_llm.call_count == 1
+
+        # One more turn still fits next to the cached summary: no new call
+        compacted = await compact_history(messages + _turns(1, start=5))
+        assert compacted[0]["content"].endswith("요약 1")
+        assert mock_llm.call_count == 1
+
+    async def test_summary_updated_incrementally(self, monkeypatch):
+        """A longer conversation should extend the previous summary, not restart."""
+        mock_llm = AsyncMock(side_effect=["요약 1", "요약 2"])
+        monkeypatch.setattr("backend.services.history.chat_completion", mock_llm)
+
+        messages = _turns(5)
+        await compact_history(messages)
+        compacted = await compact_history(messages + _turns(4, start=5))
+
+        assert compacted[0]["content"].endswith("요약 2")
+        second_prompt = mock_llm.call_args_list[1].kwargs["messages"][1]["content"]
+        assert "요약 1" in second_prompt
+        # Turns already covered by the first summary are not sent again
+        assert second_prompt.count("질문 0") == 0
+
+    async def test_llm_failure_drops_older_turns(self, monkeypatch):
+        """When summarizing fails the older turns should be dropped."""
+        monkeypatch.setattr(
+            "backend.services.history.chat_completion",
+            AsyncMock(side_effect=LLMError("API down")),
+        )
+
+        messages = _turns(5)
+        compacted = await compact_history(messages)
+
+        assert all(m["role"] != "system" for m in compacted)
+        assert compacted == messages[-len(compacted):]
+        assert len(compacted) < len(messages)
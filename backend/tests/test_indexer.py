@@ -0,0 +1,45 @@
+"""Unit tests for backend.services.indexer module."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+from backend.services.indexer import _coalesce
+
+
+def _entry(op, email_id=None, payload=None, vectors=None):
+    return {"op": op, "email_id": email_id, "payload": payload or {}, "vectors": vectors}
+
+
+class TestCoalesce:
+    """Tests for _coalesce function."""
+
+    async def test_metadata_merges_into_upsert(self):
+        """A later metadata change should fold into the pending upsert."""
+        steps = _coalesce([
+            _entry("upsert", 1, {"metadata": {"category": "미분류", "sender": "a"}}, [[0.1]]),
+            _entry("metadata", 1, {"metadata": {"category": "공지사항"}}),
+        ])
+        assert steps == [("emails", {1: {
+            "op": "upsert",
+            "metadata": {"category": "공지사항", "sender": "a"},
+            "vectors": [[0.1]],
+            "model": None,
+        }})]
+
+    async def test_delete_wins(self):
+        """Changes before or after a delete should collapse into the delete."""
+        steps = _coalesce([
+            _entry("upsert", 1, {"metadata": {"category": "미분류"}}),
+            _entry("delete", 1),
+            _entry("metadata", 1, {"metadata": {"category": "공지사항"}}),
+        ])
+        assert steps == [("emails", {1: {"op": "delete"}})]
+
+    async def test_category_op_is_a_barrier(self):
+        """Per-email changes must not be reordered across a category re-tag."""
+        steps = _coalesce([
+            _entry("metadata", 1, {"metadata": {"category": "긴급"}}),
+            _entry("category", payload={"old": "긴급", "new": "미분류"}),
+            _entry("metadata", 2, {"metadata": {"category": "긴급"}}),
+        ])
+        assert [kind for kind, _ in steps] == ["emails", "category", "emails"]
@@ -172,33 +172,35 @@ async def test_edge_llm_failure(client, monkeypatch):
 
 
 async def test_edge_chromadb_failure(client, monkeypatch):
-    """ChromaDB failure → SQLite save succeeds, no 500 error."""
+    """ChromaDB failure → SQLite save succeeds, change stays queued for retry."""
+    from backend.services import indexer
 
-    async def failing_store(*args, **kwargs):
+    def failing_upsert(*args, **kwargs):
         raise Exception("ChromaDB is down!")
 
-    monkeypatch.setattr(
-        "backend.services.embeddings.store_email_embedding", failing_store
-    )
-    monkeypatch.setattr(
-        "backend.routers.emails.store_email_embedding", failing_store
-    )
+    monkeypatch.setattr("backend.services.indexer.upsert_chunks", failing_upsert)
 
     resp = await client.post(
         "/emails",
         json={"body": "ChromaDB 장애 시에도 메일은 저장됩니다.", "sender": "운영팀"},
     )
-    # Should succeed — embedding failure is caught gracefully
+    # Should succeed — the vector store is only written by the indexer
     assert resp.status_code == 201
     data = resp.json()
     assert data["id"] is not None
     assert data["body"] == "ChromaDB 장애 시에도 메일은 저장됩니다."
 
+    assert await indexer.drain() == 0
+    metrics_resp = await client.get("/admin/metrics")
+    outbox = metrics_resp.json()["outbox"]
+    assert outbox["pending"] == 1
+    assert outbox["max_attempts"] == 1
+
 
 async def test_edge_empty_db_chat(client, monkeypatch):
     """POST /api/chat on empty DB → response about no mail data."""
     # Ensure search_similar returns empty results (empty ChromaDB)
-    async def empty_search(query, top_k=5, category=None):
+    async def empty_search(query, top_k=5, category=None, sender=None):
         return []
 
     monkeypatch.setattr(
@@ -211,3 +213,445 @@ async def test_edge_empty_db_chat(client, monkeypatch):
     answer = chat_resp.json()["answer"]
     # RAG with empty results returns the "no results" message
     assert "찾을 수 없습니다" in answer or "없습니다" in answer
+
+
+async def test_local_classifier_skips_category_llm(client, mock_llm, monkeypatch):
+    """Once a category has enough examples, similar emails skip LLM classification."""
+    monkeypatch.setattr("backend.config.settings.LOCAL_CLASSIFIER_MIN_SUPPORT", 2)
+
+    paths = []
+    for i in range(3):
+        resp = await client.post(
+            "/emails", json={"body": f"프로젝트 주간 보고 {i}", "sender": "PM"}
+        )
+        assert resp.status_code == 201
+        paths.append(resp.json()["classification_path"])
+
+    # The mock embedding is identical for every text, so the third email
+    # matches the '프로젝트' centroid exactly
+    assert paths == ["llm", "llm", "local_summary"]
+
+    stats_resp = await client.get("/emails/stats/classification")
+    assert stats_resp.status_code == 200
+    counts = {s["path"]: s["count"] for s in stats_resp.json()}
+    assert counts == {"llm": 2, "local_summary": 1}
+
+
+async def test_corrections_become_routing_rules(client, mock_llm):
+    """Repeated corrections of one sender route its next email without classification."""
+    for _ in range(2):
+        resp = await client.post(
+            "/emails", json={"body": "급여 명세서가 발급되었습니다.", "sender": "payroll@corp.com"}
+        )
+        put_resp = await client.put(f"/emails/{resp.json()['id']}/category?category=HR/인사")
+        assert put_resp.status_code == 200
+
+    resp = await client.post(
+        "/emails", json={"body": "이번 달 급여 명세서입니다.", "sender": "payroll@corp.com"}
+    )
+    data = resp.json()
+    assert data["category"] == "HR/인사"
+    assert data["classification_path"] == "rule_summary"
+
+    rules_resp = await client.get("/rules")
+    assert rules_resp.status_code == 200
+    rules = {(r["kind"], r["pattern"]): r for r in rules_resp.json()}
+    assert rules[("sender", "payroll@corp.com")]["support"] == 2
+    # No subject was supplied, so none is learned from the LLM-extracted one
+    assert "subject" not in {kind for kind, _ in rules}
+
+    del_resp = await client.delete(f"/rules/{rules[('sender', 'payroll@corp.com')]['id']}")
+    assert del_resp.status_code == 204
+    assert (await client.delete("/rules/999999")).status_code == 404
+
+
+async def test_subject_rules_learn_from_supplied_subject(client, mock_llm):
+    """Subject rules come from the subject given at ingest, which is what routing sees."""
+    for number in range(2):
+        resp = await client.post("/emails", json={
+            "body": "이번 주 진행 상황입니다.", "sender": f"member{number}@corp.com", "subject": "[주간보고] 3주차",
+        })
+        await client.put(f"/emails/{resp.json()['id']}/category?category=공지사항")
+
+    resp = await client.post("/emails", json={
+        "body": "진행 상황 공유드립니다.", "sender": "new@other.com", "subject": "RE: [주간보고] 4주차",
+    })
+    assert resp.json()["category"] == "공지사항"
+    assert resp.json()["classification_path"].startswith("rule")
+
+
+async def test_lazy_summary_generated_on_first_read(client, mock_llm, monkeypatch):
+    """Lazy mode ingests without a summary and caches it on the first detail read."""
+    monkeypatch.setattr("backend.config.settings.SUMMARY_MODE", "lazy")
+
+    resp = await client.post("/emails", json={"body": "다음 주 월요일 전사 공지입니다.", "sender": "총무팀"})
+    assert resp.status_code == 201
+    email_id = resp.json()["id"]
+    assert resp.json()["summary"] is None
+    assert resp.json()["category"] == "프로젝트"
+    calls_after_ingest = mock_llm["chat"]
+
+    list_resp = await client.get("/emails")
+    assert list_resp.json()[0]["summary"] is None
+
+    get_resp = await client.get(f"/emails/{email_id}")
+    assert get_resp.json()["summary"] == "테스트 메일 요약입니다."
+    assert mock_llm["chat"] == calls_after_ingest + 1
+
+    # Cached — no further LLM call
+    await client.get(f"/emails/{email_id}")
+    assert mock_llm["chat"] == calls_after_ingest + 1
+
+    regen_resp = await client.post(f"/emails/{email_id}/summary")
+    assert regen_resp.status_code == 200
+    assert mock_llm["chat"] == calls_after_ingest + 2
+
+
+async def test_pregenerate_recent_summaries(client, monkeypatch):
+    """The background pre-generation fills missing summaries of the newest emails."""
+    from backend.services.summaries import pregenerate_recent
+
+    monkeypatch.setattr("backend.config.settings.SUMMARY_MODE", "lazy")
+    for i in range(3):
+        await client.post("/emails", json={"body": f"메일 {i}", "sender": "테스터"})
+
+    assert await pregenerate_recent(2) == 2
+    summaries = [e["summary"] for e in (await client.get("/emails")).json()]
+    assert summaries.count(None) == 1
+
+
+async def test_bulk_ingest_batches_classification(client, mock_llm):
+    """POST /api/emails/bulk classifies several emails in one LLM request."""
+    payload = [{"body": f"공지 {i}", "sender": "총무팀"} for i in range(3)]
+
+    resp = await client.post("/emails/bulk", json=payload)
+    assert resp.status_code == 201
+    data = resp.json()
+    assert [e["body"] for e in data] == ["공지 0", "공지 1", "공지 2"]
+    assert all(e["classification_path"] == "llm_batch" for e in data)
+    assert all(e["category"] == "프로젝트" for e in data)
+    assert mock_llm["chat"] == 1
+
+
+async def test_bulk_ingest_labels_single_fallback(client, mock_llm):
+    """An email classified alone in a bulk request is labelled ``llm``, not ``llm_batch``."""
+    from backend.services.classifier import _MAX_BATCH_BODY_LENGTH
+
+    payload = [{"body": f"공지 {i}"} for i in range(2)] + [{"body": "긴 " * _MAX_BATCH_BODY_LENGTH}]
+
+    data = (await client.post("/emails/bulk", json=payload)).json()
+
+    assert [e["classification_path"] for e in data] == ["llm_batch", "llm_batch", "llm"]
+
+
+async def test_bulk_ingest_background(client):
+    """background=true accepts the emails and ingests them after responding."""
+    resp = await client.post(
+        "/emails/bulk?background=true", json=[{"body": "백그라운드 메일"}]
+    )
+    assert resp.status_code == 202
+    assert resp.json() == {"accepted": 1}
+
+    emails = (await client.get("/emails")).json()
+    assert [e["preview"] for e in emails] == ["백그라운드 메일"]
+
+
+async def test_bulk_ingest_rejects_empty_body(client):
+    """Any empty body rejects the whole request."""
+    resp = await client.post("/emails/bulk", json=[{"body": "ok"}, {"body": " "}])
+    assert resp.status_code == 400
+
+
+async def test_create_email_overlaps_embedding_and_classification(client, temp_chromadb, monkeypatch):
+    """Embedding and classification run concurrently; chunk metadata ends up final."""
+    import asyncio
+
+    embedding_started = asyncio.Event()
+    classification_started = asyncio.Event()
+
+    async def slow_embedding(texts, model=None):
+        embedding_started.set()
+        # Deadlocks (and times out) if classification waits for the embedding
+        await asyncio.wait_for(classification_started.wait(), timeout=2)
+        return [[0.01] * 1536 for _ in texts]
+
+    async def slow_chat_completion(messages, model=None, response_format=None, max_tokens=None):
+        classification_started.set()
+        await asyncio.wait_for(embedding_started.wait(), timeout=2)
+        return json.dumps({
+            "category": "일정", "subject": "워크숍", "summary": "요약", "date_extracted": None,
+        })
+
+    monkeypatch.setattr("backend.services.embeddings.create_embedding", slow_embedding)
+    monkeypatch.setattr("backend.services.classifier.chat_completion", slow_chat_completion)
+
+    resp = await client.post("/emails", json={"body": "다음 주 워크숍 일정 안내", "sender": "총무팀"})
+    assert resp.status_code == 201
+    data = resp.json()
+    assert data["category"] == "일정"
+    assert data["subject"] == "워크숍"
+
+    from backend.services import indexer
+    await indexer.drain()
+    stored = temp_chromadb.get(where={"email_id": data["id"]}, include=["metadatas"])
+    assert stored["metadatas"][0]["category"] == "일정"
+    assert stored["metadatas"][0]["subject"] == "워크숍"
+
+
+async def test_create_email_failure_releases_reserved_row(client, mock_llm, monkeypatch):
+    """A failed ingest cancels the embedding and leaves the row pending, not processing."""
+    import asyncio
+
+    from backend.db.sqlite import get_emails
+    from backend.services.ingest import ingest_email
+
+    embedding_cancelled = asyncio.Event()
+
+    async def hanging_embedding(texts, model=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            embedding_cancelled.set()
+            raise
+
+    async def broken_classify(**kwargs):
+        raise RuntimeError("classifier crashed")
+
+    monkeypatch.setattr("backend.services.embeddings.create_embedding", hanging_embedding)
+    monkeypatch.setattr("backend.services.ingest.classify_and_summarize", broken_classify)
+
+    with pytest.raises(RuntimeError):
+        await ingest_email("분류 중 오류가 나는 메일", sender="총무팀")
+
+    await asyncio.wait_for(embedding_cancelled.wait(), timeout=1)
+    [email] = await get_emails()
+    assert (email["status"], email["category"]) == ("pending", "미분류")
+
+
+async def test_processing_email_read_skips_summary(client, mock_llm):
+    """Reading a row that is still being ingested does not generate a summary."""
+    from backend.db.sqlite import insert_email
+
+    email_id = await insert_email({"body": "처리 중인 메일", "summary": None, "status": "processing"})
+    calls = mock_llm["chat"]
+
+    resp = await client.get(f"/emails/{email_id}")
+
+    assert resp.status_code == 200
+    assert resp.json()["summary"] is None
+    assert mock_llm["chat"] == calls
+
+
+async def test_category_changes_sync_chroma_metadata(client, temp_chromadb):
+    """Manual reassignment, rename and delete keep chunk metadata in step."""
+    cat_id = (await client.post("/categories", json={"name": "긴급"})).json()["id"]
+    email_id = (await client.post("/emails", json={"body": "긴급 점검 안내"})).json()["id"]
+
+    from backend.services import indexer
+
+    async def chunk_categories():
+        await indexer.drain()
+        stored = temp_chromadb.get(where={"email_id": email_id}, include=["metadatas"])
+        return {m["category"] for m in stored["metadatas"]}
+
+    await client.put(f"/emails/{email_id}/category?category=긴급")
+    assert await chunk_categories() == {"긴급"}
+
+    await client.put(f"/categories/{cat_id}", json={"name": "매우긴급"})
+    assert await chunk_categories() == {"매우긴급"}
+
+    await client.delete(f"/categories/{cat_id}")
+    assert await chunk_categories() == {"미분류"}
+
+
+async def test_chat_scoped_to_category(client):
+    """Chat category filter only searches chunks of that category."""
+    await client.post("/emails", json={"body": "프로젝트 킥오프는 3월입니다.", "sender": "PM"})
+    from backend.services import indexer
+    await indexer.drain()
+
+    scoped = await client.post("/chat", json={"question": "킥오프 언제?", "category": "공지사항"})
+    assert "찾을 수 없습니다" in scoped.json()["answer"]
+    assert scoped.json()["source_ids"] == []
+
+    matched = await client.post(
+        "/chat", json={"question": "킥오프 언제?", "category": "프로젝트", "sender": "PM"}
+    )
+    assert matched.json()["source_ids"] != []
+
+
+async def test_outbox_coalesces_and_deletes(client, temp_chromadb, mock_llm):
+    """Several queued changes of one email are applied as their net result."""
+    from backend.services import indexer
+
+    email_id = (await client.post("/emails", json={"body": "주간 보고서 공유드립니다."})).json()["id"]
+    other_id = (await client.post("/emails", json={"body": "회의록 공유드립니다."})).json()["id"]
+    await client.put(f"/emails/{email_id}/category?category=공지사항")
+    await client.delete(f"/emails/{other_id}")
+
+    assert await indexer.drain() == 4
+    stored = temp_chromadb.get(include=["metadatas"])
+    assert {m["email_id"] for m in stored["metadatas"]} == {email_id}
+    assert {m["category"] for m in stored["metadatas"]} == {"공지사항"}
+
+    metrics_resp = await client.get("/admin/metrics")
+    assert metrics_resp.json()["outbox"]["pending"] == 0
+
+
+async def test_outbox_failed_batch_retried_per_email(client, temp_chromadb, mock_llm, monkeypatch):
+    """One email that cannot be indexed does not hold back the rest of its batch."""
+    from backend.services import indexer
+    from backend.services.indexer import upsert_chunks
+
+    bad_id = (await client.post("/emails", json={"body": "색인에 실패하는 메일입니다."})).json()["id"]
+    good_id = (await client.post("/emails", json={"body": "정상적으로 색인되는 메일입니다."})).json()["id"]
+
+    def failing_upsert(entries, collection):
+        if any(entry["email_id"] == bad_id for entry in entries):
+            raise Exception("bad chunk")
+        upsert_chunks(entries, collection)
+
+    monkeypatch.setattr("backend.services.indexer.upsert_chunks", failing_upsert)
+
+    assert await indexer.drain() == 1
+    stored = temp_chromadb.get(include=["metadatas"])
+    assert {m["email_id"] for m in stored["metadatas"]} == {good_id}
+    outbox = (await client.get("/admin/metrics")).json()["outbox"]
+    assert (outbox["pending"], outbox["max_attempts"]) == (1, 1)
+
+
+async def test_outbox_deferred_entry_does_not_stall_queue(client, temp_chromadb, mock_llm, monkeypatch):
+    """An entry waiting for a retry holds back only its own email and later category ops."""
+    from backend.db.sqlite import get_outbox_batch
+    from backend.services import indexer
+    from backend.services.indexer import upsert_chunks
+
+    bad_id = (await client.post("/emails", json={"body": "색인에 실패하는 메일입니다."})).json()["id"]
+
+    def failing_upsert(entries, collection):
+        if any(entry["email_id"] == bad_id for entry in entries):
+            raise Exception("bad chunk")
+        upsert_chunks(entries, collection)
+
+    monkeypatch.setattr("backend.services.indexer.upsert_chunks", failing_upsert)
+    assert await indexer.drain() == 0
+
+    good_id = (await client.post("/emails", json={"body": "나중에 들어온 정상 메일입니다."})).json()["id"]
+    await client.put(f"/emails/{bad_id}/category?category=공지사항")
+    assert [e["email_id"] for e in await get_outbox_batch(10)] == [good_id]
+
+    assert await indexer.drain() == 1
+    stored = temp_chromadb.get(include=["metadatas"])
+    assert {m["email_id"] for m in stored["metadatas"]} == {good_id}
+
+    # A category re-tag must not overtake the deferred email's change
+    categories = {c["name"]: c["id"] for c in (await client.get("/categories")).json()}
+    await client.delete(f"/categories/{categories['공지사항']}")
+    await client.post("/emails", json={"body": "재분류 이후의 메일입니다."})
+    assert await get_outbox_batch(10) == []
+
+
+async def test_outbox_dead_letter_after_max_attempts(client, temp_chromadb, mock_llm, monkeypatch):
+    """An entry that keeps failing moves to the dead-letter table."""
+    from backend.config import settings
+    from backend.services import indexer
+
+    def failing_upsert(*args, **kwargs):
+        raise Exception("ChromaDB is down!")
+
+    monkeypatch.setattr("backend.services.indexer.upsert_chunks", failing_upsert)
+    monkeypatch.setattr(settings, "INDEXER_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "INDEXER_MAX_BACKOFF", 0)
+    await client.post("/emails", json={"body": "계속 실패하는 메일입니다."})
+
+    assert await indexer.drain_once() == 0
+    assert await indexer.drain_once() == 1
+
+    metrics_resp = (await client.get("/admin/metrics")).json()
+    assert (metrics_resp["outbox"]["pending"], metrics_resp["outbox"]["dead_letters"]) == (0, 1)
+    assert metrics_resp["counters"]["indexer_dead_letters"] == 1
+
+
+async def test_chat_session_keeps_history_and_reuses_retrieval(client, monkeypatch):
+    """Session turns are stored server-side; a repeated question skips retrieval."""
+    from backend.services import indexer, rag
+
+    await client.post("/emails", json={"body": "금요일 오전 10시 주간 회의가 있습니다.", "sender": "김팀장"})
+    await indexer.drain()
+
+    searches = {"count": 0}
+    original_retrieve = rag.retrieve
+
+    async def counting_retrieve(question, category=None, sender=None):
+        searches["count"] += 1
+        return await original_retrieve(question, category=category, sender=sender)
+
+    monkeypatch.setattr("backend.services.sessions.retrieve", counting_retrieve)
+
+    create_resp = await client.post("/chat/sessions")
+    assert create_resp.status_code == 201
+    session_id = create_resp.json()["session_id"]
+
+    first = await client.post("/chat", json={"question": "회의 언제?", "session_id": session_id})
+    assert first.status_code == 200
+    assert first.json()["session_id"] == session_id
+    assert first.json()["sources"][0]["sender"] == "김팀장"
+
+    again = await client.post("/chat", json={"question": "회의 언제?", "session_id": session_id})
+    assert again.json()["source_ids"] == first.json()["source_ids"]
+    assert searches["count"] == 1
+
+    # New mail invalidates the cached retrieval
+    await client.post("/emails", json={"body": "회의 장소가 3층으로 바뀌었습니다.", "sender": "김팀장"})
+    await indexer.drain()
+    await client.post("/chat", json={"question": "회의 언제?", "session_id": session_id})
+    assert searches["count"] == 2
+
+    history = (await client.get(f"/chat/sessions/{session_id}")).json()["history"]
+    assert [m["role"] for m in history] == ["user", "assistant"] * 3
+
+    assert (await client.delete(f"/chat/sessions/{session_id}")).status_code == 204
+    missing = await client.post("/chat", json={"question": "회의 언제?", "session_id": session_id})
+    assert missing.status_code == 404
+
+
+async def test_chat_session_follow_up_stays_in_scope(client, monkeypatch):
+    """The previous turn's chunks are carried over only when they match the new scope."""
+    from backend.services import sessions
+
+    async def no_results(question, category=None, sender=None):
+        return []
+
+    monkeypatch.setattr("backend.services.sessions.retrieve", no_results)
+    context = sessions._context("scoped")
+    last = {"document": "회의", "metadata": {"email_id": 1, "chunk_index": 0, "category": "일정", "sender": "김팀장"}}
+    context["last"] = [last]
+
+    assert await sessions._retrieve(context, "그건?", "공지사항", None) == []
+    assert await sessions._retrieve(context, "그건?", None, "박대리") == []
+    assert await sessions._retrieve(context, "그건?", "일정", "김팀장") == [last]
+
+
+async def test_chat_session_caches_dropped_on_mail_change(client):
+    """New mail drops the cached retrievals and sources of a session."""
+    from backend.services import sessions
+
+    context = sessions._context("changing")
+    await sessions._invalidate_on_change(context)
+    context["results"][("질문", None, None)] = []
+    context["sources"][1] = {"email_id": 1}
+
+    await sessions._invalidate_on_change(context)
+    assert context["sources"] and context["results"]
+
+    await client.post("/emails", json={"body": "새 메일입니다."})
+    await sessions._invalidate_on_change(context)
+    assert not context["sources"] and not context["results"]
+
+
+async def test_chat_session_expires(client, monkeypatch):
+    """A session past its TTL is gone."""
+    monkeypatch.setattr("backend.config.settings.CHAT_SESSION_TTL", -1)
+    session_id = (await client.post("/chat/sessions")).json()["session_id"]
+
+    assert (await client.get(f"/chat/sessions/{session_id}")).status_code == 404
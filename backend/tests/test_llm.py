@@ -3,10 +3,16 @@
 import sys
 sys.path.insert(0, "C:/dev/mail-assistant")
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
 
+import backend.services.llm as llm_module
+from backend.config import settings
+from backend.services import metrics
+
 from backend.services.llm import (
     chat_completion,
     create_embedding,
@@ -17,6 +23,12 @@ from backend.services.llm import (
 )
 
 
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    """Each test builds the pooled client from its own patched httpx.AsyncClient."""
+    monkeypatch.setattr("backend.services.llm._client", None)
+
+
 class TestChatCompletion:
     """Tests for chat_completion function."""
 
@@ -226,3 +238,100 @@ class TestCreateEmbedding:
             await create_embedding(["test"])
         
         assert "500" in str(exc_info.value)
+
+
+class TestSingleFlight:
+    """Concurrent identical requests share one upstream call."""
+
+    @pytest.fixture
+    def upstream(self, monkeypatch):
+        """A POST that waits until released and answers by request body."""
+        state = {"calls": [], "release": asyncio.Event(), "error": None}
+
+        async def mock_post(path, headers=None, json=None):
+            state["calls"].append(json)
+            await state["release"].wait()
+            response = MagicMock()
+            if state["error"] is not None:
+                response.status_code = state["error"]
+                response.text = "upstream error"
+                response.headers = {}
+                response.raise_for_status = MagicMock(
+                    side_effect=httpx.HTTPStatusError("error", request=MagicMock(), response=response)
+                )
+            elif "input" in json:
+                response.json.return_value = {
+                    "data": [{"embedding": [float(len(text))]} for text in json["input"]]
+                }
+            else:
+                response.json.return_value = {
+                    "choices": [{"message": {"content": json["messages"][-1]["content"] + " 답변"}}]
+                }
+            return response
+
+        class MockAsyncClient:
+            def __init__(self, *args, **kwargs):
+                self.post = mock_post
+
+        monkeypatch.setattr("httpx.AsyncClient", MockAsyncClient)
+        metrics.reset()
+        return state
+
+    async def _settle(self, state, *coros):
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        await asyncio.sleep(0)
+        state["release"].set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_identical_calls_coalesced(self, upstream):
+        messages = [{"role": "user", "content": "질문"}]
+        results = await self._settle(upstream, *(chat_completion(messages) for _ in range(5)))
+
+        assert results == ["질문 답변"] * 5
+        assert len(upstream["calls"]) == 1
+        counters = metrics.snapshot()["counters"]
+        assert (counters["llm_chat_calls"], counters["llm_chat_coalesced"]) == (1, 4)
+
+    async def test_different_payloads_not_coalesced(self, upstream):
+        results = await self._settle(
+            upstream,
+            chat_completion([{"role": "user", "content": "a"}]),
+            chat_completion([{"role": "user", "content": "a"}], model="other/model"),
+            chat_completion([{"role": "user", "content": "b"}]),
+        )
+
+        assert results == ["a 답변", "a 답변", "b 답변"]
+        assert len(upstream["calls"]) == 3
+
+    async def test_error_shared(self, upstream):
+        upstream["error"] = 429
+        results = await self._settle(upstream, create_embedding(["x"]), create_embedding(["x"]))
+
+        assert all(isinstance(result, RateLimitError) for result in results)
+        assert len(upstream["calls"]) == 1
+        assert not llm_module._in_flight
+
+    async def test_cancelled_caller_does_not_cancel_others(self, upstream):
+        first = asyncio.ensure_future(create_embedding(["abc"]))
+        second = asyncio.ensure_future(create_embedding(["abc"]))
+        await asyncio.sleep(0)
+        first.cancel()
+        upstream["release"].set()
+
+        assert await second == [[3.0]]
+        assert first.cancelled()
+
+    async def test_duplicate_texts_sent_once(self, upstream):
+        upstream["release"].set()
+        result = await create_embedding(["서명", "본문입니다", "서명"])
+
+        assert upstream["calls"][0]["input"] == ["서명", "본문입니다"]
+        assert result == [[2.0], [5.0], [2.0]]
+        assert metrics.snapshot()["counters"]["llm_embedding_duplicates"] == 1
+
+    async def test_disabled(self, upstream, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_SINGLE_FLIGHT", False)
+        messages = [{"role": "user", "content": "질문"}]
+        await self._settle(upstream, chat_completion(messages), chat_completion(messages))
+
+        assert len(upstream["calls"]) == 2
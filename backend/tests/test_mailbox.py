@@ -0,0 +1,156 @@
+"""Tests for backend.services.mailbox (streaming mbox/.eml import)."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import asyncio
+from email.header import Header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pytest
+
+import backend.services.mailbox as mailbox_module
+from backend.config import settings
+from backend.db.sqlite import get_emails, get_import_job
+from backend.services import indexer, mailbox
+
+
+def _message(number: int, body: str | None = None, charset: str = "utf-8") -> bytes:
+    message = MIMEText(body or f"메일 본문 {number}번입니다.", "plain", charset)
+    message["From"] = f"sender{number}@example.com"
+    message["Subject"] = Header(f"제목 {number}", charset)
+    message["Date"] = "Mon, 13 Jan 2025 09:30:00 +0900"
+    message["Message-ID"] = f"<msg{number}@example.com>"
+    return message.as_bytes()
+
+
+def _mbox(messages: list[bytes]) -> bytes:
+    archive = b""
+    for raw in messages:
+        quoted = b"\n".join(b">" + line if line.startswith(b"From ") else line for line in raw.split(b"\n"))
+        archive += b"From MAILER-DAEMON Mon Jan 13 00:30:00 2025\n" + quoted + b"\n\n"
+    return archive
+
+
+class TestParseMessage:
+    """Headers and text parts are decoded from legacy charsets."""
+
+    def test_euc_kr_body_and_subject(self):
+        item = mailbox.parse_message(_message(1, "안녕하세요. 회의 일정 안내드립니다.", "euc-kr"))
+
+        assert item["body"] == "안녕하세요. 회의 일정 안내드립니다."
+        assert item["subject"] == "제목 1"
+        assert item["sender"] == "sender1@example.com"
+        assert item["created_at"] == "2025-01-13 00:30:00"
+        assert item["message_id"] == "<msg1@example.com>"
+
+    def test_raw_8bit_header(self):
+        raw = "Subject: 공지사항\nFrom: a@example.com\n\n본문".encode("cp949")
+        item = mailbox.parse_message(raw)
+
+        assert item["subject"] == "공지사항"
+        assert item["body"] == "본문"
+        assert item["message_id"].startswith("sha1:")
+
+    def test_html_only(self):
+        message = MIMEMultipart()
+        message.attach(MIMEText("<p>첫 줄</p><script>x()</script><p>둘째&nbsp;줄</p>", "html", "utf-8"))
+        item = mailbox.parse_message(message.as_bytes())
+
+        assert item["body"] == "첫 줄\n\n둘째 줄"
+
+    def test_without_text_skipped(self):
+        assert mailbox.parse_message(b"Subject: empty\n\n   ") is None
+
+
+class TestIterMbox:
+    """Messages are split on From_ lines and can resume from an offset."""
+
+    def test_split_and_resume(self, tmp_path):
+        body = "첫 줄\nFrom here on, quoted\n끝"
+        path = tmp_path / "archive.mbox"
+        path.write_bytes(_mbox([_message(1), _message(2, body), _message(3)]))
+
+        messages = list(mailbox.iter_mbox(path))
+        assert len(messages) == 3
+        assert messages[-1][0] == path.stat().st_size
+        assert mailbox.parse_message(messages[1][1])["body"] == body
+
+        resumed = list(mailbox.iter_mbox(path, messages[0][0]))
+        assert resumed == messages[1:]
+
+    def test_oversized_message_skipped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_MAX_MESSAGE_BYTES", 1000)
+        path = tmp_path / "archive.mbox"
+        path.write_bytes(_mbox([_message(1), _message(2, "긴 본문 " * 500), _message(3)]))
+
+        raws = [raw for _, raw in mailbox.iter_mbox(path)]
+        assert raws[1] is None
+        assert raws[0] is not None and raws[2] is not None
+
+
+class TestRunImport:
+    """Imports go through the ingest pipeline and resume after a failure."""
+
+    async def test_import_and_rerun(self, client, tmp_path):
+        path = tmp_path / "archive.mbox"
+        path.write_bytes(_mbox([_message(i) for i in range(5)]))
+
+        job = await mailbox.run_import(path)
+        await indexer.drain()
+
+        assert (job["status"], job["imported"], job["position"]) == ("completed", 5, path.stat().st_size)
+        emails = await get_emails()
+        assert {e["sender"] for e in emails} == {f"sender{i}@example.com" for i in range(5)}
+        assert {e["created_at"] for e in emails} == {"2025-01-13 00:30:00"}
+
+        again = await mailbox.run_import(path, restart=True)
+        assert (again["imported"], again["duplicates"]) == (0, 5)
+
+    async def test_resume_after_failure(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+        monkeypatch.setattr(settings, "IMPORT_CONCURRENCY", 1)
+        path = tmp_path / "archive.mbox"
+        path.write_bytes(_mbox([_message(i) for i in range(5)]))
+
+        real_batch = mailbox_module._import_batch
+        calls = []
+
+        async def failing_batch(items):
+            calls.append(len(items))
+            if len(calls) == 2:
+                raise RuntimeError("disk full")
+            return await real_batch(items)
+
+        monkeypatch.setattr(mailbox_module, "_import_batch", failing_batch)
+        with pytest.raises(RuntimeError):
+            await mailbox.run_import(path)
+        failed = await get_import_job(mailbox.source_key(path))
+        assert (failed["status"], failed["imported"]) == ("failed", 2)
+
+        monkeypatch.setattr(mailbox_module, "_import_batch", real_batch)
+        job = await mailbox.run_import(path)
+
+        assert (job["status"], job["imported"], job["duplicates"]) == ("completed", 5, 0)
+        assert len(await get_emails()) == 5
+
+
+class TestUploadEndpoint:
+    """POST /api/imports spools the upload and imports it in the background."""
+
+    async def test_upload(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_SPOOL_PATH", str(tmp_path / "spool"))
+
+        resp = await client.post("/imports", content=_mbox([_message(1), _message(2)]))
+        assert resp.status_code == 202
+        job_id = resp.json()["id"]
+        await asyncio.gather(*mailbox_module._tasks.values())
+
+        job = (await client.get(f"/imports/{job_id}")).json()
+        assert (job["status"], job["imported"], job["format"]) == ("completed", 2, "mbox")
+        assert not list((tmp_path / "spool").iterdir())
+
+    async def test_empty_upload_rejected(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_SPOOL_PATH", str(tmp_path / "spool"))
+        assert (await client.post("/imports", content=b"")).status_code == 400
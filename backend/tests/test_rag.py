@@ -46,23 +46,34 @@ class TestBuildContext:
         assert "[메일 #2]" in context
 
     async def test_build_context_exceeds_limit(self):
-        """Results exceeding limit should be truncated."""
-        # Create results that exceed 16000 chars
-        large_chunk = "x" * 12000
+        """Results over the token budget are dropped; smaller ones still fill the gap."""
+        large_chunk = "x" * 12000  # ~3000 tokens each
         results = [
             {"document": large_chunk, "metadata": {"email_id": 1}},
             {"document": large_chunk, "metadata": {"email_id": 2}},
-            {"document": "This should not be included", "metadata": {"email_id": 3}}
+            {"document": "This still fits", "metadata": {"email_id": 3}}
         ]
         
-        context, source_ids = _build_context(results)
+        context, source_ids = _build_context(results, budget=4000)
         
-        # Context should not exceed limit significantly
-        assert len(context) <= 16100  # Small buffer for formatting
-        # Third chunk should not be included
-        assert "This should not be included" not in context
-        # Only first result should be included
-        assert 3 not in source_ids
+        # Only one large chunk fits, the best-ranked one
+        assert source_ids == [1, 3]
+        assert context.count(large_chunk) == 1
+        # The small chunk fills the space the second large one could not
+        assert "This still fits" in context
+
+    async def test_build_context_merges_overlap(self):
+        """Adjacent chunks of one email should be merged without repeating the overlap."""
+        body = "".join(chr(0xAC00 + i % 500) for i in range(1800))
+        results = [
+            {"document": body[800:1800], "metadata": {"email_id": 7, "chunk_index": 1}},
+            {"document": body[0:1000], "metadata": {"email_id": 7, "chunk_index": 0}},
+        ]
+
+        context, source_ids = _build_context(results)
+
+        assert context == f"[메일 #7] {body}"
+        assert source_ids == [7]
 
     async def test_build_context_empty_results(self):
         """Empty results should return empty context."""
@@ -92,7 +103,7 @@ class TestAnswerQuestion:
     async def test_answer_question_success(self, monkeypatch):
         """Successful flow should return answer with sources."""
         # Mock search_similar
-        async def mock_search_similar(query, top_k=5):
+        async def mock_search_similar(query, top_k=5, **kwargs):
             return [
                 {
                     "document": "Meeting scheduled for tomorrow at 10 AM",
@@ -121,7 +132,7 @@ class TestAnswerQuestion:
     async def test_answer_question_no_results(self, monkeypatch):
         """No search results should return appropriate message."""
         # Mock search_similar to return empty list
-        async def mock_search_similar(query, top_k=5):
+        async def mock_search_similar(query, top_k=5, **kwargs):
             return []
         
         monkeypatch.setattr("backend.services.rag.search_similar", mock_search_similar)
@@ -135,7 +146,7 @@ class TestAnswerQuestion:
     async def test_answer_question_llm_failure(self, monkeypatch):
         """LLM failure should return error message."""
         # Mock search_similar
-        async def mock_search_similar(query, top_k=5):
+        async def mock_search_similar(query, top_k=5, **kwargs):
             return [
                 {"document": "Some content", "metadata": {"email_id": 5}}
             ]
@@ -158,7 +169,7 @@ class TestAnswerQuestion:
         """Chat history should be passed to LLM."""
         messages_received = None
         
-        async def mock_search_similar(query, top_k=5):
+        async def mock_search_similar(query, top_k=5, **kwargs):
             return [{"document": "content", "metadata": {"email_id": 1}}]
         
         async def mock_chat_completion(messages):
@@ -187,7 +198,7 @@ class TestAnswerQuestion:
         """Sources should include preview text truncated to 100 chars."""
         long_text = "x" * 200
         
-        async def mock_search_similar(query, top_k=5):
+        async def mock_search_similar(query, top_k=5, **kwargs):
             return [
                 {"document": long_text, "metadata": {"email_id": 99}}
             ]
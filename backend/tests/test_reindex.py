@@ -0,0 +1,67 @@
+"""Unit tests for backend.services.reindex module."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+from backend.db import chromadb as chromadb_module
+from backend.db.sqlite import get_index_state, insert_email, set_index_state, update_email_category
+from backend.services import indexer, reindex
+from backend.services.embeddings import get_collection
+
+
+class TestRunReindex:
+    """Tests for run_reindex function."""
+
+    async def test_reindex_switches_collection(self, temp_db, temp_chromadb, mock_llm):
+        """All emails should land in a new collection that becomes active."""
+        first = await insert_email({"body": "첫 번째 메일", "category": "공지사항"})
+        second = await insert_email({"body": "두 번째 메일", "category": "일정"})
+        await indexer.drain()
+
+        result = await reindex.run_reindex(embedding_model="test-embedding")
+
+        active = get_collection()
+        assert active.name == "emails_v1"
+        assert active.metadata["embedding_model"] == "test-embedding"
+        assert result["indexed"] == 2
+        stored = active.get(include=["metadatas"])
+        assert {m["email_id"] for m in stored["metadatas"]} == {first, second}
+
+        state = await get_index_state()
+        assert state["active_collection"] == "emails_v1"
+        assert state["previous_collection"] == "emails"
+        assert "reindex" not in state
+
+    async def test_reindex_resumes_and_dual_writes(self, temp_db, temp_chromadb, mock_llm):
+        """A resumed rebuild skips finished emails; queued changes reach both collections."""
+        first = await insert_email({"body": "첫 번째 메일", "category": "공지사항"})
+        second = await insert_email({"body": "두 번째 메일", "category": "일정"})
+        await indexer.drain()
+
+        # Interrupted after the first email
+        await set_index_state({
+            "index_version": 1,
+            "reindex": {
+                "collection": "emails_v1",
+                "embedding_model": "test-embedding",
+                "chunk_size": 1000,
+                "chunk_overlap": 200,
+                "last_id": first,
+                "indexed": 1,
+            },
+        })
+        await reindex.load_state()
+        target = chromadb_module.get_build_collection()
+
+        # A change made before the resume reaches the target through the outbox
+        await update_email_category(second, "HR/인사")
+        await indexer.drain()
+        assert temp_chromadb.get(where={"email_id": second})["metadatas"][0]["category"] == "HR/인사"
+
+        result = await reindex.run_reindex()
+        assert result["indexed"] == 2
+
+        stored = target.get(include=["metadatas"])
+        assert {m["email_id"] for m in stored["metadatas"]} == {second}
+        assert stored["metadatas"][0]["category"] == "HR/인사"
+        assert get_collection().name == "emails_v1"
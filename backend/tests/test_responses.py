@@ -0,0 +1,74 @@
+"""Tests for conditional GETs (ETag / If-None-Match) and response compression."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import pytest
+
+from backend.db.sqlite import add_category, get_table_version
+
+
+class TestConditionalGet:
+    """List, detail and category endpoints answer 304 until their table changes."""
+
+    async def test_list_not_modified_until_write(self, client):
+        first = await client.get("/emails")
+        tag = first.headers["etag"]
+        assert first.status_code == 200
+
+        cached = await client.get("/emails", headers={"If-None-Match": tag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        await client.post("/emails", json={"body": "새 메일", "sender": "보낸이"})
+        changed = await client.get("/emails", headers={"If-None-Match": tag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != tag
+        assert len(changed.json()) == 1
+
+    async def test_detail_tag_follows_lazy_summary(self, client):
+        created = (await client.post("/emails", json={"body": "본문", "sender": "보낸이"})).json()
+
+        first = await client.get(f"/emails/{created['id']}")
+        assert first.status_code == 200
+        cached = await client.get(
+            f"/emails/{created['id']}", headers={"If-None-Match": first.headers["etag"]}
+        )
+        assert cached.status_code == 304
+
+    async def test_categories_not_modified_until_write(self, client):
+        tag = (await client.get("/categories")).headers["etag"]
+        assert (await client.get("/categories", headers={"If-None-Match": tag})).status_code == 304
+
+        await client.post("/categories", json={"name": "신규"})
+        assert (await client.get("/categories", headers={"If-None-Match": tag})).status_code == 200
+
+    async def test_version_counts_writes(self, temp_db):
+        before = await get_table_version("categories")
+        await add_category("신규")
+        assert await get_table_version("categories") == before + 1
+
+
+class TestCompression:
+    """Large responses are compressed, small ones are sent as is."""
+
+    async def _fill(self, client, count: int = 30):
+        for i in range(count):
+            await client.post("/emails", json={"body": f"본문 {i} " * 40, "sender": f"보낸이{i}"})
+
+    async def test_large_list_gzipped(self, client):
+        await self._fill(client)
+        resp = await client.get("/emails", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert len(resp.json()) == 30
+
+    async def test_small_response_uncompressed(self, client):
+        resp = await client.get("/emails/stats/classification", headers={"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        assert "content-encoding" not in resp.headers
+
+    async def test_brotli_when_accepted(self, client):
+        pytest.importorskip("brotli")
+        await self._fill(client)
+        resp = await client.get("/emails", headers={"Accept-Encoding": "br, gzip"})
+        assert resp.headers["content-encoding"] == "br"
@@ -0,0 +1,94 @@
+"""Unit tests for backend.services.rules module."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+from backend.db.sqlite import add_category, get_rules, update_category
+from backend.services.rules import learn, match, normalize_subject, rule_keys
+
+
+class TestRuleKeys:
+    """Tests for rule key extraction."""
+
+    async def test_normalize_subject(self):
+        """Reply markers, digits, case and spacing should be normalized away."""
+        assert normalize_subject("RE: Fwd: [주간보고]  2025년 3주차") == "[주간보고] #년 #주차"
+
+    async def test_normalize_subject_prefix_length(self):
+        """Only a fixed-length prefix should be kept."""
+        assert len(normalize_subject("가" * 100)) == 20
+
+    async def test_rule_keys_with_address(self):
+        """An address sender should yield sender and domain keys."""
+        keys = rule_keys("인사팀 <HR@Corp.example.com>", "급여 명세서 안내")
+        assert keys == [
+            ("sender", "hr@corp.example.com"),
+            ("domain", "corp.example.com"),
+            ("subject", "급여 명세서 안내"),
+        ]
+
+    async def test_rule_keys_plain_name(self):
+        """A display-name sender has no domain key."""
+        assert rule_keys("김철수", None) == [("sender", "김철수")]
+
+    async def test_rule_keys_empty(self):
+        """No sender and no subject means nothing to match on."""
+        assert rule_keys(None, "") == []
+
+
+class TestMatch:
+    """Tests for learn/match against SQLite."""
+
+    async def test_match_after_enough_support(self, temp_db):
+        """A key needs RULE_MIN_SUPPORT corrections before it routes."""
+        await learn("hr@corp.com", None, "HR/인사")
+        assert await match("hr@corp.com", None, ["HR/인사"]) is None
+
+        await learn("hr@corp.com", None, "HR/인사")
+        result = await match("hr@corp.com", None, ["HR/인사"])
+        assert result["category"] == "HR/인사"
+        assert result["kind"] == "sender"
+        assert result["confidence"] == 1.0
+
+    async def test_match_conflicting_corrections(self, temp_db):
+        """Corrections split across categories are not confident."""
+        for category in ["HR/인사", "HR/인사", "공지사항"]:
+            await learn("all@corp.com", None, category)
+        assert await match("all@corp.com", None, ["HR/인사", "공지사항"]) is None
+
+    async def test_match_falls_back_to_domain(self, temp_db):
+        """An unseen sender can still be routed by its domain."""
+        await learn("a@notice.corp.com", None, "공지사항")
+        await learn("b@notice.corp.com", None, "공지사항")
+
+        result = await match("c@notice.corp.com", None, ["공지사항"])
+        assert result["category"] == "공지사항"
+        assert result["kind"] == "domain"
+
+    async def test_match_ignores_unknown_category(self, temp_db):
+        """Rules pointing at categories that no longer exist are skipped."""
+        await learn("x@corp.com", None, "삭제됨")
+        await learn("x@corp.com", None, "삭제됨")
+        assert await match("x@corp.com", None, ["공지사항"]) is None
+
+    async def test_learn_accumulates_support(self, temp_db):
+        """Repeated corrections increment a single rule row."""
+        await learn("김철수", None, "프로젝트")
+        await learn("김철수", None, "프로젝트")
+        rules = await get_rules()
+        assert len(rules) == 1
+        assert rules[0]["support"] == 2
+
+    async def test_rename_merges_colliding_rules(self, temp_db):
+        """Renaming onto a name with leftover rules keeps the combined support."""
+        await learn("김철수", None, "새 프로젝트")
+        await learn("김철수", None, "새 프로젝트")
+        await learn("김철수", None, "옛 프로젝트")
+        category_id = await add_category("옛 프로젝트")
+
+        await update_category(category_id, "새 프로젝트")
+
+        rules = await get_rules()
+        assert len(rules) == 1
+        assert rules[0]["category"] == "새 프로젝트"
+        assert rules[0]["support"] == 3
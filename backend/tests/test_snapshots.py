@@ -0,0 +1,142 @@
+"""Tests for backend.services.snapshots (online snapshot and restore)."""
+
+import sys
+sys.path.insert(0, "C:/dev/mail-assistant")
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+import backend.services.snapshots as snapshots_module
+from backend.config import settings
+from backend.db.chromadb import get_client
+from backend.db.sqlite import get_emails, get_outbox_stats, insert_email
+from backend.services import indexer, snapshots
+from backend.services.embeddings import active_embedding_model
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = tmp_path / "snapshots"
+    monkeypatch.setattr(settings, "SNAPSHOT_PATH", str(path))
+    return path
+
+
+def _email(number: int) -> dict:
+    return {
+        "sender": f"sender{number}@example.com",
+        "subject": f"제목 {number}",
+        "body": f"메일 본문 {number}번입니다.",
+        "category": "프로젝트",
+    }
+
+
+async def _insert(number: int) -> int:
+    model = await active_embedding_model()
+    return await insert_email(_email(number), vectors=[[0.1 * (number + 1), 0.5, 0.5]], embedding_model=model)
+
+
+class TestSnapshot:
+    """Snapshots copy both stores and restore without re-embedding."""
+
+    async def test_round_trip(self, client, temp_chromadb, snapshot_path, tmp_path, monkeypatch):
+        ids = [await _insert(i) for i in range(3)]
+        await indexer.drain()
+
+        manifest = await snapshots.create_snapshot()
+        assert (manifest["vector_count"], manifest["dimension"]) == (3, 3)
+        assert manifest["bytes"] > manifest["sqlite_bytes"] > 0
+        assert [s["name"] for s in snapshots.list_snapshots()] == [manifest["name"]]
+
+        # Lose everything, then restore
+        monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "restored.db"))
+        temp_chromadb.delete(ids=temp_chromadb.get()["ids"])
+
+        async def no_embedding(texts, model=None):
+            raise AssertionError("restore must not embed")
+
+        monkeypatch.setattr("backend.services.embeddings.create_embedding", no_embedding)
+        result = await snapshots.restore_snapshot(manifest["name"])
+
+        assert result["vector_count"] == 3
+        assert sorted(e["id"] for e in await get_emails()) == ids
+        restored = get_client().get_collection(manifest["collection"])
+        stored = restored.get(ids=[f"email_{ids[2]}_chunk_0"], include=["embeddings", "metadatas"])
+        assert np.allclose(stored["embeddings"][0], [0.3, 0.5, 0.5])
+        assert stored["metadatas"][0]["email_id"] == ids[2]
+
+    async def test_pending_outbox_applied_after_restore(self, client, temp_chromadb, snapshot_path, monkeypatch):
+        await _insert(0)
+        await indexer.drain()
+        pending_id = await _insert(1)
+
+        manifest = await snapshots.create_snapshot()
+        assert manifest["vector_count"] == 1
+        assert (await get_outbox_stats())["pending"] == 1
+
+        await snapshots.restore_snapshot(manifest["name"])
+        restored = get_client().get_collection(manifest["collection"])
+        monkeypatch.setattr("backend.db.chromadb.get_collection", lambda: restored)
+        await indexer.drain()
+
+        assert restored.count() == 2
+        assert restored.get(where={"email_id": pending_id})["ids"]
+
+    def test_backup_falls_back_under_writes(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "SNAPSHOT_PAGES_PER_STEP", 1)
+        monkeypatch.setattr(settings, "SNAPSHOT_STEP_SLEEP", 0)
+        monkeypatch.setattr(settings, "SNAPSHOT_MAX_RESTARTS", 2)
+        source = tmp_path / "source.db"
+        db = sqlite3.connect(source)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE t (x TEXT)")
+        db.executemany("INSERT INTO t VALUES (?)", [("x" * 1000,)] * 50)
+        db.commit()
+
+        real_connect = sqlite3.connect
+
+        class WritingSource:
+            """The source connection; another connection writes before every progress report."""
+
+            def __init__(self, path):
+                self._connection = real_connect(path)
+
+            def backup(self, target, pages=-1, progress=None, sleep=0.25):
+                def report(*args):
+                    db.execute("INSERT INTO t VALUES ('y')")
+                    db.commit()
+                    progress(*args)
+
+                self._connection.backup(target, pages=pages, progress=report if progress else None, sleep=sleep)
+
+            def close(self):
+                self._connection.close()
+
+        monkeypatch.setattr(
+            snapshots_module.sqlite3, "connect",
+            lambda path: WritingSource(path) if path == str(source) else real_connect(path),
+        )
+        info = snapshots_module._backup_sqlite(source, tmp_path / "copy.db")
+        monkeypatch.setattr(snapshots_module.sqlite3, "connect", real_connect)
+
+        assert info["sqlite_restarts"] == 3
+        copied = sqlite3.connect(tmp_path / "copy.db").execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        assert copied == db.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+class TestSnapshotEndpoint:
+    """POST /api/admin/snapshots runs in the background; GET lists them."""
+
+    async def test_start_and_list(self, client, snapshot_path):
+        await _insert(0)
+        await indexer.drain()
+
+        resp = await client.post("/admin/snapshots")
+        assert resp.status_code == 202
+        await snapshots_module._task
+
+        body = (await client.get("/admin/snapshots")).json()
+        assert (body["running"], body["error"]) == (False, None)
+        assert body["snapshots"][0]["vector_count"] == 1
+        assert (snapshot_path / body["snapshots"][0]["name"] / "manifest.json").exists()
@@ -4,11 +4,13 @@ import api from '../api/client';
 // Type definitions
 interface Email {
   id: number;
-  body: string;
+  // Only the detail endpoint returns the body; lists carry a preview
+  body: string | null;
+  preview: string | null;
   sender: string;
   subject: string;
   category: string;
-  summary: string;
+  summary: string | null;
   created_at: string;
 }
 
@@ -58,6 +60,19 @@ const EmailList = () => {
     fetchEmails();
   }, [selectedCategory]);
 
+  // Open an email; the detail endpoint generates a missing summary on demand
+  const openEmail = async (email: Email) => {
+    setSelectedEmail(email);
+    if (email.body !== null && email.summary !== null) return;
+    try {
+      const response = await api.get<Email>(`/emails/${email.id}`);
+      setSelectedEmail(response.data);
+      setEmails((prev) => prev.map((e) => (e.id === email.id ? response.data : e)));
+    } catch (error) {
+      console.error('Failed to fetch email detail:', error);
+    }
+  };
+
   // Helper to format date
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
@@ -129,7 +144,7 @@ const EmailList = () => {
             {emails.map((email) => (
               <div 
                 key={email.id} 
-                onClick={() => setSelectedEmail(email)}
+                onClick={() => openEmail(email)}
                 className="bg-white p-6 rounded-xl shadow-sm border border-slate-100 hover:shadow-md hover:border-blue-200 hover:-translate-y-1 transition-all cursor-pointer group flex flex-col h-full"
               >
                 <div className="flex justify-between items-start mb-3 gap-2">
@@ -152,7 +167,7 @@ const EmailList = () => {
                 
                 <div className="mt-auto">
                   <p className="text-slate-600 text-sm line-clamp-3 bg-slate-50 p-3 rounded-lg border border-slate-100 group-hover:bg-blue-50/30 group-hover:border-blue-100 transition-colors">
-                    {email.summary || email.body.substring(0, 100)}
+                    {email.summary || (email.preview ?? '').substring(0, 100)}
                   </p>
                 </div>
               </div>
@@ -203,7 +218,7 @@ const EmailList = () => {
                   <span className="text-lg">📝</span> 요약 내용
                 </h4>
                 <div className="bg-blue-50/50 p-5 rounded-xl border border-blue-100 text-slate-700 leading-relaxed shadow-sm">
-                  {selectedEmail.summary}
+                  {selectedEmail.summary ?? "요약 생성 중..."}
                 </div>
               </div>
 
@@ -214,7 +229,7 @@ const EmailList = () => {
                     원문 보기
                   </summary>
                   <div className="mt-3 p-4 bg-slate-50 rounded-xl border border-slate-200 text-sm text-slate-600 whitespace-pre-wrap font-mono leading-relaxed overflow-x-auto">
-                    {selectedEmail.body}
+                    {selectedEmail.body ?? selectedEmail.preview}
                   </div>
                 </details>
               </div>